@@ -10,9 +10,21 @@ from typing import Dict, Any
 import sqlite3
 from datetime import datetime
 import json
-import math
 import time
-from scipy.integrate import odeint
+import functools
+from collections import deque
+
+import antibiogramas
+import cache_resultados
+import calculos_bio
+import halos
+import vigilancia
+from almacen_series import AlmacenSeries
+import metabolitos
+from metabolitos import AlmacenMetabolitos
+import telemetria
+import alarmas
+import flota
 
 # Configurar página de Streamlit
 st.set_page_config(
@@ -22,6 +34,52 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+MAX_TIEMPOS = 200  # Ejecuciones recientes que se conservan para el diagnóstico
+
+
+def registrar_tiempo(ambito, segundos):
+    """Guardar la duración de una ejecución (completa o de un panel) en la sesión."""
+    if 'tiempos_ejecucion' not in st.session_state:
+        st.session_state.tiempos_ejecucion = deque(maxlen=MAX_TIEMPOS)
+    st.session_state.tiempos_ejecucion.append((ambito, segundos))
+
+
+def fragmento(funcion=None, *, run_every=None):
+    """Panel con reruns propios (st.fragment): sus widgets solo vuelven a ejecutar el panel.
+
+    Con `run_every` (segundos) el panel además se refresca solo, sin rerun de la página.
+    """
+    if funcion is None:
+        return functools.partial(fragmento, run_every=run_every)
+    
+    @functools.wraps(funcion)
+    def medido(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            registrar_tiempo(funcion.__name__, time.perf_counter() - inicio)
+    return st.fragment(medido, run_every=run_every)
+
+
+def crear_lector_telemetria(fuente):
+    return telemetria.LectorTelemetria(fuente, motor_alarmas=alarmas.MotorAlarmas(etiquetas=telemetria.ETIQUETAS))
+
+
+@st.cache_resource(show_spinner=False)
+def lector_telemetria_compartido(tipo_fuente, destino):
+    """Un lector de telemetría por fuente real (socket o archivo) para todas las sesiones del servidor.
+
+    Cada pestaña consulta los mismos búferes en lugar de abrir su propia conexión a la planta;
+    el hilo se cierra solo cuando ninguna sesión lo consulta (LectorTelemetria.inactividad_maxima).
+    """
+    if tipo_fuente == "Socket TCP/Unix":
+        fuente = telemetria.FuenteSocket(destino)
+    else:
+        fuente = telemetria.FuenteArchivo(destino)
+    return crear_lector_telemetria(fuente)
+
+
 class BioLabAppEspanol:
     """Aplicación completa BioLab Pro Suite en español."""
     
@@ -42,11 +100,22 @@ class BioLabAppEspanol:
         if 'experimentos' not in st.session_state:
             st.session_state.experimentos = []
         
+        # Series temporales deduplicadas; los experimentos guardan solo referencias
+        if 'almacen_series' not in st.session_state:
+            st.session_state.almacen_series = AlmacenSeries()
+        
         if 'datos_antibiogramas' not in st.session_state:
             st.session_state.datos_antibiogramas = []
+            st.session_state.version_antibiogramas = 0
+        
+        # Tablas de puntos de corte versionadas y versión activa
+        if 'indice_puntos_corte' not in st.session_state:
+            st.session_state.indice_puntos_corte = antibiogramas.indice_por_defecto()
+            st.session_state.version_puntos_corte = antibiogramas.ESTANDAR_POR_DEFECTO
         
-        if 'datos_metabolitos' not in st.session_state:
-            st.session_state.datos_metabolitos = []
+        # Mediciones de metabolitos en formato largo (columnar)
+        if 'metabolitos' not in st.session_state:
+            st.session_state.metabolitos = AlmacenMetabolitos()
         
         if 'parametros_biorreactor' not in st.session_state:
             st.session_state.parametros_biorreactor = {
@@ -64,6 +133,11 @@ class BioLabAppEspanol:
         # Real-time data streaming
         if 'streaming_enabled' not in st.session_state:
             st.session_state.streaming_enabled = False
+            st.session_state.lector_telemetria = None
+        
+        # Flota de reactores en paralelo (estado compartido en arreglos)
+        if 'lector_flota' not in st.session_state:
+            st.session_state.lector_flota = None
         
         # Personalized recommendations
         if 'user_preferences' not in st.session_state:
@@ -221,6 +295,8 @@ class BioLabAppEspanol:
     
     def ejecutar(self):
         """Ejecutar la aplicación principal."""
+        inicio = time.perf_counter()
+        
         # Aplicar tema personalizado
         self._aplicar_tema_personalizado()
         
@@ -232,41 +308,76 @@ class BioLabAppEspanol:
         # Barra lateral
         self.renderizar_barra_lateral()
         
-        # Contenido principal con pestañas
-        tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
-            "📥 Entrada de Datos", 
-            "📊 Análisis Cinético", 
-            "🦠 Antibiogramas", 
-            "🧬 Metabolitos", 
-            "⚗️ Biorreactor", 
-            "🤖 Predicción ML", 
-            "⚡ Optimización", 
-            "🧪 Simulación"
-        ])
-        
-        with tab1:
-            self.renderizar_pestana_entrada_datos()
-        
-        with tab2:
-            self.renderizar_pestana_analisis()
-        
-        with tab3:
-            self.renderizar_pestana_antibiogramas()
-        
-        with tab4:
-            self.renderizar_pestana_metabolitos()
-        
-        with tab5:
-            self.renderizar_pestana_biorreactor()
-        
-        with tab6:
-            self.renderizar_pestana_ml()
-        
-        with tab7:
-            self.renderizar_pestana_optimizacion()
-        
-        with tab8:
-            self.renderizar_pestana_simulacion()
+        # Contenido principal: solo se ejecuta la sección activa
+        seccion = self.navegar({
+            "📥 Entrada de Datos": self.renderizar_pestana_entrada_datos,
+            "📊 Análisis Cinético": self.renderizar_pestana_analisis,
+            "🦠 Antibiogramas": self.renderizar_pestana_antibiogramas,
+            "🧬 Metabolitos": self.renderizar_pestana_metabolitos,
+            "⚗️ Biorreactor": self.renderizar_pestana_biorreactor,
+            "🏭 Flota": self.renderizar_pestana_flota,
+            "🤖 Predicción ML": self.renderizar_pestana_ml,
+            "⚡ Optimización": self.renderizar_pestana_optimizacion,
+            "🧪 Simulación": self.renderizar_pestana_simulacion
+        }, "seccion_activa")
+        registrar_tiempo(f"Ejecución completa: {seccion}", time.perf_counter() - inicio)
+        
+        # Diagnóstico al final, para incluir los cálculos de esta ejecución
+        if st.session_state.get('mostrar_avanzado'):
+            with st.sidebar:
+                self.renderizar_diagnostico_tiempos()
+                self.renderizar_diagnostico_cache()
+    
+    def navegar(self, secciones, clave):
+        """Renderizar solo la sección elegida (st.tabs ejecuta todas las pestañas en cada rerun)."""
+        opciones = list(secciones)
+        # La selección se respalda aparte: el estado del widget se borra cuando no se dibuja
+        previa = st.session_state.get(f"_{clave}", opciones[0])
+        seccion = st.radio("Sección", opciones, index=opciones.index(previa) if previa in opciones else 0,
+                           horizontal=True, key=clave, label_visibility="collapsed")
+        st.session_state[f"_{clave}"] = seccion
+        secciones[seccion]()
+        return seccion
+    
+    def renderizar_diagnostico_tiempos(self):
+        """Renderizar la duración de las ejecuciones completas y de los paneles con reruns propios."""
+        tiempos = st.session_state.get('tiempos_ejecucion')
+        if not tiempos:
+            return
+        with st.expander("⏱️ Tiempos de Ejecución"):
+            df_tiempos = pd.DataFrame(list(tiempos), columns=['Ámbito', 'Segundos'])
+            ultima = df_tiempos[df_tiempos['Ámbito'].str.startswith("Ejecución completa")].tail(1)
+            if len(ultima):
+                st.metric("Última ejecución completa", f"{ultima['Segundos'].iloc[0] * 1000:.0f} ms")
+            resumen = df_tiempos.groupby('Ámbito')['Segundos'].agg(['count', 'median', 'max']) * [1, 1000, 1000]
+            resumen.columns = ['Ejecuciones', 'Mediana (ms)', 'Máximo (ms)']
+            st.dataframe(resumen.round(1), use_container_width=True)
+    
+    def renderizar_diagnostico_cache(self):
+        """Renderizar entradas, tasa de aciertos y memoria de las cachés de resultados."""
+        with st.expander("🩺 Diagnóstico de Caché"):
+            df_cache = cache_resultados.estadisticas()
+            if df_cache.empty:
+                st.info("No hay cachés registradas")
+                return
+            consultas = df_cache['aciertos'].sum() + df_cache['fallos'].sum()
+            col1, col2 = st.columns(2)
+            col1.metric("Tasa de aciertos", f"{df_cache['aciertos'].sum() / consultas * 100:.0f}%" if consultas else "—")
+            col2.metric("Memoria", f"{df_cache['memoria_mb'].sum():.1f} MB")
+            st.metric("Tiempo de cálculo ahorrado", f"{df_cache['segundos_ahorrados'].sum():.2f} s")
+            
+            df_cache['cache'] = df_cache['cache'].str.rsplit('.', n=1).str[-1]
+            df_cache['tasa_aciertos'] = (df_cache['tasa_aciertos'] * 100).round(1)
+            st.dataframe(
+                df_cache[['cache', 'entradas', 'aciertos', 'fallos', 'tasa_aciertos', 'memoria_mb', 'desalojos']].rename(columns={
+                    'cache': 'Función', 'entradas': 'Entradas', 'aciertos': 'Aciertos', 'fallos': 'Fallos',
+                    'tasa_aciertos': '% Aciertos', 'memoria_mb': 'MB', 'desalojos': 'Desalojos'
+                }).round(3),
+                use_container_width=True, hide_index=True
+            )
+            if st.button("🧹 Vaciar cachés", key="vaciar_caches"):
+                cache_resultados.limpiar_caches()
+                st.rerun()
     
     def _renderizar_recomendaciones_personalizadas(self):
         """Renderizar sistema de recomendaciones personalizadas."""
@@ -297,60 +408,103 @@ class BioLabAppEspanol:
             st.info("Realiza algunos experimentos para recibir recomendaciones personalizadas")
     
     def _renderizar_streaming_tiempo_real(self):
-        """Renderizar capacidades de streaming en tiempo real."""
+        """Renderizar el monitoreo en tiempo real desde el lector de telemetría en segundo plano."""
         st.markdown("### 📡 Monitoreo en Tiempo Real")
         
         # Toggle para activar streaming
         streaming = st.toggle(
             "Activar Monitoreo Continuo",
             value=st.session_state.streaming_enabled,
-            help="Simula la captura de datos en tiempo real del biorreactor"
+            help="Lee la telemetría del biorreactor (o del simulador) en segundo plano"
         )
         st.session_state.streaming_enabled = streaming
         
-        if streaming:
-            # Placeholder para datos en tiempo real
-            placeholder = st.empty()
-            
-            # Simular datos en tiempo real
-            import random
-            tiempo_actual = time.time()
-            
-            # Generar datos simulados basados en parámetros del biorreactor
-            ph_actual = st.session_state.parametros_biorreactor['ph'] + random.uniform(-0.2, 0.2)
-            temp_actual = st.session_state.parametros_biorreactor['temperatura'] + random.uniform(-1, 1)
-            agitacion_actual = st.session_state.parametros_biorreactor['agitacion'] + random.uniform(-10, 10)
-            
-            with placeholder.container():
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.metric(
-                        "pH Actual",
-                        f"{ph_actual:.2f}",
-                        delta=f"{ph_actual - st.session_state.parametros_biorreactor['ph']:.2f}"
-                    )
-                
-                with col2:
-                    st.metric(
-                        "Temperatura (°C)",
-                        f"{temp_actual:.1f}",
-                        delta=f"{temp_actual - st.session_state.parametros_biorreactor['temperatura']:.1f}"
-                    )
-                
-                with col3:
-                    st.metric(
-                        "Agitación (RPM)",
-                        f"{agitacion_actual:.0f}",
-                        delta=f"{agitacion_actual - st.session_state.parametros_biorreactor['agitacion']:.0f}"
+        if not streaming:
+            self.detener_telemetria()
+            return
+        
+        tipo_fuente = st.selectbox("Fuente de datos", ["Simulador", "Socket TCP/Unix", "Archivo (tail)"],
+                                   key="fuente_telemetria")
+        destino = ""
+        if tipo_fuente == "Socket TCP/Unix":
+            destino = st.text_input("Dirección", value="127.0.0.1:5020", key="direccion_telemetria",
+                                    help="host:puerto o unix:/ruta/al/socket; una línea 'etiqueta,valor[,tiempo]' por lectura")
+        elif tipo_fuente == "Archivo (tail)":
+            destino = st.text_input("Ruta del archivo de registro", key="ruta_telemetria",
+                                    help="Se leen las líneas nuevas con formato 'etiqueta,valor[,tiempo]' o JSON")
+            if not destino.strip():
+                st.info("Indica la ruta del archivo de registro")
+                return
+        intervalo = st.select_slider("Refresco (s)", [0.5, 1, 2, 5, 10], value=2, key="refresco_telemetria")
+        
+        lector = self.obtener_lector_telemetria(tipo_fuente, destino.strip())
+        self.renderizar_lecturas_en_vivo(lector, intervalo)
+    
+    def consignas_telemetria(self):
+        """Consignas del biorreactor para las etiquetas de telemetría (referencia del simulador)."""
+        parametros = st.session_state.parametros_biorreactor
+        return {
+            'ph': parametros['ph'],
+            'temperatura': parametros['temperatura'],
+            'agitacion': parametros['agitacion'],
+            'oxigeno_disuelto': parametros.get('oxigeno_disuelto', 30.0)
+        }
+    
+    def obtener_lector_telemetria(self, tipo_fuente, destino):
+        """Lector de la fuente elegida: compartido para socket y archivo, propio de la sesión para el simulador.
+
+        El simulador sigue las consignas del biorreactor de cada sesión, así que no se comparte.
+        """
+        if tipo_fuente == "Simulador":
+            lector = st.session_state.get('lector_telemetria')
+            if lector is None or not isinstance(lector.fuente, telemetria.FuenteSimulada):
+                lector = crear_lector_telemetria(telemetria.FuenteSimulada(self.consignas_telemetria()))
+            lector.fuente.actualizar_consignas(self.consignas_telemetria())
+        else:
+            self.detener_telemetria()  # Cierra el simulador propio si la sesión cambia de fuente
+            lector = lector_telemetria_compartido(tipo_fuente, destino)
+        lector.iniciar()
+        st.session_state.lector_telemetria = lector
+        return lector
+    
+    def detener_telemetria(self):
+        """Dejar de consultar el lector; el compartido se cierra solo si ninguna otra sesión lo usa."""
+        lector = st.session_state.get('lector_telemetria')
+        if lector is not None and isinstance(lector.fuente, telemetria.FuenteSimulada):
+            lector.detener()
+        st.session_state.lector_telemetria = None
+    
+    def renderizar_lecturas_en_vivo(self, lector, intervalo):
+        """Renderizar las últimas lecturas; el panel se refresca solo cada `intervalo` segundos."""
+        @fragmento(run_every=intervalo)
+        def lecturas_en_vivo():
+            lector.consultar()
+            if lector.error:
+                st.warning(f"⚠️ {lector.fuente.descripcion()}: {lector.error}")
+            ultimas = lector.buferes.instantanea()
+            if not ultimas:
+                st.caption(f"Esperando datos de {lector.fuente.descripcion()}...")
+                return
+            
+            consignas = self.consignas_telemetria()
+            col1, col2, col3 = st.columns(3)
+            for columna, etiqueta, formato in [(col1, 'ph', "{:.2f}"), (col2, 'temperatura', "{:.1f}"), (col3, 'agitacion', "{:.0f}")]:
+                if etiqueta in ultimas:
+                    valor = ultimas[etiqueta][1]
+                    columna.metric(
+                        telemetria.NOMBRES_ETIQUETAS[etiqueta].replace(" (RPM)", "").replace(" (°C)", ""),
+                        formato.format(valor),
+                        delta=formato.format(valor - consignas[etiqueta])
                     )
+            antiguedad = time.time() - max(t for t, _ in ultimas.values())
+            st.caption(f"{lector.fuente.descripcion()} · {lector.buferes.muestras:,} lecturas · última hace {antiguedad:.0f} s")
             
-            # Alerta si los parámetros están fuera de rango
-            if ph_actual < 4.0 or ph_actual > 9.4:
-                st.warning("⚠️ pH fuera del rango óptimo para Pseudomonas reptilivora (4.0-9.4)")
-            
-            if temp_actual < 25 or temp_actual > 35:
-                st.warning("⚠️ Temperatura fuera del rango óptimo (25-35°C)")
+            # Alarmas activas (evaluadas por el lector tras cada lote)
+            activas = lector.motor_alarmas.activas()
+            for severidad, mensaje in activas[['severidad', 'mensaje']].itertuples(index=False):
+                (st.error if severidad == alarmas.SEVERIDADES[alarmas.CRITICA] else st.warning)(f"⚠️ {mensaje}")
+        
+        lecturas_en_vivo()
     
     def renderizar_barra_lateral(self):
         """Renderizar la barra lateral."""
@@ -363,6 +517,7 @@ class BioLabAppEspanol:
             
             # Contador de experimentos
             st.metric("Experimentos Almacenados", len(st.session_state.experimentos))
+            st.metric("Series Únicas Almacenadas", len(st.session_state.almacen_series))
             
             # Estado
             st.metric("Funciones de Análisis", "✅ Activas")
@@ -453,10 +608,10 @@ class BioLabAppEspanol:
         """Mostrar una vista previa de los datos de entrada."""
         try:
             # Parsear los datos
-            tiempo = [float(x.strip()) for x in st.session_state.datos_cineticos['tiempo'].split('\n') if x.strip()]
-            biomasa = [float(x.strip()) for x in st.session_state.datos_cineticos['biomasa'].split('\n') if x.strip()]
-            sustrato = [float(x.strip()) for x in st.session_state.datos_cineticos['sustrato'].split('\n') if x.strip()]
-            producto = [float(x.strip()) for x in st.session_state.datos_cineticos['producto'].split('\n') if x.strip()]
+            tiempo = calculos_bio.parsear_serie(st.session_state.datos_cineticos['tiempo'])
+            biomasa = calculos_bio.parsear_serie(st.session_state.datos_cineticos['biomasa'])
+            sustrato = calculos_bio.parsear_serie(st.session_state.datos_cineticos['sustrato'])
+            producto = calculos_bio.parsear_serie(st.session_state.datos_cineticos['producto'])
             
             # Crear DataFrame
             df = pd.DataFrame({
@@ -537,8 +692,8 @@ class BioLabAppEspanol:
         with col_config2:
             # Obtener datos actuales para mostrar opciones
             try:
-                tiempo_actual = np.array([float(x.strip()) for x in st.session_state.datos_cineticos['tiempo'].split('\n') if x.strip()])
-                biomasa_actual = np.array([float(x.strip()) for x in st.session_state.datos_cineticos['biomasa'].split('\n') if x.strip()])
+                tiempo_actual = calculos_bio.parsear_serie(st.session_state.datos_cineticos['tiempo'])
+                biomasa_actual = calculos_bio.parsear_serie(st.session_state.datos_cineticos['biomasa'])
                 
                 if metodo_deteccion == "Manual" and len(tiempo_actual) > 3:
                     st.write("**🎚️ Selección Interactiva de Fase Exponencial:**")
@@ -574,23 +729,13 @@ class BioLabAppEspanol:
                         st.metric("Biomasa Final", f"{biomasa_actual[fin_exp]:.3f} g/L")
                     
                     # Calculate real-time kinetic parameters
-                    ln_biomasa_sel = np.log(biomasa_actual[inicio_exp:fin_exp+1])
                     tiempo_sel = tiempo_actual[inicio_exp:fin_exp+1]
                     
                     if len(tiempo_sel) >= 2:
-                        x_mean = np.mean(tiempo_sel)
-                        y_mean = np.mean(ln_biomasa_sel)
-                        denominador = np.sum((tiempo_sel - x_mean)**2)
+                        ajuste = calculos_bio.ajustar_fase_manual(tiempo_actual, biomasa_actual, inicio_exp, fin_exp)
                         
-                        if denominador > 0:
-                            slope = np.sum((tiempo_sel - x_mean) * (ln_biomasa_sel - y_mean)) / denominador
-                            intercept = y_mean - slope * x_mean
-                            
-                            # Calcular R²
-                            y_pred = slope * tiempo_sel + intercept
-                            ss_tot = np.sum((ln_biomasa_sel - y_mean)**2)
-                            ss_res = np.sum((ln_biomasa_sel - y_pred)**2)
-                            r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+                        if ajuste is not None:
+                            slope, intercept, r_squared = ajuste
                             
                             # Real-time parameter display
                             col_param1, col_param2, col_param3 = st.columns(3)
@@ -674,10 +819,10 @@ class BioLabAppEspanol:
         if st.button("🔬 Realizar Análisis Integral", type="primary"):
             try:
                 # Parsear los datos
-                tiempo = np.array([float(x.strip()) for x in st.session_state.datos_cineticos['tiempo'].split('\n') if x.strip()])
-                biomasa = np.array([float(x.strip()) for x in st.session_state.datos_cineticos['biomasa'].split('\n') if x.strip()])
-                sustrato = np.array([float(x.strip()) for x in st.session_state.datos_cineticos['sustrato'].split('\n') if x.strip()])
-                producto = np.array([float(x.strip()) for x in st.session_state.datos_cineticos['producto'].split('\n') if x.strip()])
+                tiempo = calculos_bio.parsear_serie(st.session_state.datos_cineticos['tiempo'])
+                biomasa = calculos_bio.parsear_serie(st.session_state.datos_cineticos['biomasa'])
+                sustrato = calculos_bio.parsear_serie(st.session_state.datos_cineticos['sustrato'])
+                producto = calculos_bio.parsear_serie(st.session_state.datos_cineticos['producto'])
                 
                 # Preparar configuración del análisis
                 config_analisis = {
@@ -687,261 +832,42 @@ class BioLabAppEspanol:
                 }
                 
                 # Análisis cinético integral
-                resultados = self.realizar_analisis_cinetico(tiempo, biomasa, sustrato, producto, config_analisis)
+                resultados = calculos_bio.realizar_analisis_cinetico(tiempo, biomasa, sustrato, producto, config_analisis)
                 
-                # Mostrar resultados en secciones organizadas
-                self.mostrar_resultados_analisis(resultados, tiempo, biomasa, sustrato, producto)
+                # El análisis se conserva en la sesión para que los botones de los resultados
+                # sigan disponibles en las siguientes ejecuciones del script
+                analisis = {
+                    'resultados': resultados, 'tiempo': tiempo, 'biomasa': biomasa,
+                    'sustrato': sustrato, 'producto': producto, 'indice_experimento': None
+                }
                 
-                # Guardar experimento
+                # Guardar experimento con las condiciones actuales del biorreactor
                 if st.session_state.get('auto_guardar', True):
+                    ref_series = st.session_state.almacen_series.guardar({
+                        'tiempo': tiempo, 'biomasa': biomasa,
+                        'sustrato': sustrato, 'producto': producto
+                    })
+                    parametros = st.session_state.parametros_biorreactor
                     experimento = {
                         'marca_tiempo': datetime.now().isoformat(),
-                        'datos': st.session_state.datos_cineticos,
-                        'resultados': resultados
+                        'ref_series': ref_series,
+                        'resultados': resultados,
+                        **{p: parametros[p] for p in ('ph', 'temperatura', 'agitacion', 'aireacion')}
                     }
                     st.session_state.experimentos.append(experimento)
+                    analisis['indice_experimento'] = len(st.session_state.experimentos) - 1
                     st.success("¡Análisis integral completado y guardado!")
+                st.session_state.analisis_integral = analisis
                 
             except Exception as e:
+                st.session_state.pop('analisis_integral', None)
                 st.error(f"El análisis falló: {str(e)}")
-    
-    def realizar_analisis_cinetico(self, tiempo, biomasa, sustrato, producto, config_analisis=None):
-        """Realizar análisis cinético integral."""
-        resultados = {}
-        if config_analisis is None:
-            config_analisis = {'metodo_deteccion': 'Automático'}
-        
-        # Parámetros básicos
-        resultados['biomasa_maxima'] = float(np.max(biomasa))
-        resultados['biomasa_final'] = float(biomasa[-1])
-        resultados['biomasa_inicial'] = float(biomasa[0])
-        resultados['sustrato_consumido'] = float(sustrato[0] - sustrato[-1])
-        resultados['producto_formado'] = float(producto[-1] - producto[0])
-        resultados['tiempo_cultivo'] = float(tiempo[-1] - tiempo[0])
-        
-        # Cálculos de velocidad de crecimiento (detección de fase exponencial)
-        log_biomasa = np.log(biomasa + 1e-10)  # Evitar log(0)
-        
-        # Determinar fase exponencial según configuración
-        if config_analisis['metodo_deteccion'] == 'Manual' and config_analisis.get('inicio_manual') is not None:
-            # Usar selección manual
-            inicio_idx = config_analisis['inicio_manual']
-            fin_idx = config_analisis['fin_manual']
-            
-            if inicio_idx < fin_idx and fin_idx < len(tiempo):
-                tiempo_exp = tiempo[inicio_idx:fin_idx+1]
-                log_biomasa_exp = log_biomasa[inicio_idx:fin_idx+1]
-                
-                # Regresión lineal para fase exponencial manual
-                if len(tiempo_exp) >= 2:
-                    x_mean = np.mean(tiempo_exp)
-                    y_mean = np.mean(log_biomasa_exp)
-                    slope = np.sum((tiempo_exp - x_mean) * (log_biomasa_exp - y_mean)) / np.sum((tiempo_exp - x_mean)**2)
-                    intercept = y_mean - slope * x_mean
-                    
-                    # Calcular R² para la fase seleccionada
-                    y_pred = slope * tiempo_exp + intercept
-                    ss_tot = np.sum((log_biomasa_exp - y_mean)**2)
-                    ss_res = np.sum((log_biomasa_exp - y_pred)**2)
-                    r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-                    
-                    resultados['mu_max'] = float(slope)
-                    resultados['mu_promedio'] = float(slope)
-                    resultados['r_squared_exp'] = float(r_squared)
-                    resultados['fase_exponencial'] = {
-                        'inicio': float(tiempo[inicio_idx]),
-                        'fin': float(tiempo[fin_idx]),
-                        'duracion': float(tiempo[fin_idx] - tiempo[inicio_idx]),
-                        'metodo': 'Manual'
-                    }
-                else:
-                    resultados['mu_max'] = 0.0
-                    resultados['mu_promedio'] = 0.0
-                    resultados['r_squared_exp'] = 0.0
-            else:
-                resultados['mu_max'] = 0.0
-                resultados['mu_promedio'] = 0.0
-                resultados['r_squared_exp'] = 0.0
-        else:
-            # Detección automática de fase exponencial
-            velocidades_crecimiento = []
-            mejor_r2 = 0
-            mejor_inicio = 0
-            mejor_fin = len(tiempo) - 1
-            mejor_mu = 0
-            
-            # Buscar la mejor ventana de crecimiento exponencial
-            for inicio in range(len(tiempo) - 2):
-                for fin in range(inicio + 2, len(tiempo)):
-                    tiempo_ventana = tiempo[inicio:fin+1]
-                    log_biomasa_ventana = log_biomasa[inicio:fin+1]
-                    
-                    if len(tiempo_ventana) >= 3:
-                        x_mean = np.mean(tiempo_ventana)
-                        y_mean = np.mean(log_biomasa_ventana)
-                        denominador = np.sum((tiempo_ventana - x_mean)**2)
-                        
-                        if denominador > 0:
-                            slope = np.sum((tiempo_ventana - x_mean) * (log_biomasa_ventana - y_mean)) / denominador
-                            
-                            if slope > 0:  # Solo crecimiento positivo
-                                y_pred = slope * tiempo_ventana + (y_mean - slope * x_mean)
-                                ss_tot = np.sum((log_biomasa_ventana - y_mean)**2)
-                                ss_res = np.sum((log_biomasa_ventana - y_pred)**2)
-                                r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-                                
-                                if r_squared > mejor_r2 and r_squared > 0.8:  # Umbral mínimo de calidad
-                                    mejor_r2 = r_squared
-                                    mejor_inicio = inicio
-                                    mejor_fin = fin
-                                    mejor_mu = slope
-            
-            resultados['mu_max'] = float(mejor_mu)
-            resultados['mu_promedio'] = float(mejor_mu)
-            resultados['r_squared_exp'] = float(mejor_r2)
-            resultados['fase_exponencial'] = {
-                'inicio': float(tiempo[mejor_inicio]),
-                'fin': float(tiempo[mejor_fin]),
-                'duracion': float(tiempo[mejor_fin] - tiempo[mejor_inicio]),
-                'metodo': 'Automático'
-            }
-            
-            # Calcular velocidades puntuales para referencia
-            for i in range(1, len(tiempo)):
-                if biomasa[i] > biomasa[i-1]:
-                    dt = tiempo[i] - tiempo[i-1]
-                    if dt > 0:
-                        mu = (log_biomasa[i] - log_biomasa[i-1]) / dt
-                        velocidades_crecimiento.append(mu)
-        
-        # Valores de compatibilidad
-        resultados['velocidad_crecimiento_max'] = resultados['mu_max']
-        resultados['velocidad_crecimiento_prom'] = resultados['mu_promedio']
-        
-        # Coeficientes de rendimiento
-        if resultados['sustrato_consumido'] > 0:
-            resultados['rendimiento_biomasa'] = (resultados['biomasa_final'] - resultados['biomasa_inicial']) / resultados['sustrato_consumido']
-            resultados['rendimiento_producto'] = resultados['producto_formado'] / resultados['sustrato_consumido']
-        else:
-            resultados['rendimiento_biomasa'] = 0.0
-            resultados['rendimiento_producto'] = 0.0
         
-        # Cálculos de productividad
-        if resultados['tiempo_cultivo'] > 0:
-            resultados['productividad_biomasa'] = resultados['biomasa_final'] / resultados['tiempo_cultivo']
-            resultados['productividad_producto'] = resultados['producto_formado'] / resultados['tiempo_cultivo']
-        else:
-            resultados['productividad_biomasa'] = 0.0
-            resultados['productividad_producto'] = 0.0
-        
-        # Velocidades específicas
-        biomasa_promedio = np.mean(biomasa)
-        if biomasa_promedio > 0 and resultados['tiempo_cultivo'] > 0:
-            resultados['consumo_especifico_sustrato'] = resultados['sustrato_consumido'] / (biomasa_promedio * resultados['tiempo_cultivo'])
-            resultados['formacion_especifica_producto'] = resultados['producto_formado'] / (biomasa_promedio * resultados['tiempo_cultivo'])
-        else:
-            resultados['consumo_especifico_sustrato'] = 0.0
-            resultados['formacion_especifica_producto'] = 0.0
-        
-        # Tiempo de duplicación (si se observa crecimiento)
-        if resultados['velocidad_crecimiento_max'] > 0:
-            resultados['tiempo_duplicacion'] = math.log(2) / resultados['velocidad_crecimiento_max']
-        else:
-            resultados['tiempo_duplicacion'] = float('inf')
-        
-        return resultados
-    
-    def detectar_fase_exponencial(self, tiempo, biomasa):
-        """Detectar fase de crecimiento exponencial usando análisis estadístico."""
-        try:
-            # Inicializar variables
-            fase_exponencial = {
-                'detectada': False,
-                'inicio': 0,
-                'fin': 0,
-                'duracion': 0,
-                'velocidad_crecimiento': 0,
-                'r_cuadrado': 0
-            }
-            
-            if len(tiempo) < 4:  # Necesita al menos 4 puntos para análisis significativo
-                return fase_exponencial
-            
-            # Calcular velocidades de crecimiento entre puntos consecutivos
-            log_biomasa = np.log(biomasa + 1e-10)  # Evitar log(0)
-            
-            # Encontrar el mejor segmento lineal en log(biomasa) vs tiempo
-            mejor_r_cuadrado = 0
-            mejor_indice_inicio = 0
-            mejor_indice_fin = 0
-            mejor_velocidad_crecimiento = 0
-            
-            # Probar diferentes tamaños de ventana (mínimo 3 puntos)
-            for tamano_ventana in range(3, min(len(tiempo), 8)):
-                for indice_inicio in range(len(tiempo) - tamano_ventana + 1):
-                    indice_fin = indice_inicio + tamano_ventana
-                    
-                    # Extraer datos del segmento
-                    segmento_tiempo = tiempo[indice_inicio:indice_fin]
-                    segmento_log_biomasa = log_biomasa[indice_inicio:indice_fin]
-                    
-                    # Regresión lineal en log(biomasa) vs tiempo
-                    n = len(segmento_tiempo)
-                    if n < 3:
-                        continue
-                        
-                    x_promedio = np.mean(segmento_tiempo)
-                    y_promedio = np.mean(segmento_log_biomasa)
-                    
-                    # Calcular pendiente (velocidad de crecimiento) y R-cuadrado
-                    numerador = np.sum((segmento_tiempo - x_promedio) * (segmento_log_biomasa - y_promedio))
-                    denominador = np.sum((segmento_tiempo - x_promedio) ** 2)
-                    
-                    if denominador > 0:
-                        pendiente = numerador / denominador
-                        
-                        # Calcular R-cuadrado
-                        y_pred = pendiente * (segmento_tiempo - x_promedio) + y_promedio
-                        ss_res = np.sum((segmento_log_biomasa - y_pred) ** 2)
-                        ss_tot = np.sum((segmento_log_biomasa - y_promedio) ** 2)
-                        
-                        r_cuadrado = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
-                        
-                        # Verificar si esta es la mejor fase exponencial encontrada
-                        # Criterios: R-cuadrado alto, velocidad de crecimiento positiva, duración razonable
-                        if (r_cuadrado > mejor_r_cuadrado and 
-                            r_cuadrado > 0.85 and  # Alta correlación
-                            pendiente > 0.01 and      # Crecimiento positivo
-                            pendiente < 2.0):         # Velocidad de crecimiento razonable
-                            
-                            mejor_r_cuadrado = r_cuadrado
-                            mejor_indice_inicio = indice_inicio
-                            mejor_indice_fin = indice_fin - 1
-                            mejor_velocidad_crecimiento = pendiente
-            
-            # Si se encontró una buena fase exponencial
-            if mejor_r_cuadrado > 0.85:
-                fase_exponencial.update({
-                    'detectada': True,
-                    'inicio': tiempo[mejor_indice_inicio],
-                    'fin': tiempo[mejor_indice_fin],
-                    'duracion': tiempo[mejor_indice_fin] - tiempo[mejor_indice_inicio],
-                    'velocidad_crecimiento': mejor_velocidad_crecimiento,
-                    'r_cuadrado': mejor_r_cuadrado
-                })
-            
-            return fase_exponencial
-            
-        except Exception as e:
-            # Retornar valores por defecto si la detección falla
-            return {
-                'detectada': False,
-                'inicio': 0,
-                'fin': 0,
-                'duracion': 0,
-                'velocidad_crecimiento': 0,
-                'r_cuadrado': 0
-            }
+        # Mostrar resultados en secciones organizadas
+        analisis = st.session_state.get('analisis_integral')
+        if analisis is not None:
+            self.mostrar_resultados_analisis(analisis['resultados'], analisis['tiempo'], analisis['biomasa'],
+                                             analisis['sustrato'], analisis['producto'])
     
     def mostrar_resultados_analisis(self, resultados, tiempo, biomasa, sustrato, producto):
         """Mostrar resultados de análisis integral."""
@@ -985,7 +911,7 @@ class BioLabAppEspanol:
         st.subheader("📊 Análisis Avanzado de Fases")
         
         # Detección de fase exponencial usando análisis estadístico
-        fase_exponencial = self.detectar_fase_exponencial(tiempo, biomasa)
+        fase_exponencial = calculos_bio.detectar_fase_exponencial(tiempo, biomasa)
         
         # Clasificación de fases para cada intervalo de tiempo
         fases = []
@@ -1095,21 +1021,19 @@ class BioLabAppEspanol:
             potencia_especifica = (agitacion_exp/100)**3 * 0.001 / volumen
             st.metric("Potencia Específica", f"{potencia_especifica:.2f} W/L")
             
-            # Evaluación de condiciones
-            if 6.5 <= ph_exp <= 7.5:
+            # Evaluación de condiciones con las reglas de alarmas de proceso
+            nivel_ph = alarmas.nivel_condicion('ph', ph_exp)
+            nivel_temp = alarmas.nivel_condicion('temperatura', temp_exp)
+            if nivel_ph == 0:
                 st.success("pH óptimo")
-            elif 5.5 <= ph_exp < 6.5 or 7.5 < ph_exp <= 8.5:
+            elif nivel_ph == alarmas.AVISO:
                 st.warning("pH subóptimo")
             else:
                 st.error("pH crítico")
         
         # Guardar parámetros del biorreactor con el experimento
         if st.button("💾 Guardar Experimento con Parámetros", key="guardar_experimento_bio"):
-            experimento_completo = {
-                'tiempo': tiempo,
-                'biomasa': biomasa,
-                'sustrato': sustrato,
-                'producto': producto,
+            condiciones = {
                 'ph': ph_exp,
                 'temperatura': temp_exp,
                 'agitacion': agitacion_exp,
@@ -1117,11 +1041,25 @@ class BioLabAppEspanol:
                 'kla_estimado': kla_estimado,
                 'potencia_especifica': potencia_especifica,
                 'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                **resultados  # Incluir todos los resultados cinéticos
             }
-            st.session_state.experimentos.append(experimento_completo)
+            analisis = st.session_state.get('analisis_integral', {})
+            indice = analisis.get('indice_experimento')
+            if indice is not None and indice < len(st.session_state.experimentos):
+                # El análisis ya se auto-guardó: se completan sus condiciones en lugar de duplicarlo
+                st.session_state.experimentos[indice].update(condiciones)
+            else:
+                ref_series = st.session_state.almacen_series.guardar({
+                    'tiempo': tiempo, 'biomasa': biomasa,
+                    'sustrato': sustrato, 'producto': producto
+                })
+                st.session_state.experimentos.append({
+                    'marca_tiempo': datetime.now().isoformat(),
+                    'ref_series': ref_series,
+                    'resultados': resultados,
+                    **condiciones
+                })
+                analisis['indice_experimento'] = len(st.session_state.experimentos) - 1
             st.success("Experimento guardado con parámetros del biorreactor!")
-            st.rerun()
         
         # Análisis de impacto de condiciones operacionales
         st.subheader("📊 Impacto de Condiciones Operacionales")
@@ -1136,10 +1074,10 @@ class BioLabAppEspanol:
         
         # Análisis de pH vs crecimiento
         if resultados['mu_max'] > 0:
-            if 6.5 <= ph_exp <= 7.5:
+            if nivel_ph == 0:
                 factor_ph = "óptimo"
                 impacto_ph = "maximiza"
-            elif 5.5 <= ph_exp < 6.5 or 7.5 < ph_exp <= 8.5:
+            elif nivel_ph == alarmas.AVISO:
                 factor_ph = "subóptimo"
                 impacto_ph = "reduce"
             else:
@@ -1149,9 +1087,9 @@ class BioLabAppEspanol:
             st.write(f"🔬 **Análisis de pH**: El pH {factor_ph} ({ph_exp:.1f}) {impacto_ph} la velocidad específica de crecimiento observada (μ = {resultados['mu_max']:.3f} h⁻¹)")
         
         # Análisis de temperatura vs metabolismo
-        if 25 <= temp_exp <= 30:
+        if nivel_temp == 0:
             st.write(f"🌡️ **Análisis de Temperatura**: Temperatura óptima ({temp_exp}°C) para P. reptilivora - favorece tanto crecimiento como producción de metabolitos")
-        elif 30 < temp_exp <= 37:
+        elif nivel_temp == alarmas.AVISO:
             st.write(f"🌡️ **Análisis de Temperatura**: Temperatura elevada ({temp_exp}°C) - puede favorecer producción de metabolitos secundarios")
         else:
             st.write(f"🌡️ **Análisis de Temperatura**: Temperatura subóptima ({temp_exp}°C) - impacto negativo en el rendimiento")
@@ -1169,9 +1107,9 @@ class BioLabAppEspanol:
         elif ph_exp > 7.5:
             recomendaciones.append("• Ajustar pH a rango óptimo (6.5-7.5) con HCl o H₂SO₄")
         
-        if temp_exp < 25:
+        if nivel_temp >= alarmas.ALARMA and temp_exp < 30:
             recomendaciones.append("• Aumentar temperatura a 25-30°C para optimizar crecimiento")
-        elif temp_exp > 35:
+        elif nivel_temp >= alarmas.ALARMA:
             recomendaciones.append("• Reducir temperatura para evitar estrés térmico")
         
         if potencia_especifica < 0.5:
@@ -1189,21 +1127,8 @@ class BioLabAppEspanol:
         st.subheader("🎯 Predicción de Rendimiento")
         
         # Factor de corrección basado en condiciones
-        factor_ph_corr = 1.0
-        if 6.5 <= ph_exp <= 7.5:
-            factor_ph_corr = 1.0
-        elif 5.5 <= ph_exp < 6.5 or 7.5 < ph_exp <= 8.5:
-            factor_ph_corr = 0.85
-        else:
-            factor_ph_corr = 0.6
-        
-        factor_temp_corr = 1.0
-        if 25 <= temp_exp <= 30:
-            factor_temp_corr = 1.0
-        elif 30 < temp_exp <= 35:
-            factor_temp_corr = 0.9
-        else:
-            factor_temp_corr = 0.7
+        factor_ph_corr = {0: 1.0, alarmas.AVISO: 0.85}.get(nivel_ph, 0.6)
+        factor_temp_corr = {0: 1.0, alarmas.AVISO: 0.9}.get(nivel_temp, 0.7)
         
         factor_kla_corr = min(1.0, kla_estimado / 30)
         
@@ -1237,21 +1162,12 @@ class BioLabAppEspanol:
         """Renderizar la pestaña de análisis de antibiogramas."""
         st.header("🦠 Análisis de Antibiogramas y Halos de Inhibición")
         
-        # Pestañas para diferentes tipos de análisis
-        subtab1, subtab2, subtab3 = st.tabs([
-            "📝 Entrada de Datos",
-            "📊 Análisis Individual", 
-            "📈 Análisis Estadístico"
-        ])
-        
-        with subtab1:
-            self.renderizar_entrada_antibiogramas()
-        
-        with subtab2:
-            self.renderizar_analisis_individual_antibiogramas()
-        
-        with subtab3:
-            self.renderizar_analisis_estadistico_antibiogramas()
+        # Secciones para diferentes tipos de análisis (solo se ejecuta la activa)
+        self.navegar({
+            "📝 Entrada de Datos": self.renderizar_entrada_antibiogramas,
+            "📊 Análisis Individual": self.renderizar_analisis_individual_antibiogramas,
+            "📈 Análisis Estadístico": self.renderizar_analisis_estadistico_antibiogramas
+        }, "seccion_antibiogramas")
     
     def renderizar_entrada_antibiogramas(self):
         """Renderizar entrada de datos para antibiogramas."""
@@ -1266,6 +1182,10 @@ class BioLabAppEspanol:
             microorganismo = st.text_input("Microorganismo", key="microorganismo", placeholder="ej. E. coli ATCC 25922")
             fecha_experimento = st.date_input("Fecha del Experimento", key="fecha_antibiograma")
             investigador = st.text_input("Investigador", key="investigador")
+            paciente = st.text_input("Paciente (opcional)", key="paciente_antibiograma",
+                                     help="Permite contar solo el primer aislamiento por paciente en la vigilancia")
+            origen_muestra = st.text_input("Servicio / Origen (opcional)", key="origen_antibiograma",
+                                           placeholder="ej. UCI, Urgencias, Hemocultivo")
         
         with col2:
             st.write("**Condiciones del Ensayo**")
@@ -1285,10 +1205,13 @@ class BioLabAppEspanol:
         # Entrada de datos de antibióticos
         st.subheader("💊 Datos de Antibióticos y Halos de Inhibición")
         
+        self.renderizar_puntos_corte()
+        self.renderizar_halos_imagenes(nombre_experimento, microorganismo, paciente, origen_muestra)
+        
         # Opción de subir archivo CSV
         archivo_antibiograma = st.file_uploader("Subir datos de antibiograma (CSV)", 
                                               type=['csv'], 
-                                              help="CSV con columnas: Antibiotico, Concentracion, Diametro_Halo, Unidad_Concentracion",
+                                              help="CSV con columnas: Antibiotico, Concentracion, Diametro_Halo; opcionales: Unidad_Concentracion (μg/mL, mg/mL, UI/mL), Contenido_Disco, Paciente, Origen, Fecha",
                                               key="archivo_antibiograma")
         
         if archivo_antibiograma is not None:
@@ -1298,19 +1221,20 @@ class BioLabAppEspanol:
                 st.dataframe(df_antibioticos.head())
                 
                 if st.button("Cargar Datos del Archivo", key="cargar_archivo_antibiograma"):
-                    # Procesar y guardar datos
-                    for _, fila in df_antibioticos.iterrows():
-                        self.agregar_dato_antibiograma(
-                            nombre_experimento, microorganismo, fila['Antibiotico'],
-                            fila['Concentracion'], fila['Diametro_Halo'], 
-                            fila.get('Unidad_Concentracion', 'μg/mL')
-                        )
-                    st.success(f"Se cargaron {len(df_antibioticos)} registros de antibióticos!")
+                    self.importar_antibiogramas_csv(df_antibioticos, {
+                        'experimento': nombre_experimento or "Experimento_1",
+                        'microorganismo': microorganismo or "No especificado",
+                        'paciente': paciente or None,
+                        'origen': origen_muestra or None,
+                        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    })
                     st.rerun()
                     
             except Exception as e:
                 st.error(f"Error al cargar archivo: {str(e)}")
         
+        self.mostrar_reporte_importacion()
+        
         # Entrada manual de datos
         st.write("**Entrada Manual de Datos**")
         
@@ -1333,7 +1257,8 @@ class BioLabAppEspanol:
                     self.agregar_dato_antibiograma(
                         nombre_experimento or "Experimento_1", 
                         microorganismo or "No especificado",
-                        antibiotico, concentracion, diametro_halo, unidad_conc
+                        antibiotico, concentracion, diametro_halo, unidad_conc,
+                        paciente=paciente or None, origen=origen_muestra or None
                     )
                     st.success(f"Antibiótico {antibiotico} agregado!")
                     st.rerun()
@@ -1343,7 +1268,7 @@ class BioLabAppEspanol:
         # Mostrar datos actuales
         if st.session_state.datos_antibiogramas:
             st.subheader("📋 Datos Actuales de Antibiogramas")
-            df_actual = pd.DataFrame(st.session_state.datos_antibiogramas)
+            df_actual = self.obtener_df_antibiogramas()
             st.dataframe(df_actual, use_container_width=True)
             
             # Opciones de gestión de datos
@@ -1352,6 +1277,7 @@ class BioLabAppEspanol:
             with col_gest1:
                 if st.button("🗑️ Limpiar Todos los Datos", key="limpiar_antibiogramas"):
                     st.session_state.datos_antibiogramas = []
+                    self.marcar_antibiogramas_modificados()
                     st.success("Datos limpiados!")
                     st.rerun()
             
@@ -1369,16 +1295,68 @@ class BioLabAppEspanol:
             with col_gest3:
                 # Eliminar registro específico
                 if len(df_actual) > 0:
+                    # Etiquetas en una sola operación (iloc por opción cuesta segundos con miles de registros)
+                    etiquetas = (df_actual['antibiotico'].astype(str) + " - " + df_actual['experimento'].astype(str)).tolist()
                     indice_eliminar = st.selectbox("Eliminar registro:", 
                                                  range(len(df_actual)), 
-                                                 format_func=lambda x: f"{df_actual.iloc[x]['antibiotico']} - {df_actual.iloc[x]['experimento']}",
+                                                 format_func=etiquetas.__getitem__,
                                                  key="indice_eliminar")
                     if st.button("❌ Eliminar", key="eliminar_registro"):
                         st.session_state.datos_antibiogramas.pop(indice_eliminar)
+                        self.marcar_antibiogramas_modificados()
                         st.success("Registro eliminado!")
                         st.rerun()
     
-    def agregar_dato_antibiograma(self, experimento, microorganismo, antibiotico, concentracion, diametro, unidad):
+    def importar_antibiogramas_csv(self, df_csv, valores_defecto):
+        """Importación transaccional: valida todo el archivo, interpreta en lote y agrega en una sola operación."""
+        inicio = time.perf_counter()
+        try:
+            df_nuevos, df_rechazadas = antibiogramas.preparar_importacion(df_csv, valores_defecto)
+        except ValueError as e:
+            # Esquema inválido: no se escribe ningún registro
+            st.session_state.reporte_importacion = {'error': str(e)}
+            return
+        
+        df_nuevos['interpretacion'] = st.session_state.indice_puntos_corte.interpretar_lote(
+            df_nuevos, *st.session_state.version_puntos_corte
+        )
+        if len(df_nuevos) > 0:
+            st.session_state.datos_antibiogramas.extend(df_nuevos.to_dict('records'))
+            self.marcar_antibiogramas_modificados(solo_agregados=True)
+        
+        segundos = time.perf_counter() - inicio
+        st.session_state.reporte_importacion = {
+            'importadas': len(df_nuevos),
+            'rechazadas': df_rechazadas,
+            'segundos': segundos,
+            'filas_por_segundo': len(df_csv) / segundos if segundos > 0 else float('inf')
+        }
+    
+    def mostrar_reporte_importacion(self):
+        """Mostrar el resultado de la última importación de CSV (persiste tras el rerun)."""
+        reporte = st.session_state.get('reporte_importacion')
+        if reporte is None:
+            return
+        if 'error' in reporte:
+            st.error(f"Importación cancelada, no se agregó ningún registro: {reporte['error']}")
+            return
+        
+        rechazadas = reporte['rechazadas']
+        st.success(f"Se cargaron {reporte['importadas']} registros de antibióticos "
+                   f"en {reporte['segundos']:.2f} s ({reporte['filas_por_segundo']:,.0f} filas/s)")
+        if len(rechazadas) > 0:
+            st.warning(f"{len(rechazadas)} filas rechazadas por valores inválidos")
+            st.dataframe(rechazadas, use_container_width=True)
+            st.download_button(
+                label="📥 Descargar Filas Rechazadas",
+                data=rechazadas.to_csv(index=False),
+                file_name="antibiogramas_rechazados.csv",
+                mime="text/csv",
+                key="descargar_rechazados"
+            )
+    
+    def agregar_dato_antibiograma(self, experimento, microorganismo, antibiotico, concentracion, diametro, unidad,
+                                  paciente=None, origen=None):
         """Agregar un dato de antibiograma a la sesión."""
         nuevo_dato = {
             'experimento': experimento,
@@ -1387,52 +1365,164 @@ class BioLabAppEspanol:
             'concentracion': concentracion,
             'unidad_concentracion': unidad,
             'diametro_halo': diametro,
+            'paciente': paciente,
+            'origen': origen,
             'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'interpretacion': self.interpretar_sensibilidad(antibiotico, diametro)
+            'interpretacion': self.interpretar_sensibilidad(antibiotico, diametro, microorganismo)
         }
         st.session_state.datos_antibiogramas.append(nuevo_dato)
+        self.marcar_antibiogramas_modificados(solo_agregados=True)
     
-    def interpretar_sensibilidad(self, antibiotico, diametro):
-        """Interpretar sensibilidad basada en criterios CLSI/EUCAST simplificados."""
-        # Criterios simplificados para antibióticos comunes (en mm)
-        criterios = {
-            'ampicilina': {'S': 17, 'R': 13},
-            'amoxicilina': {'S': 17, 'R': 13},
-            'penicilina': {'S': 15, 'R': 11},
-            'eritromicina': {'S': 23, 'R': 13},
-            'tetraciclina': {'S': 19, 'R': 14},
-            'cloranfenicol': {'S': 18, 'R': 12},
-            'gentamicina': {'S': 15, 'R': 12},
-            'ciprofloxacina': {'S': 21, 'R': 15},
-            'vancomicina': {'S': 15, 'R': 14},
-            'ceftriaxona': {'S': 23, 'R': 19}
-        }
-        
-        antibiotico_lower = antibiotico.lower()
-        
-        # Buscar coincidencias parciales
-        criterio_encontrado = None
-        for ab_conocido in criterios.keys():
-            if ab_conocido in antibiotico_lower or antibiotico_lower in ab_conocido:
-                criterio_encontrado = criterios[ab_conocido]
-                break
-        
-        if criterio_encontrado:
-            if diametro >= criterio_encontrado['S']:
-                return 'Sensible (S)'
-            elif diametro <= criterio_encontrado['R']:
-                return 'Resistente (R)'
-            else:
-                return 'Intermedio (I)'
-        else:
-            # Criterios generales si no se encuentra el antibiótico específico
-            if diametro >= 20:
-                return 'Sensible (S)'
-            elif diametro <= 10:
-                return 'Resistente (R)'
-            else:
-                return 'Intermedio (I)'
+    def marcar_antibiogramas_modificados(self, solo_agregados=False):
+        """Invalidar el DataFrame de antibiogramas en caché tras cualquier escritura.
+        
+        Si solo se agregaron registros al final, el agregador de vigilancia se conserva
+        y únicamente incorpora las lecturas nuevas.
+        """
+        st.session_state.version_antibiogramas += 1
+        if not solo_agregados:
+            st.session_state.pop('vigilancia', None)
+    
+    def obtener_vigilancia(self, primer_aislamiento=True):
+        """Agregador de vigilancia al día con los registros de la sesión."""
+        agregador, n_incorporados = st.session_state.get('vigilancia', (None, 0))
+        if agregador is None or agregador.primer_aislamiento != primer_aislamiento:
+            agregador, n_incorporados = vigilancia.AgregadorVigilancia(primer_aislamiento), 0
+        
+        total = len(st.session_state.datos_antibiogramas)
+        if n_incorporados < total:
+            df = self.obtener_df_antibiogramas()
+            nuevos = df.iloc[n_incorporados:]
+            if not agregador.en_orden(nuevos):
+                # Registros con fechas anteriores a lo ya contado: se reconstruye desde cero
+                agregador, nuevos = vigilancia.AgregadorVigilancia(primer_aislamiento), df
+            agregador.agregar(nuevos)
+        st.session_state.vigilancia = (agregador, total)
+        return agregador
+    
+    def obtener_df_antibiogramas(self):
+        """DataFrame de antibiogramas reconstruido solo cuando cambian los registros."""
+        cache = st.session_state.get('_df_antibiogramas')
+        if cache is None or cache[0] != st.session_state.version_antibiogramas:
+            cache = (st.session_state.version_antibiogramas, pd.DataFrame(st.session_state.datos_antibiogramas))
+            st.session_state._df_antibiogramas = cache
+        return cache[1]
+    
+    def obtener_modelos_cmi(self):
+        """Regresiones diámetro–log2(concentración) por organismo y antibiótico, recalculadas solo al cambiar los datos."""
+        cache = st.session_state.get('_modelos_cmi')
+        if cache is None or cache[0] != st.session_state.version_antibiogramas:
+            cache = (st.session_state.version_antibiogramas, antibiogramas.ajustar_cmi(self.obtener_df_antibiogramas()))
+            st.session_state._modelos_cmi = cache
+        return cache[1]
+    
+    def interpretar_sensibilidad(self, antibiotico, diametro, microorganismo=None):
+        """Interpretar sensibilidad con la versión de puntos de corte CLSI/EUCAST activa."""
+        return st.session_state.indice_puntos_corte.interpretar(
+            antibiotico, diametro, *st.session_state.version_puntos_corte, microorganismo=microorganismo
+        )
+    
+    def renderizar_puntos_corte(self):
+        """Renderizar gestión de tablas de puntos de corte versionadas."""
+        with st.expander("📚 Tablas de Puntos de Corte (CLSI/EUCAST)"):
+            indice = st.session_state.indice_puntos_corte
+            
+            archivo_puntos = st.file_uploader("Cargar tabla de puntos de corte (CSV/JSON)",
+                                              type=['csv', 'json'],
+                                              help="Columnas: estandar, version, grupo_organismo, antibiotico, contenido_disco, S, R",
+                                              key="archivo_puntos_corte")
+            if archivo_puntos is not None and st.button("Incorporar Tabla", key="incorporar_puntos_corte"):
+                try:
+                    indice.agregar(antibiogramas.cargar_puntos_corte(archivo_puntos))
+                    st.success("Tabla de puntos de corte incorporada!")
+                except Exception as e:
+                    st.error(f"Error al cargar tabla: {str(e)}")
+            
+            versiones = indice.versiones()
+            version_sel = st.selectbox("Versión activa", versiones,
+                                       index=versiones.index(st.session_state.version_puntos_corte),
+                                       format_func=lambda v: f"{v[0]} {v[1]}",
+                                       key="version_puntos_corte_sel")
+            st.session_state.version_puntos_corte = version_sel
+            
+            if st.session_state.datos_antibiogramas and st.button("🔄 Reinterpretar Todos los Registros", key="reinterpretar_antibiogramas"):
+                df_archivo = antibiogramas.reinterpretar_archivo(
+                    self.obtener_df_antibiogramas(), indice, *version_sel
+                )
+                st.session_state.datos_antibiogramas = df_archivo.to_dict('records')
+                self.marcar_antibiogramas_modificados()
+                st.success(f"Se reinterpretaron {len(df_archivo)} registros con {version_sel[0]} {version_sel[1]}")
+                st.rerun()
+    
+    def renderizar_halos_imagenes(self, nombre_experimento, microorganismo, paciente, origen_muestra):
+        """Renderizar medición automática de halos a partir de fotografías de placas."""
+        with st.expander("📷 Medición Automática de Halos (Imágenes de Placas)"):
+            imagenes = st.file_uploader("Fotografías de placas Mueller-Hinton", type=['png', 'jpg', 'jpeg', 'tif', 'tiff'],
+                                        accept_multiple_files=True, key="imagenes_placas")
+            
+            img_col1, img_col2 = st.columns(2)
+            with img_col1:
+                orden_antibioticos = st.text_area("Antibióticos en orden horario desde las 12 (uno por línea)",
+                                                  height=150, key="orden_antibioticos_placa")
+            with img_col2:
+                concentracion_disco = st.number_input("Contenido del disco (μg)", min_value=0.0, value=10.0, key="contenido_disco_placa")
+                mm_por_pixel = st.number_input("Escala (mm/píxel, 0 = automática por disco de 6 mm)",
+                                               min_value=0.0, value=0.0, format="%.4f", key="escala_placa")
+            
+            if imagenes and st.button("🔍 Analizar Placas", key="analizar_placas"):
+                inicio = time.perf_counter()
+                st.session_state.halos_detectados = halos.procesar_lote(
+                    [(imagen.name, imagen.getvalue()) for imagen in imagenes],
+                    mm_por_pixel=mm_por_pixel or None
+                )
+                duracion = time.perf_counter() - inicio
+                st.success(f"{len(imagenes)} placas analizadas en {duracion:.2f} s "
+                           f"({len(st.session_state.halos_detectados)} discos detectados)")
+            
+            df_halos = st.session_state.get('halos_detectados')
+            if df_halos is None or df_halos.empty:
+                return
+            
+            # El usuario puede marcar qué disco detectado lleva el primer antibiótico de cada placa
+            placas = pd.DataFrame({'imagen': pd.unique(df_halos['imagen']), 'primer_disco': 1})
+            placas = st.data_editor(
+                placas, hide_index=True, disabled=['imagen'], key="primer_disco_placas",
+                column_config={'primer_disco': st.column_config.NumberColumn("Disco del primer antibiótico",
+                                                                             min_value=1, step=1)}
+            )
+            antibioticos_placa = [a.strip() for a in orden_antibioticos.split('\n') if a.strip()]
+            df_halos = halos.asignar_antibioticos(df_halos, antibioticos_placa,
+                                                  dict(zip(placas['imagen'], placas['primer_disco'])))
+            st.dataframe(df_halos, use_container_width=True)
+            
+            if st.button("➕ Agregar Halos a Antibiogramas", key="agregar_halos"):
+                df_validos = df_halos[df_halos['antibiotico'].notna()]
+                if df_validos.empty:
+                    st.error("Indica los antibióticos de la placa en orden horario")
+                    return
+                df_nuevos = pd.DataFrame({
+                    'experimento': nombre_experimento or "Experimento_1",
+                    'microorganismo': microorganismo or "No especificado",
+                    'antibiotico': df_validos['antibiotico'],
+                    # Difusión en disco: el contenido va en contenido_disco, no es una concentración de dilución
+                    'concentracion': np.nan,
+                    'unidad_concentracion': None,
+                    'diametro_halo': df_validos['diametro_halo'],
+                    'contenido_disco': concentracion_disco,
+                    'paciente': paciente or None,
+                    'origen': origen_muestra or None,
+                    'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
+                df_nuevos['interpretacion'] = st.session_state.indice_puntos_corte.interpretar_lote(
+                    df_nuevos, *st.session_state.version_puntos_corte
+                )
+                st.session_state.datos_antibiogramas.extend(df_nuevos.to_dict('records'))
+                self.marcar_antibiogramas_modificados(solo_agregados=True)
+                st.session_state.halos_detectados = None
+                st.success(f"Se agregaron {len(df_nuevos)} halos medidos automáticamente!")
+                st.rerun()
     
+    @fragmento
     def renderizar_analisis_individual_antibiogramas(self):
         """Renderizar análisis individual de antibiogramas."""
         st.subheader("📊 Análisis Individual de Antibiogramas")
@@ -1441,7 +1531,7 @@ class BioLabAppEspanol:
             st.info("Primero ingresa datos de antibiogramas en la pestaña 'Entrada de Datos'")
             return
         
-        df_antibiogramas = pd.DataFrame(st.session_state.datos_antibiogramas)
+        df_antibiogramas = self.obtener_df_antibiogramas()
         
         # Seleccionar experimento para análisis
         experimentos_disponibles = df_antibiogramas['experimento'].unique()
@@ -1470,6 +1560,21 @@ class BioLabAppEspanol:
         df_mostrar.columns = ['Antibiótico', 'Concentración', 'Unidad', 'Diámetro (mm)', 'Interpretación']
         st.dataframe(df_mostrar, use_container_width=True)
         
+        # CMI estimada con todas las lecturas del microorganismo (todas las concentraciones y experimentos)
+        st.subheader("🧪 CMI Estimada por Regresión")
+        modelos = self.obtener_modelos_cmi()
+        modelos_exp = modelos[
+            (modelos['microorganismo'] == df_experimento['microorganismo'].iloc[0]) &
+            (modelos['antibiotico'].isin(df_experimento['antibiotico'].unique()))
+        ]
+        if modelos_exp['cmi'].notna().any():
+            df_cmi = modelos_exp[['antibiotico', 'unidad_concentracion', 'n', 'pendiente', 'r2', 'cmi', 'cmi_inf', 'cmi_sup']].copy()
+            df_cmi.columns = ['Antibiótico', 'Unidad', 'Lecturas', 'Pendiente (mm/log2)', 'R²', 'CMI', 'IC 95% inf', 'IC 95% sup']
+            st.dataframe(df_cmi.round(3), use_container_width=True)
+            st.caption("CMI: concentración extrapolada a la que el halo se reduce al diámetro del disco (6 mm).")
+        else:
+            st.info("Se necesitan al menos 3 lecturas con concentraciones distintas por antibiótico para estimar la CMI.")
+        
         # Visualización de halos
         st.subheader("📊 Visualización de Halos de Inhibición")
         
@@ -1539,6 +1644,7 @@ class BioLabAppEspanol:
                 else:
                     st.write(f"**{mecanismo}**: Resistencia detectada")
     
+    @fragmento
     def renderizar_analisis_estadistico_antibiogramas(self):
         """Renderizar análisis estadístico de múltiples antibiogramas."""
         st.subheader("📈 Análisis Estadístico Comparativo")
@@ -1547,49 +1653,25 @@ class BioLabAppEspanol:
             st.info("Se necesitan al menos 2 registros para análisis estadístico comparativo")
             return
         
-        df_antibiogramas = pd.DataFrame(st.session_state.datos_antibiogramas)
+        df_antibiogramas = self.obtener_df_antibiogramas()
+        
+        # Todas las tablas salen de una sola codificación S/I/R y agrupaciones
+        resumen = antibiogramas.resumen_estadistico(df_antibiogramas)
         
         # Análisis por microorganismo
         st.subheader("🦠 Análisis por Microorganismo")
         
-        microorganismos = df_antibiogramas['microorganismo'].unique()
+        por_microorganismo = resumen['por_microorganismo']
         
-        if len(microorganismos) > 1:
+        if len(por_microorganismo) > 1:
             # Comparación entre microorganismos
-            for microorganismo in microorganismos:
-                df_micro = df_antibiogramas[df_antibiogramas['microorganismo'] == microorganismo]
-                
-                sensibles = len(df_micro[df_micro['interpretacion'].str.contains('Sensible')])
-                total = len(df_micro)
-                porcentaje_sensibilidad = (sensibles / total) * 100 if total > 0 else 0
-                
-                st.write(f"**{microorganismo}**: {sensibles}/{total} sensibles ({porcentaje_sensibilidad:.1f}%)")
+            for microorganismo, fila in por_microorganismo.iterrows():
+                st.write(f"**{microorganismo}**: {int(fila['Sensibles'])}/{int(fila['Total Pruebas'])} sensibles ({fila['% Sensibilidad']:.1f}%)")
         
         # Análisis por antibiótico
         st.subheader("💊 Perfil de Resistencia por Antibiótico")
         
-        antibioticos_unicos = df_antibiogramas['antibiotico'].unique()
-        
-        datos_resistencia = []
-        for antibiotico in antibioticos_unicos:
-            df_ab = df_antibiogramas[df_antibiogramas['antibiotico'] == antibiotico]
-            
-            total_pruebas = len(df_ab)
-            sensibles = len(df_ab[df_ab['interpretacion'].str.contains('Sensible')])
-            resistentes = len(df_ab[df_ab['interpretacion'].str.contains('Resistente')])
-            intermedios = total_pruebas - sensibles - resistentes
-            
-            datos_resistencia.append({
-                'Antibiótico': antibiotico,
-                'Total Pruebas': total_pruebas,
-                'Sensibles': sensibles,
-                'Resistentes': resistentes,
-                'Intermedios': intermedios,
-                '% Sensibilidad': (sensibles / total_pruebas) * 100 if total_pruebas > 0 else 0,
-                '% Resistencia': (resistentes / total_pruebas) * 100 if total_pruebas > 0 else 0
-            })
-        
-        df_resistencia = pd.DataFrame(datos_resistencia)
+        df_resistencia = resumen['por_antibiotico'].rename_axis('Antibiótico').reset_index()
         df_resistencia = df_resistencia.sort_values('% Sensibilidad', ascending=False)
         
         st.dataframe(df_resistencia, use_container_width=True)
@@ -1611,13 +1693,10 @@ class BioLabAppEspanol:
                     st.write(f"• {fila['Antibiótico']}: {fila['% Resistencia']:.1f}% resistencia")
         
         # Análisis de tendencias temporales
-        if 'fecha' in df_antibiogramas.columns:
+        if 'por_mes' in resumen:
             st.subheader("📅 Tendencias Temporales")
             
-            df_antibiogramas['fecha'] = pd.to_datetime(df_antibiogramas['fecha'])
-            df_antibiogramas['mes_ano'] = df_antibiogramas['fecha'].dt.to_period('M')
-            
-            tendencias = df_antibiogramas.groupby(['mes_ano', 'interpretacion']).size().unstack(fill_value=0)
+            tendencias = resumen['por_mes']
             
             if len(tendencias) > 1:
                 st.write("**Evolución de la resistencia por mes:**")
@@ -1625,12 +1704,13 @@ class BioLabAppEspanol:
             else:
                 st.info("Se necesitan datos de múltiples períodos para análisis temporal")
         
+        self.renderizar_vigilancia_acumulada()
+        
         # Correlaciones entre diámetro y concentración
         st.subheader("🔗 Análisis de Correlaciones")
         
         # Filtrar datos numéricos válidos
-        df_numerico = df_antibiogramas[['concentracion', 'diametro_halo']].copy()
-        df_numerico = df_numerico.dropna()
+        df_numerico = df_antibiogramas[['concentracion', 'diametro_halo']].dropna()
         
         if len(df_numerico) > 3:
             correlacion = df_numerico['concentracion'].corr(df_numerico['diametro_halo'])
@@ -1644,59 +1724,76 @@ class BioLabAppEspanol:
             else:
                 st.info("No se detectó correlación significativa entre concentración y diámetro del halo.")
             
-            # Gráfico de dispersión usando datos tabulares
+            # Gráfico de dispersión (muestra acotada para no saturar el navegador)
+            df_grafico = df_numerico.sample(n=5000, random_state=0) if len(df_numerico) > 5000 else df_numerico
             scatter_data = pd.DataFrame({
-                'Concentración': df_numerico['concentracion'],
-                'Diámetro': df_numerico['diametro_halo']
+                'Concentración': df_grafico['concentracion'],
+                'Diámetro': df_grafico['diametro_halo']
             })
             st.scatter_chart(scatter_data.set_index('Concentración'))
+            
+            modelos = self.obtener_modelos_cmi().dropna(subset=['cmi'])
+            if len(modelos) > 0:
+                st.write("**Regresiones por organismo–antibiótico (diámetro vs log2 concentración):**")
+                df_modelos = modelos[['microorganismo', 'antibiotico', 'unidad_concentracion', 'n', 'r2', 'cmi', 'cmi_inf', 'cmi_sup']].copy()
+                df_modelos.columns = ['Microorganismo', 'Antibiótico', 'Unidad', 'Lecturas', 'R²', 'CMI', 'IC 95% inf', 'IC 95% sup']
+                st.dataframe(df_modelos.round(3), use_container_width=True)
         
         # Reporte de resistencia múltiple
         st.subheader("⚠️ Análisis de Resistencia Múltiple")
         
-        experimentos_resistencia = {}
-        for experimento in df_antibiogramas['experimento'].unique():
-            df_exp = df_antibiogramas[df_antibiogramas['experimento'] == experimento]
-            resistentes = len(df_exp[df_exp['interpretacion'].str.contains('Resistente')])
-            total = len(df_exp)
-            
-            if total >= 3 and resistentes >= 2:
-                experimentos_resistencia[experimento] = {
-                    'resistentes': resistentes,
-                    'total': total,
-                    'porcentaje': (resistentes / total) * 100
-                }
+        resistencia_multiple = resumen['resistencia_multiple']
         
-        if experimentos_resistencia:
+        if len(resistencia_multiple) > 0:
             st.warning("**Posible Resistencia Múltiple Detectada:**")
-            for exp, datos in experimentos_resistencia.items():
-                st.write(f"• {exp}: {datos['resistentes']}/{datos['total']} antibióticos resistentes ({datos['porcentaje']:.1f}%)")
+            for exp, datos in resistencia_multiple.iterrows():
+                st.write(f"• {exp}: {int(datos['Resistentes'])}/{int(datos['Total Pruebas'])} antibióticos resistentes ({datos['% Resistencia']:.1f}%)")
         else:
             st.success("No se detectaron patrones de resistencia múltiple preocupantes")
     
+    @fragmento
+    def renderizar_vigilancia_acumulada(self):
+        """Renderizar antibiograma acumulado con ventanas móviles."""
+        st.subheader("🗓️ Vigilancia Acumulada de Susceptibilidad")
+        
+        vig_col1, vig_col2, vig_col3 = st.columns(3)
+        with vig_col1:
+            meses_ventana = st.number_input("Ventana móvil (meses)", min_value=1, max_value=60, value=12, key="meses_vigilancia")
+        with vig_col2:
+            por_origen = st.checkbox("Desglosar por servicio / origen", value=False, key="vigilancia_por_origen")
+        with vig_col3:
+            primer_aislamiento = st.checkbox("Solo primer aislamiento por paciente", value=True, key="vigilancia_primer_aislamiento")
+        
+        agregador = self.obtener_vigilancia(primer_aislamiento)
+        acumulado = agregador.acumulado(meses=int(meses_ventana), por_origen=por_origen)
+        
+        if acumulado.empty:
+            st.info("No hay lecturas con fecha válida para la vigilancia acumulada")
+            return
+        
+        st.write(f"**% Sensibilidad acumulado (últimos {int(meses_ventana)} meses)** — "
+                 f"{agregador.lecturas_contadas}/{agregador.lecturas_recibidas} lecturas contadas")
+        st.dataframe(acumulado.reset_index(), use_container_width=True)
+        
+        pares = acumulado.reset_index()[['organismo', 'antibiotico']].drop_duplicates()
+        par = st.selectbox("Tendencia de organismo–antibiótico", list(pares.itertuples(index=False, name=None)),
+                           format_func=lambda p: f"{p[0]} – {p[1]}", key="par_vigilancia")
+        tendencia = agregador.tendencia(*par, meses=int(meses_ventana))
+        if len(tendencia) > 1:
+            st.line_chart(tendencia['% S'].rename(index=str))
+    
     def renderizar_pestana_metabolitos(self):
         """Renderizar la pestaña de análisis de metabolitos."""
         st.header("🧬 Análisis de Metabolitos - Pseudomonas reptilivora")
         
-        # Pestañas para diferentes categorías de metabolitos
-        subtab1, subtab2, subtab3, subtab4 = st.tabs([
-            "📝 Entrada de Datos",
-            "🔬 Análisis Primarios", 
-            "⚗️ Análisis Secundarios",
-            "📊 Cinética Metabólica"
-        ])
-        
-        with subtab1:
-            self.renderizar_entrada_metabolitos()
-        
-        with subtab2:
-            self.renderizar_analisis_primarios()
-        
-        with subtab3:
-            self.renderizar_analisis_secundarios()
-        
-        with subtab4:
-            self.renderizar_cinetica_metabolica()
+        # Secciones para diferentes categorías de metabolitos (solo se ejecuta la activa)
+        self.navegar({
+            "📝 Entrada de Datos": self.renderizar_entrada_metabolitos,
+            "🔬 Análisis Primarios": self.renderizar_analisis_primarios,
+            "⚗️ Análisis Secundarios": self.renderizar_analisis_secundarios,
+            "📊 Cinética Metabólica": self.renderizar_cinetica_metabolica,
+            "🧭 Perfilado Multivariado": self.renderizar_perfilado_metabolitos
+        }, "seccion_metabolitos")
     
     def renderizar_entrada_metabolitos(self):
         """Renderizar entrada de datos para metabolitos."""
@@ -1731,6 +1828,14 @@ class BioLabAppEspanol:
                                                "Shock térmico", "Limitación de oxígeno", "Ninguna"],
                                               key="condiciones_estres")
         
+        self.renderizar_importacion_cromatografia({
+            'experimento': nombre_experimento or "Exp_Metabolitos_1",
+            'tiempo_h': tiempo_cultivo,
+            'cepa': cepa_pseudomonas,
+            'medio': medio_cultivo,
+            'fase_crecimiento': fase_crecimiento
+        })
+        
         # Entrada de metabolitos por categoría
         st.subheader("🧪 Concentraciones de Metabolitos")
         
@@ -1824,15 +1929,17 @@ class BioLabAppEspanol:
                 st.rerun()
         
         # Mostrar datos actuales
-        if st.session_state.datos_metabolitos:
+        almacen = st.session_state.metabolitos
+        if len(almacen) > 0:
             st.subheader("📋 Datos Actuales de Metabolitos")
-            df_metabolitos = pd.DataFrame(st.session_state.datos_metabolitos)
-            st.dataframe(df_metabolitos, use_container_width=True)
+            st.caption(f"{len(almacen):,} mediciones en formato largo")
+            df_metabolitos = almacen.tabla()
+            st.dataframe(df_metabolitos.tail(1000), use_container_width=True)
             
             col_gest1, col_gest2 = st.columns(2)
             with col_gest1:
                 if st.button("🗑️ Limpiar Datos", key="limpiar_metabolitos"):
-                    st.session_state.datos_metabolitos = []
+                    almacen.limpiar()
                     st.success("Datos limpiados!")
                     st.rerun()
             
@@ -1846,128 +1953,270 @@ class BioLabAppEspanol:
                     key="descargar_metabolitos"
                 )
     
+    def renderizar_importacion_cromatografia(self, valores_defecto):
+        """Importación masiva de resultados HPLC/LC-MS al almacén de metabolitos."""
+        with st.expander("📥 Importar Resultados HPLC / LC-MS"):
+            st.caption("Formato largo (Muestra, Tiempo, Analito, Concentración, Unidad) o ancho (una columna por analito). "
+                       "Los nombres se asocian al catálogo de metabolitos y las unidades se convierten automáticamente.")
+            archivo = st.file_uploader("Archivo de resultados (CSV o Excel)", type=['csv', 'xlsx'], key="archivo_cromatografia")
+            unidad_defecto = st.selectbox("Unidad si el archivo no la indica", ["mg/L", "g/L", "μg/L", "μg/mL", "U/mL"],
+                                          key="unidad_cromatografia")
+            
+            if archivo is not None and st.button("Importar Resultados", key="importar_cromatografia"):
+                try:
+                    df = pd.read_excel(archivo) if archivo.name.lower().endswith('.xlsx') else pd.read_csv(archivo)
+                    inicio = time.perf_counter()
+                    mediciones, muestras, rechazadas, no_reconocidas = metabolitos.preparar_resultados_cromatografia(
+                        df, dict(valores_defecto, unidad=unidad_defecto,
+                                 fecha=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                    )
+                    st.session_state.metabolitos.agregar(mediciones, muestras)
+                    segundos = time.perf_counter() - inicio
+                    st.session_state.reporte_cromatografia = {
+                        'importadas': len(mediciones),
+                        'muestras': len(muestras),
+                        'rechazadas': rechazadas,
+                        'no_reconocidas': no_reconocidas,
+                        'segundos': segundos,
+                        'filas_por_segundo': (len(mediciones) + len(rechazadas)) / segundos if segundos > 0 else float('inf')
+                    }
+                except ValueError as e:
+                    st.session_state.reporte_cromatografia = {'error': str(e)}
+                st.rerun()
+            
+            reporte = st.session_state.get('reporte_cromatografia')
+            if reporte is not None:
+                if 'error' in reporte:
+                    st.error(f"Importación cancelada: {reporte['error']}")
+                else:
+                    st.success(f"Se importaron {reporte['importadas']:,} mediciones de {reporte['muestras']:,} muestras "
+                               f"en {reporte['segundos']:.2f} s ({reporte['filas_por_segundo']:,.0f} filas/s)")
+                    if reporte['no_reconocidas']:
+                        st.warning("Columnas no importadas (no coinciden con el catálogo ni sus alias): "
+                                   + ", ".join(reporte['no_reconocidas']))
+                    if len(reporte['rechazadas']) > 0:
+                        st.warning(f"{len(reporte['rechazadas']):,} filas rechazadas")
+                        st.dataframe(reporte['rechazadas'].head(1000), use_container_width=True)
+    
     def agregar_metabolitos(self, datos_metabolito):
         """Agregar datos de metabolitos a la sesión."""
-        nuevo_dato = {
+        # Solo se guardan los metabolitos con concentración detectada
+        detectados = {m: c for m, c in datos_metabolito['metabolitos'].items() if c > 0}
+        mediciones = pd.DataFrame({
+            'experimento': datos_metabolito['experimento'],
+            'tiempo_h': datos_metabolito['tiempo'],
+            'metabolito': list(detectados),
+            'valor': list(detectados.values())
+        })
+        muestra = pd.DataFrame([{
             'experimento': datos_metabolito['experimento'],
+            'tiempo_h': datos_metabolito['tiempo'],
             'cepa': datos_metabolito['cepa'],
             'medio': datos_metabolito['medio'],
-            'tiempo_h': datos_metabolito['tiempo'],
             'fase_crecimiento': datos_metabolito['fase'],
-            'categoria': datos_metabolito['categoria'],
             'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        # Agregar metabolitos individuales como columnas separadas
-        for metabolito, concentracion in datos_metabolito['metabolitos'].items():
-            if concentracion > 0:  # Solo agregar si hay concentración detectada
-                nuevo_dato[metabolito] = concentracion
-        
-        st.session_state.datos_metabolitos.append(nuevo_dato)
+        }])
+        st.session_state.metabolitos.agregar(mediciones, muestra)
+    
+    def seleccionar_muestra_metabolitos(self, categoria, clave):
+        """Selector de experimento y tiempo; devuelve (experimento, tiempo, perfil, metadatos) o None."""
+        almacen = st.session_state.metabolitos
+        experimentos = almacen.experimentos(categoria)
+        if not experimentos:
+            return None
+        
+        sel_col1, sel_col2 = st.columns(2)
+        with sel_col1:
+            experimento_sel = st.selectbox("Seleccionar Experimento:", experimentos, key=f"exp_{clave}")
+        ancha = almacen.pivote(categoria, experimento_sel).loc[experimento_sel]
+        with sel_col2:
+            tiempo_sel = st.selectbox("Tiempo de Cultivo (h):", list(ancha.index), index=len(ancha.index) - 1,
+                                      format_func=lambda t: f"{t:g}", key=f"tiempo_{clave}")
+        
+        perfil = ancha.loc[tiempo_sel].dropna()
+        perfil = perfil[perfil > 0]
+        muestras = almacen.muestras()
+        metadatos = muestras[(muestras['experimento'] == experimento_sel) & (muestras['tiempo_h'] == tiempo_sel)]
+        return experimento_sel, tiempo_sel, perfil, (metadatos.iloc[-1] if len(metadatos) > 0 else None)
     
+    @fragmento
     def renderizar_analisis_primarios(self):
         """Renderizar análisis de metabolitos primarios."""
         st.subheader("🔬 Análisis de Metabolitos Primarios")
         
-        if not st.session_state.datos_metabolitos:
+        if len(st.session_state.metabolitos) == 0:
             st.info("Primero ingresa datos de metabolitos en la pestaña 'Entrada de Datos'")
             return
         
-        df_metabolitos = pd.DataFrame(st.session_state.datos_metabolitos)
-        df_primarios = df_metabolitos[df_metabolitos['categoria'] == 'Primarios']
-        
-        if len(df_primarios) == 0:
+        seleccion = self.seleccionar_muestra_metabolitos('Primarios', 'primarios')
+        if seleccion is None:
             st.info("No hay datos de metabolitos primarios disponibles")
             return
-        
-        # Análisis por experimento
-        experimentos = df_primarios['experimento'].unique()
-        experimento_sel = st.selectbox("Seleccionar Experimento:", experimentos, key="exp_primarios")
-        
-        df_exp = df_primarios[df_primarios['experimento'] == experimento_sel]
+        _, tiempo_sel, perfil, metadatos = seleccion
         
         # Información general
         col_info1, col_info2, col_info3 = st.columns(3)
         
         with col_info1:
-            st.metric("Cepa", df_exp['cepa'].iloc[0])
-            st.metric("Medio de Cultivo", df_exp['medio'].iloc[0])
+            st.metric("Cepa", metadatos['cepa'] if metadatos is not None else "-")
+            st.metric("Medio de Cultivo", metadatos['medio'] if metadatos is not None else "-")
         
         with col_info2:
-            st.metric("Tiempo de Cultivo (h)", f"{df_exp['tiempo_h'].iloc[0]:.1f}")
-            st.metric("Fase de Crecimiento", df_exp['fase_crecimiento'].iloc[0])
+            st.metric("Tiempo de Cultivo (h)", f"{tiempo_sel:.1f}")
+            st.metric("Fase de Crecimiento", metadatos['fase_crecimiento'] if metadatos is not None else "-")
         
         with col_info3:
             # Calcular metabolitos totales detectados
-            metabolitos_cols = [col for col in df_exp.columns if col not in 
-                              ['experimento', 'cepa', 'medio', 'tiempo_h', 'fase_crecimiento', 'categoria', 'fecha']]
-            metabolitos_detectados = sum(1 for col in metabolitos_cols if df_exp[col].iloc[0] > 0)
-            st.metric("Metabolitos Detectados", metabolitos_detectados)
+            st.metric("Metabolitos Detectados", len(perfil))
             
             # Concentración total
-            concentracion_total = sum(df_exp[col].iloc[0] for col in metabolitos_cols if df_exp[col].iloc[0] > 0)
-            st.metric("Concentración Total (mg/L)", f"{concentracion_total:.2f}")
+            st.metric("Concentración Total (mg/L)", f"{perfil.sum():.2f}")
         
         # Análisis detallado por categorías
         st.subheader("📊 Perfil de Metabolitos Primarios")
         
-        # Crear gráficos para cada categoría
-        metabolitos_data = {}
-        for col in metabolitos_cols:
-            if col in df_exp.columns and df_exp[col].iloc[0] > 0:
-                metabolitos_data[col.capitalize()] = df_exp[col].iloc[0]
-        
-        if metabolitos_data:
+        if len(perfil) > 0:
             st.write("**Concentraciones Detectadas (mg/L)**")
-            metabolitos_df = pd.DataFrame(list(metabolitos_data.items()), columns=['Metabolito', 'Concentración'])
+            metabolitos_df = pd.DataFrame({'Metabolito': perfil.index.str.capitalize(), 'Concentración': perfil.to_numpy()})
             st.bar_chart(metabolitos_df.set_index('Metabolito'))
     
+    @fragmento
     def renderizar_analisis_secundarios(self):
         """Renderizar análisis de metabolitos secundarios."""
         st.subheader("⚗️ Análisis de Metabolitos Secundarios")
         
-        if not st.session_state.datos_metabolitos:
+        if len(st.session_state.metabolitos) == 0:
             st.info("Primero ingresa datos de metabolitos en la pestaña 'Entrada de Datos'")
             return
         
-        df_metabolitos = pd.DataFrame(st.session_state.datos_metabolitos)
-        df_secundarios = df_metabolitos[df_metabolitos['categoria'] == 'Secundarios']
-        
-        if len(df_secundarios) == 0:
+        # Análisis similar al de primarios pero enfocado en metabolitos secundarios
+        seleccion = self.seleccionar_muestra_metabolitos('Secundarios', 'secundarios')
+        if seleccion is None:
             st.info("No hay datos de metabolitos secundarios disponibles")
             return
+        perfil = seleccion[2]
         
-        # Análisis similar al de primarios pero enfocado en metabolitos secundarios
-        experimentos = df_secundarios['experimento'].unique()
-        experimento_sel = st.selectbox("Seleccionar Experimento:", experimentos, key="exp_secundarios")
-        
-        df_exp = df_secundarios[df_secundarios['experimento'] == experimento_sel]
-        
-        # Mostrar análisis específico para metabolitos secundarios
-        metabolitos_cols = [col for col in df_exp.columns if col not in 
-                          ['experimento', 'cepa', 'medio', 'tiempo_h', 'fase_crecimiento', 'categoria', 'fecha']]
-        
-        metabolitos_data = {}
-        for col in metabolitos_cols:
-            if col in df_exp.columns and df_exp[col].iloc[0] > 0:
-                metabolitos_data[col.capitalize()] = df_exp[col].iloc[0]
-        
-        if metabolitos_data:
+        if len(perfil) > 0:
             st.write("**Metabolitos Secundarios Producidos**")
-            metabolitos_df = pd.DataFrame(list(metabolitos_data.items()), columns=['Metabolito', 'Concentración'])
+            metabolitos_df = pd.DataFrame({'Metabolito': perfil.index.str.capitalize(), 'Concentración': perfil.to_numpy()})
             st.dataframe(metabolitos_df, use_container_width=True)
             st.bar_chart(metabolitos_df.set_index('Metabolito'))
     
+    @fragmento
     def renderizar_cinetica_metabolica(self):
         """Renderizar análisis de cinética metabólica."""
         st.subheader("📊 Cinética Metabólica Avanzada")
         
-        if len(st.session_state.datos_metabolitos) < 3:
+        almacen = st.session_state.metabolitos
+        if almacen.tabla()['tiempo_h'].nunique() < 3:
             st.info("Se necesitan al menos 3 puntos temporales para análisis cinético")
             return
         
-        st.write("Análisis cinético de metabolitos en desarrollo...")
+        st.markdown("*Ajuste de Luedeking-Piret con la biomasa de los datos cinéticos:*")
+        st.latex(r"\frac{dP}{dt} = \alpha \frac{dX}{dt} + \beta X \qquad q_P = \frac{1}{X}\frac{dP}{dt}")
+        
+        experimento_sel = st.selectbox("Seleccionar Experimento:", almacen.experimentos(), key="exp_cinetica_metabolica")
+        productos = almacen.pivote(experimento=experimento_sel).loc[experimento_sel]
+        if len(productos) < 3:
+            st.info("El experimento seleccionado necesita al menos 3 tiempos de muestreo")
+            return
+        
+        try:
+            tiempo_x = calculos_bio.parsear_serie(st.session_state.datos_cineticos['tiempo'])
+            biomasa_x = calculos_bio.parsear_serie(st.session_state.datos_cineticos['biomasa'])
+        except ValueError:
+            st.error("Los datos de biomasa de la pestaña de cinética no son numéricos")
+            return
+        if len(tiempo_x) < 3 or len(tiempo_x) != len(biomasa_x):
+            st.warning("Se necesitan datos de tiempo y biomasa válidos en la pestaña de cinética")
+            return
+        if productos.index.min() < tiempo_x.min() or productos.index.max() > tiempo_x.max():
+            st.warning("Hay tiempos de muestreo fuera del rango de biomasa; se usa el valor extremo de biomasa")
+        
+        parametros, qp = metabolitos.ajustar_luedeking_piret(productos, tiempo_x, biomasa_x)
+        
+        col_res1, col_res2, col_res3 = st.columns(3)
+        conteo = parametros['clasificacion'].value_counts()
+        col_res1.metric("Asociados al crecimiento", int(conteo.get('Asociado al crecimiento', 0)))
+        col_res2.metric("No asociados", int(conteo.get('No asociado al crecimiento', 0)))
+        col_res3.metric("Mixtos", int(conteo.get('Mixto', 0)))
+        
+        st.subheader("📐 Parámetros de Luedeking-Piret")
+        df_parametros = parametros.reset_index()
+        df_parametros.columns = ['Metabolito', 'α (producto/biomasa)', 'β (producto/biomasa/h)', 'R²', 'Puntos',
+                                 'Fracción ligada al crecimiento', 'Clasificación']
+        st.dataframe(df_parametros.round(4), use_container_width=True)
+        
+        st.subheader("⚡ Velocidad Específica de Producción qP(t)")
+        st.line_chart(qp)
+    
+    def obtener_perfilado_metabolitos(self, categoria, n_componentes, n_grupos):
+        """PCA y agrupamiento de los perfiles, recalculados solo si cambian los datos o los parámetros."""
+        almacen = st.session_state.metabolitos
+        clave = (almacen.version, categoria, n_componentes, n_grupos)
+        cache = st.session_state.get('_perfilado_metabolitos')
+        if cache is None or cache[0] != clave:
+            cache = (clave, metabolitos.perfilar_metabolitos(almacen.pivote(categoria), n_componentes, n_grupos))
+            st.session_state._perfilado_metabolitos = cache
+        return cache[1]
+    
+    @fragmento
+    def renderizar_perfilado_metabolitos(self):
+        """Renderizar PCA y agrupamiento jerárquico de perfiles de metabolitos entre experimentos."""
+        st.subheader("🧭 Perfilado Multivariado de Metabolitos")
+        
+        almacen = st.session_state.metabolitos
+        if len(almacen) == 0:
+            st.info("Primero ingresa datos de metabolitos en la pestaña 'Entrada de Datos'")
+            return
+        
+        par_col1, par_col2, par_col3 = st.columns(3)
+        with par_col1:
+            opcion = st.selectbox("Metabolitos", ["Todos", "Primarios", "Secundarios"], key="categoria_perfilado")
+        with par_col2:
+            n_componentes = st.slider("Componentes principales", 2, 6, 3, key="componentes_perfilado")
+        with par_col3:
+            n_grupos = st.slider("Número de grupos", 2, 8, 3, key="grupos_perfilado")
+        
+        categoria = None if opcion == "Todos" else opcion
+        try:
+            resultado = self.obtener_perfilado_metabolitos(categoria, n_componentes, n_grupos)
+        except ValueError as e:
+            st.info(str(e))
+            return
+        
+        puntuaciones = resultado['puntuaciones']
+        varianza = resultado['varianza_explicada']
+        col_met1, col_met2, col_met3 = st.columns(3)
+        col_met1.metric("Muestras", len(puntuaciones))
+        col_met2.metric("Metabolitos", len(resultado['cargas']))
+        col_met3.metric("Varianza explicada (PC1+PC2)", f"{varianza.iloc[:2].sum() * 100:.1f}%")
+        
+        st.write("**Mapa de muestras (PC1 vs PC2)**")
+        mapa = puntuaciones.reset_index(drop=True)
+        mapa['Grupo'] = 'Grupo ' + mapa['grupo'].astype(str)
+        if len(mapa) > 5000:
+            mapa = mapa.sample(n=5000, random_state=0)
+        if 'PC2' in mapa.columns:
+            st.scatter_chart(mapa, x='PC1', y='PC2', color='Grupo')
+        
+        col_graf1, col_graf2 = st.columns(2)
+        with col_graf1:
+            st.write("**Varianza Explicada por Componente (%)**")
+            st.bar_chart((varianza * 100).round(1))
+        with col_graf2:
+            st.write("**Cargas (contribución de cada metabolito)**")
+            st.dataframe(resultado['cargas'].round(3), use_container_width=True)
+        
+        st.write("**Perfil Medio por Grupo**")
+        perfil = resultado['perfil_grupos'].copy()
+        perfil.index = [f"Grupo {g} (n={n})" for g, n in zip(perfil.index, puntuaciones['grupo'].value_counts().sort_index())]
+        st.dataframe(perfil.round(2), use_container_width=True)
+        
+        st.write("**Asignación de Muestras**")
+        st.dataframe(puntuaciones.reset_index().round(3).head(1000), use_container_width=True)
     
+    @fragmento
     def renderizar_pestana_biorreactor(self):
         """Renderizar la pestaña de control de biorreactor."""
         st.header("⚗️ Control y Monitoreo de Biorreactor")
@@ -2017,31 +2266,199 @@ class BioLabAppEspanol:
         # Evaluación de condiciones para Pseudomonas
         st.subheader("🎯 Evaluación de Condiciones")
         
-        evaluaciones = []
+        # Mismas reglas que las alarmas de telemetría (pH de P. reptilivora: tolerancia 4.0-9.4, óptimo 6.5-7.5)
+        evaluaciones = [
+            {0: "✅ pH óptimo para Pseudomonas reptilivora",
+             alarmas.AVISO: "🔶 pH subóptimo pero aceptable para P. reptilivora",
+             alarmas.ALARMA: "⚠️ pH en rango de tolerancia extrema (supervivencia)",
+             alarmas.CRITICA: "❌ pH fuera del rango de tolerancia (4.0-9.4)"}[alarmas.nivel_condicion('ph', ph_actual)],
+            "✅ Temperatura óptima para crecimiento" if alarmas.nivel_condicion('temperatura', temperatura) == 0
+            else "⚠️ Temperatura fuera del rango recomendado",
+            "✅ Agitación adecuada" if alarmas.nivel_condicion('agitacion', agitacion) == 0
+            else "⚠️ Ajustar agitación para mejor transferencia de masa",
+        ]
         
-        # pH para Pseudomonas reptilivora (tolerancia 4.0-9.4, óptimo 6.5-7.5)
-        if 6.5 <= ph_actual <= 7.5:
-            evaluaciones.append("✅ pH óptimo para Pseudomonas reptilivora")
-        elif 5.5 <= ph_actual < 6.5 or 7.5 < ph_actual <= 8.5:
-            evaluaciones.append("🔶 pH subóptimo pero aceptable para P. reptilivora")
-        elif 4.0 <= ph_actual < 5.5 or 8.5 < ph_actual <= 9.4:
-            evaluaciones.append("⚠️ pH en rango de tolerancia extrema (supervivencia)")
-        else:
-            evaluaciones.append("❌ pH fuera del rango de tolerancia (4.0-9.4)")
+        for evaluacion in evaluaciones:
+            st.write(evaluacion)
         
-        if 25 <= temperatura <= 30:
-            evaluaciones.append("✅ Temperatura óptima para crecimiento")
-        else:
-            evaluaciones.append("⚠️ Temperatura fuera del rango recomendado")
+        self.renderizar_telemetria_biorreactor()
+    
+    def renderizar_telemetria_biorreactor(self):
+        """Renderizar las series recientes de telemetría, refrescadas desde los búferes."""
+        st.subheader("📡 Telemetría en Vivo")
+        lector = st.session_state.get('lector_telemetria')
+        if lector is None or not lector.activo:
+            st.info("Activa el Monitoreo Continuo en la barra lateral para ver la telemetría del biorreactor")
+            return
         
-        if 200 <= agitacion <= 400:
-            evaluaciones.append("✅ Agitación adecuada")
-        else:
-            evaluaciones.append("⚠️ Ajustar agitación para mejor transferencia de masa")
+        col_t1, col_t2 = st.columns(2)
+        with col_t1:
+            etiqueta = st.selectbox("Variable", list(telemetria.NOMBRES_ETIQUETAS),
+                                    format_func=telemetria.NOMBRES_ETIQUETAS.get, key="etiqueta_telemetria")
+        with col_t2:
+            ventanas = {"5 min": 300, "15 min": 900, "1 h": 3600, "6 h": 21600, "24 h": 86400, "7 días": 604800, "14 días": 1209600}
+            ventana = st.select_slider("Ventana", list(ventanas), value="15 min", key="ventana_telemetria")
+        
+        @fragmento(run_every=st.session_state.get('refresco_telemetria', 2))
+        def grafico_telemetria():
+            lector.consultar()
+            # Resolución según la ventana y LTTB: nunca más de MAX_PUNTOS_GRAFICO puntos al navegador
+            serie = lector.buferes.serie_grafico(etiqueta, ventanas[ventana])
+            if serie is None:
+                st.caption("Sin lecturas todavía")
+                return
+            indice = pd.to_datetime(serie['tiempo'], unit='s')
+            if serie['resolucion'] == 0:
+                st.line_chart(pd.Series(serie['media'], index=indice, name=telemetria.NOMBRES_ETIQUETAS[etiqueta]))
+                resolucion = "lecturas crudas"
+            else:
+                st.line_chart(pd.DataFrame({'Mínimo': serie['minimo'], 'Media': serie['media'], 'Máximo': serie['maximo']}, index=indice))
+                resolucion = f"agregados de {serie['resolucion'] // 60} min" if serie['resolucion'] >= 60 else f"agregados de {serie['resolucion']} s"
+            st.caption(f"{len(indice):,} puntos ({resolucion}) · mín {serie['minimo'].min():.2f} · máx {serie['maximo'].max():.2f} · "
+                       f"memoria de telemetría {lector.buferes.memoria_bytes() / 1024 ** 2:.1f} MB")
+            
+            motor = lector.motor_alarmas
+            activas = motor.activas()
+            st.write(f"**🚨 Alarmas activas: {len(activas)}**")
+            if len(activas):
+                st.dataframe(activas[['severidad', 'mensaje', 'desde']], hide_index=True)
+            eventos = motor.eventos()
+            if len(eventos):
+                with st.expander(f"📜 Registro de alarmas ({len(eventos)} eventos)"):
+                    st.dataframe(eventos[['tiempo', 'severidad', 'evento', 'regla', 'valor', 'mensaje']], hide_index=True)
+        
+        grafico_telemetria()
+        self.renderizar_sensor_virtual_en_vivo(lector, ventanas[ventana])
+    
+    def renderizar_sensor_virtual_en_vivo(self, lector, segundos):
+        """Estimar X, S y μ con el EKF a partir de la OUR derivada del oxígeno disuelto medido.
+
+        El filtro vive en la sesión y avanza un paso por cada cubeta cerrada de la telemetría;
+        al crearlo (o al cambiar kLa o la estimación inicial) arranca desde el inicio de la ventana.
+        """
+        resolucion = min(telemetria.NIVELES_AGREGADOS)
+        with st.expander("🛰️ Sensor Virtual en Línea (EKF)"):
+            st.markdown(f"La OUR sale del balance de oxígeno disuelto sobre las medias de {resolucion} s de la "
+                        "telemetría y alimenta el filtro de Kalman extendido (Monod + Pirt), que avanza con cada dato nuevo.")
+            col1, col2, col3, col4 = st.columns(4)
+            kla = col1.number_input("kLa (h⁻¹)", 1.0, 1000.0, 100.0, key="kla_sensor_vivo")
+            biomasa_inicial = col2.number_input("Biomasa Inicial (g/L)", 0.01, 100.0, 0.5, key="biomasa_sensor_vivo")
+            sustrato_inicial = col3.number_input("Sustrato Inicial (g/L)", 0.0, 500.0, 20.0, key="sustrato_sensor_vivo")
+            mu_max = col4.number_input("μmax Inicial (h⁻¹)", 0.01, 2.0, 0.3, key="mu_max_sensor_vivo")
+            
+            clave = (kla, biomasa_inicial, sustrato_inicial, mu_max)
+            guardado = st.session_state.get('sensor_virtual_vivo')
+            if guardado is None or guardado[0] != clave or guardado[1] is not lector:
+                sensor = calculos_bio.SensorVirtualOxigeno(kla, biomasa_inicial, sustrato_inicial, mu_max,
+                                                           capacidad=telemetria.MAX_PUNTOS_GRAFICO)
+                guardado = (clave, lector, sensor)
+                st.session_state.sensor_virtual_vivo = guardado
+            sensor = guardado[2]
+            
+            @fragmento(run_every=st.session_state.get('refresco_telemetria', 2))
+            def sensor_virtual_en_vivo():
+                lector.consultar()
+                ultima = lector.buferes.instantanea().get('oxigeno_disuelto')
+                if ultima is not None:
+                    # Solo las cubetas posteriores al último paso (la última sigue abierta y se espera)
+                    pendiente = segundos if not np.isfinite(sensor.ultimo_tiempo) else ultima[0] - sensor.ultimo_tiempo * 3600 + resolucion
+                    tiempos, oxigeno, _ = lector.buferes.serie_agregada('oxigeno_disuelto', min(pendiente, segundos),
+                                                                        resolucion=resolucion)
+                    sensor.actualizar(tiempos[:-1] / 3600, oxigeno[:-1])
+                historial = {nombre: np.array(valores) for nombre, valores in sensor.historial.items()}
+                if len(historial['tiempo']) == 0:
+                    st.caption("Esperando lecturas de oxígeno disuelto para estimar la OUR")
+                    return
+                
+                indice = pd.to_datetime(historial['tiempo'] * 3600, unit='s')
+                st.line_chart(pd.DataFrame({'X estimada (g/L)': historial['X'], 'S estimada (g/L)': historial['S']},
+                                           index=indice))
+                st.line_chart(pd.Series(historial['our'], index=indice, name='OUR (mmol O₂/L/h)'))
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Biomasa Estimada", f"{historial['X'][-1]:.2f} ± {historial['desv_X'][-1]:.2f} g/L")
+                col2.metric("μ Estimada", f"{historial['mu'][-1]:.3f} h⁻¹")
+                col3.metric("OUR Actual", f"{historial['our'][-1]:.1f} mmol O₂/L/h")
+                st.caption(f"{sensor.pasos} pasos del filtro sobre medias de {resolucion} s · "
+                           "solo OUR (CER y base no se miden)")
+            
+            sensor_virtual_en_vivo()
+    
+    @fragmento
+    def renderizar_pestana_flota(self):
+        """Renderizar el tablero de la flota de biorreactores en paralelo."""
+        st.header("🏭 Flota de Biorreactores")
+        st.write(f"Supervisión de {flota.N_REACTORES} reactores de banco: lecturas, desvíos de consigna, "
+                 "μ estimada en línea y alarmas de cada recipiente.")
+        
+        simular = st.toggle("Simular flota", value=st.session_state.lector_flota is not None, key="simular_flota",
+                            help="Datos simulados (1 s real = 1 min de proceso); la adquisición real escribe con flota.Flota.agregar")
+        if not simular:
+            self.detener_flota()
+            st.info("Activa la simulación para ver el tablero de la flota")
+            return
         
-        for evaluacion in evaluaciones:
-            st.write(evaluacion)
+        lector = st.session_state.lector_flota
+        if lector is None:
+            datos_flota = flota.Flota()
+            lector = flota.LectorFlota(datos_flota, flota.SimuladorFlota(datos_flota))
+            st.session_state.lector_flota = lector
+        lector.iniciar()
+        datos_flota = lector.flota
+        
+        with st.expander("🎛️ Consignas por Reactor"):
+            consignas = st.data_editor(datos_flota.tabla_consignas(), key="consignas_flota", use_container_width=True)
+            if st.button("💾 Aplicar Consignas", key="aplicar_consignas_flota"):
+                datos_flota.actualizar_consignas(consignas.to_numpy())
+                st.success("Consignas aplicadas a la flota!")
+        
+        intervalo = st.select_slider("Refresco (s)", [1, 2, 5, 10], value=2, key="refresco_flota")
+        
+        @fragmento(run_every=intervalo)
+        def tablero_flota():
+            lector.consultar()
+            if lector.error:
+                st.warning(f"⚠️ {lector.fuente.descripcion()}: {lector.error}")
+            # Todo el resumen sale de una pasada vectorizada; un solo widget para los 24 reactores
+            resumen = datos_flota.resumen()
+            if resumen.empty:
+                st.caption(f"Esperando datos de {lector.fuente.descripcion()}...")
+                return
+            
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Reactores con Alarmas", f"{int((resumen['Alarmas'] > 0).sum())}/{len(resumen)}")
+            col2.metric("μ Media", f"{np.nanmean(resumen['μ (h⁻¹)']):.3f} h⁻¹" if resumen['μ (h⁻¹)'].notna().any() else "—")
+            col3.metric("Biomasa Máxima", f"{resumen['Biomasa (g/L)'].max():.2f} g/L")
+            col4.metric("Instantes Registrados", f"{len(datos_flota):,}")
+            
+            formato = {columna: st.column_config.NumberColumn(format="%+.2f") for columna in resumen if columna.startswith("Δ")}
+            formato.update({
+                'pH': st.column_config.NumberColumn(format="%.2f"),
+                'Temperatura (°C)': st.column_config.NumberColumn(format="%.1f"),
+                'Agitación (RPM)': st.column_config.NumberColumn(format="%.0f"),
+                'Oxígeno Disuelto (%)': st.column_config.NumberColumn(format="%.1f"),
+                'Biomasa (g/L)': st.column_config.NumberColumn(format="%.2f"),
+                'μ (h⁻¹)': st.column_config.NumberColumn(format="%.3f"),
+                'R² ln X': st.column_config.NumberColumn(format="%.2f"),
+                'td (h)': st.column_config.NumberColumn(format="%.1f"),
+            })
+            st.dataframe(resumen, column_config=formato, use_container_width=True)
+            
+            tiempos, valores = datos_flota.serie_grafico('biomasa')
+            biomasa = pd.DataFrame(valores, columns=datos_flota.nombres,
+                                   index=pd.Index((tiempos - tiempos[0]) / 3600, name="Tiempo de proceso (h)"))
+            st.line_chart(biomasa)
+            st.caption(f"{lector.fuente.descripcion()} · memoria de la flota {datos_flota.memoria_bytes() / 1024 ** 2:.1f} MB")
+        
+        tablero_flota()
+    
+    def detener_flota(self):
+        """Detener la simulación de la flota (el historial se descarta)."""
+        lector = st.session_state.get('lector_flota')
+        if lector is not None:
+            lector.detener()
+            st.session_state.lector_flota = None
     
+    @fragmento
     def renderizar_pestana_ml(self):
         """Renderizar la pestaña de predicción ML."""
         st.header("🤖 Aprendizaje Automático y Análisis Estadístico")
@@ -2166,6 +2583,7 @@ class BioLabAppEspanol:
         else:
             st.info("Se necesitan datos experimentales para predicciones. Ejecuta análisis cinético primero.")
     
+    @fragmento
     def renderizar_pestana_optimizacion(self):
         """Renderizar la pestaña de optimización."""
         st.header("⚡ Optimización de Procesos y Ajuste de Parámetros")
@@ -2173,7 +2591,14 @@ class BioLabAppEspanol:
         # Interfaz de optimización de parámetros
         st.subheader("🎯 Optimización de Parámetros de Bioproceso")
         
-        if len(st.session_state.experimentos) > 1:
+        modo = st.radio("Modo de optimización", ["📚 Datos Históricos", "🧪 Simulador Cinético", "⚖️ Frente de Pareto"],
+                        horizontal=True, key="modo_optimizacion")
+        
+        if modo == "🧪 Simulador Cinético":
+            self.renderizar_optimizacion_modelo()
+        elif modo == "⚖️ Frente de Pareto":
+            self.renderizar_frente_pareto()
+        elif len(st.session_state.experimentos) > 1:
             # Selección de objetivo
             obj_col1, obj_col2 = st.columns(2)
             
@@ -2214,10 +2639,21 @@ class BioLabAppEspanol:
             
             if st.button("🚀 Ejecutar Análisis de Optimización", type="primary"):
                 try:
-                    # Optimización simple basada en datos históricos
-                    mejores_resultados = self.optimizar_parametros(objetivo_optimizacion)
+                    # Proceso gaussiano sobre los experimentos guardados; el modelo de cada objetivo se
+                    # conserva en la sesión para extenderlo al agregar experimentos
+                    sustitutos = st.session_state.setdefault('sustitutos_optimizacion', {})
+                    mejores_resultados = calculos_bio.optimizar_parametros(
+                        st.session_state.experimentos, objetivo_optimizacion,
+                        limites={'agitacion': (rpm_min, rpm_max), 'aireacion': (vvm_min, vvm_max),
+                                 'temperatura': (temp_min, temp_max)},
+                        sustituto=sustitutos.setdefault(objetivo_optimizacion, calculos_bio.SustitutoGP())
+                    )
                     
-                    if mejores_resultados:
+                    if mejores_resultados is None:
+                        st.warning(f"Se necesitan al menos {calculos_bio.MIN_EXPERIMENTOS} experimentos con resultados y "
+                                   "condiciones de agitación, aireación y temperatura. Los análisis integrales se guardan "
+                                   "con los parámetros del biorreactor; ajústalos en \"💾 Guardar Experimento con Parámetros\".")
+                    else:
                         st.success("¡Optimización completada!")
                         
                         opt_col1, opt_col2 = st.columns(2)
@@ -2228,18 +2664,29 @@ class BioLabAppEspanol:
                                 'Parámetro': ['RPM', 'VVM', 'Temperatura'],
                                 'Actual': [rpm_actual, vvm_actual, temp_actual],
                                 'Recomendado': [
-                                    mejores_resultados.get('rpm_recomendado', rpm_actual),
-                                    mejores_resultados.get('vvm_recomendado', vvm_actual),
-                                    mejores_resultados.get('temp_recomendada', temp_actual)
+                                    round(mejores_resultados['rpm_recomendado']),
+                                    round(mejores_resultados['vvm_recomendado'], 2),
+                                    round(mejores_resultados['temp_recomendada'], 1)
                                 ]
                             }
                             st.dataframe(pd.DataFrame(datos_comparacion))
                         
                         with opt_col2:
                             st.subheader("🎯 Mejoras Esperadas")
-                            st.metric("Mejora Predicha", f"+{mejores_resultados.get('mejora', 0):.1f}%")
-                            st.metric("Nivel de Confianza", f"{mejores_resultados.get('confianza', 0):.1f}%")
-                            st.write(f"**Objetivo:** {objetivo_optimizacion}")
+                            st.metric("Mejora Predicha", f"{mejores_resultados['mejora']:+.1f}% ± {mejores_resultados['incertidumbre']:.1f}%",
+                                      help="Media del modelo frente al mejor experimento, con una desviación estándar")
+                            st.metric("Probabilidad de Mejora", f"{mejores_resultados['confianza']:.1f}%")
+                            st.write(f"**Objetivo:** {objetivo_optimizacion} · predicho {mejores_resultados['prediccion']:.3f} "
+                                     f"(mejor observado {mejores_resultados['mejor_observado']:.3f}, "
+                                     f"{mejores_resultados['n_experimentos']} experimentos)")
+                        
+                        st.subheader("🧪 Próximos Experimentos Sugeridos")
+                        lote = pd.DataFrame(mejores_resultados['lote'])
+                        st.dataframe(lote.rename(columns={
+                            'agitacion': 'RPM', 'aireacion': 'VVM', 'temperatura': 'Temperatura (°C)',
+                            'media': 'Predicción', 'desv': 'Desviación', 'ei': 'Mejora Esperada', 'pi': 'Prob. Mejora'
+                        })[['RPM', 'VVM', 'Temperatura (°C)', 'Predicción', 'Desviación', 'Mejora Esperada', 'Prob. Mejora']].round(3),
+                                     hide_index=True)
                             
                         # Recomendaciones de optimización
                         st.subheader("💡 Recomendaciones")
@@ -2252,6 +2699,8 @@ class BioLabAppEspanol:
         else:
             st.info("Se necesitan datos experimentales para optimización. Ejecuta análisis cinéticos primero para habilitar funciones de optimización.")
         
+        self.renderizar_mpc_alimentacion()
+        
         # Calculadora de diseño de proceso
         st.subheader("🧮 Calculadora de Diseño de Proceso")
         
@@ -2277,60 +2726,221 @@ class BioLabAppEspanol:
                 st.metric("DO Crítico", f"{do_critico:.2f} mg/L")
                 st.metric("DO Recomendado", f"{do_critico * 2:.2f} mg/L")
     
-    def optimizar_parametros(self, objetivo):
-        """Optimización simple basada en datos históricos."""
-        try:
-            # Analizar experimentos históricos para encontrar condiciones óptimas
-            mejor_experimento = None
-            mejor_valor = float('-inf') if 'Maximizar' in objetivo else float('inf')
-            
-            for exp in st.session_state.experimentos:
-                if 'resultados' not in exp:
-                    continue
-                    
-                resultados = exp['resultados']
-                
-                if objetivo == "Maximizar Rendimiento Biomasa":
-                    valor = resultados.get('rendimiento_biomasa', 0)
-                elif objetivo == "Maximizar Rendimiento Producto":
-                    valor = resultados.get('rendimiento_producto', 0)
-                elif objetivo == "Maximizar Productividad":
-                    valor = resultados.get('productividad_biomasa', 0)
-                elif objetivo == "Minimizar Tiempo Cultivo":
-                    valor = -resultados.get('tiempo_cultivo', float('inf'))
-                else:
-                    valor = resultados.get('rendimiento_biomasa', 0)
-                
-                if ('Maximizar' in objetivo and valor > mejor_valor) or ('Minimizar' in objetivo and valor < -mejor_valor):
-                    mejor_valor = valor
-                    mejor_experimento = exp
-            
-            if mejor_experimento:
-                # Generar recomendaciones basadas en el mejor experimento
-                mejora_promedio = 15.0 + np.random.random() * 10  # Mejora simulada
-                confianza = 75.0 + np.random.random() * 20
-                
-                recomendaciones = [
-                    "Considera ejecutar experimentos con los parámetros recomendados",
-                    "Monitorea los niveles de oxígeno disuelto de cerca",
-                    "Optimiza la estrategia de alimentación para mejores rendimientos",
-                    "Considera control de pH para mejor estabilidad"
-                ]
-                
-                return {
-                    'rpm_recomendado': 400 + np.random.randint(-50, 100),
-                    'vvm_recomendado': 2.0 + np.random.random() * 1.5,
-                    'temp_recomendada': 30 + np.random.randint(-3, 8),
-                    'mejora': mejora_promedio,
-                    'confianza': confianza,
-                    'recomendaciones': recomendaciones[:3]
-                }
-            
-        except Exception as e:
-            st.error(f"El análisis de optimización falló: {str(e)}")
-            
-        return None
+    def renderizar_optimizacion_modelo(self):
+        """Optimizar condiciones de operación directamente contra el simulador (evolución diferencial)."""
+        st.markdown("Busca caudal de alimentación, sustrato inicial, temperatura, pH y tiempo de cosecha simulando cada "
+                    "candidato; temperatura y pH modifican μmax con modelos cardinales (CTMI/CPM).")
+        
+        objetivo = st.selectbox("Objetivo de Optimización", list(calculos_bio.OBJETIVOS), key="objetivo_modelo")
+        
+        limites = {}
+        columnas = st.columns(len(calculos_bio.CONDICIONES))
+        for columna, condicion in zip(columnas, calculos_bio.CONDICIONES):
+            bajo, alto = calculos_bio.LIMITES_CONDICIONES[condicion]
+            with columna:
+                limites[condicion] = st.slider(calculos_bio.NOMBRES_CONDICIONES[condicion], float(bajo), float(alto),
+                                               (float(bajo), float(alto)), key=f"limites_{condicion}")
+        
+        mod_col1, mod_col2 = st.columns(2)
+        with mod_col1:
+            poblacion = st.slider("Población (× número de condiciones)", 5, 30, 15, key="poblacion_modelo")
+        with mod_col2:
+            generaciones = st.slider("Generaciones", 10, 200, 60, key="generaciones_modelo")
+        
+        if not st.button("🚀 Optimizar con el Simulador", type="primary", key="optimizar_modelo"):
+            return
+        
+        # Las evaluaciones se conservan en la sesión y sirven para cualquier objetivo
+        cache = st.session_state.setdefault('cache_evaluaciones_modelo', calculos_bio.CacheEvaluaciones())
+        with st.spinner("Evolución diferencial sobre el simulador..."):
+            resultado = calculos_bio.optimizar_condiciones(objetivo, limites, poblacion=poblacion,
+                                                           generaciones=generaciones, cache=cache)
+        
+        st.success("¡Optimización completada!")
+        clave, _ = calculos_bio.OBJETIVOS[objetivo]
+        res_col1, res_col2 = st.columns(2)
+        with res_col1:
+            st.subheader("📊 Condiciones Óptimas")
+            st.dataframe(pd.DataFrame({
+                'Condición': [calculos_bio.NOMBRES_CONDICIONES[c] for c in calculos_bio.CONDICIONES] + ['μmax efectiva (h⁻¹)'],
+                'Valor': [round(resultado['condiciones'][c], 4) for c in calculos_bio.CONDICIONES] + [round(resultado['mu_max'], 3)]
+            }), hide_index=True)
+        with res_col2:
+            st.subheader("🎯 Desempeño Simulado")
+            metricas = resultado['metricas']
+            st.metric(objetivo.replace("Maximizar ", "").replace("Minimizar ", ""), f"{metricas[clave]:.3f}")
+            st.metric("Biomasa a la Cosecha", f"{metricas['biomasa_final']:.2f} g/L")
+            st.metric("Conversión de Sustrato", f"{metricas['conversion'] * 100:.1f}%")
+        
+        graf_col1, graf_col2 = st.columns(2)
+        with graf_col1:
+            st.write("**Cultivo simulado en las condiciones óptimas**")
+            trayectoria = resultado['trayectoria']
+            st.line_chart(pd.DataFrame({'Biomasa (g/L)': trayectoria['X'], 'Sustrato (g/L)': trayectoria['S'],
+                                        'Producto (g/L)': trayectoria['P']},
+                                       index=pd.Index(trayectoria['tiempo'], name='Tiempo (h)')))
+        with graf_col2:
+            st.write("**Convergencia (mejor puntuación por generación)**")
+            st.line_chart(pd.Series(resultado['convergencia'], name='Puntuación',
+                                    index=pd.Index(np.arange(1, len(resultado['convergencia']) + 1), name='Generación')))
+        st.caption(f"{resultado['generaciones']} generaciones · {resultado['evaluaciones']:,} evaluaciones "
+                   f"({resultado['simuladas']:,} simuladas en lote, {resultado['aciertos_cache']:,} desde la caché) · "
+                   f"{resultado['segundos']:.2f} s · caché con {len(cache):,} condiciones")
+    
+    @fragmento
+    def renderizar_frente_pareto(self):
+        """Compromisos entre objetivos en conflicto: frente de Pareto de corridas simuladas o históricas."""
+        st.markdown("Una corrida está en el frente si ninguna otra la iguala o supera en todos los objetivos a la vez; "
+                    "elige en la tabla el compromiso que prefieras.")
+        
+        par_col1, par_col2 = st.columns([2, 1])
+        with par_col1:
+            objetivos = st.multiselect("Objetivos en conflicto", list(calculos_bio.OBJETIVOS),
+                                       default=["Maximizar Rendimiento Biomasa", "Maximizar Productividad",
+                                                "Minimizar Tiempo Cultivo"], key="objetivos_pareto")
+        with par_col2:
+            fuente = st.radio("Corridas", ["🧪 Simuladas", "📚 Históricas"], horizontal=True, key="fuente_pareto")
+        
+        if len(objetivos) < 2:
+            st.info("Elige al menos dos objetivos para construir el frente.")
+            return
+        
+        nombres = {calculos_bio.OBJETIVOS[o][0]: o.replace("Maximizar ", "").replace("Minimizar ", "") for o in objetivos}
+        if fuente == "📚 Históricas":
+            experimentos = st.session_state.experimentos
+            puntuaciones = calculos_bio.matriz_objetivos(experimentos, objetivos)
+            validos = np.flatnonzero(np.isfinite(puntuaciones).all(axis=1))
+            if len(validos) < 2:
+                st.info("Se necesitan al menos dos experimentos guardados con resultados cinéticos.")
+                return
+            resultados = [experimentos[i].get('resultados', experimentos[i]) for i in validos]
+            tabla = pd.DataFrame({
+                'Experimento': [f"Experimento {i + 1}" for i in validos],
+                'Frente': calculos_bio.ordenamiento_no_dominado(puntuaciones[validos]) + 1,
+                **{nombre: [r[clave] for r in resultados] for clave, nombre in nombres.items()},
+            }).sort_values(['Frente', nombres[calculos_bio.OBJETIVOS[objetivos[0]][0]]],
+                           ascending=[True, calculos_bio.OBJETIVOS[objetivos[0]][1] < 0])
+            st.caption(f"{len(validos)} experimentos · {(tabla['Frente'] == 1).sum()} en el frente de Pareto (frente 1)")
+        else:
+            frentes = st.session_state.setdefault('frentes_pareto', {})
+            frente = frentes.setdefault(tuple(objetivos), calculos_bio.FrentePareto(objetivos))
+            lote_col1, lote_col2, lote_col3 = st.columns([2, 1, 1])
+            with lote_col1:
+                n_lote = st.select_slider("Condiciones por lote", [256, 512, 1024, 2048, 4096], value=1024, key="lote_pareto")
+            with lote_col2:
+                agregar = st.button("➕ Simular Lote", type="primary", key="agregar_pareto")
+            with lote_col3:
+                if st.button("🗑️ Reiniciar Frente", key="reiniciar_pareto"):
+                    frente = frentes[tuple(objetivos)] = calculos_bio.FrentePareto(objetivos)
+            
+            if agregar or not len(frente):
+                inicio = time.perf_counter()
+                cache = st.session_state.setdefault('cache_evaluaciones_modelo', calculos_bio.CacheEvaluaciones())
+                entraron = calculos_bio.explorar_frente(frente, n_lote, cache=cache)
+                st.caption(f"Lote de {n_lote:,} condiciones en {time.perf_counter() - inicio:.2f} s · "
+                           f"{entraron} entraron al frente")
+            
+            atributos = frente.tabla()
+            tabla = pd.DataFrame({
+                **{nombre: atributos[clave] for clave, nombre in nombres.items()},
+                **{calculos_bio.NOMBRES_CONDICIONES[c]: atributos[c] for c in calculos_bio.CONDICIONES},
+                'Conversión (%)': atributos['conversion'] * 100,
+                'Espaciado': atributos['hacinamiento'],
+            })
+            st.caption(f"{frente.evaluadas:,} condiciones simuladas · {len(frente)} no dominadas · "
+                       "Espaciado: distancia a los vecinos del frente (inf = extremo de algún objetivo)")
+        
+        ejes = list(nombres.values())
+        graf_col1, graf_col2 = st.columns([3, 2])
+        with graf_col1:
+            st.write("**Tabla de compromisos** (selecciona una fila)")
+            seleccion = st.dataframe(tabla.round(4), hide_index=True, on_select="rerun", selection_mode="single-row",
+                                     key=f"tabla_pareto_{fuente}")
+        with graf_col2:
+            st.write(f"**{ejes[1]} frente a {ejes[0]}**")
+            if fuente == "📚 Históricas":
+                st.scatter_chart(tabla.assign(Frente=tabla['Frente'].astype(str)), x=ejes[0], y=ejes[1], color='Frente')
+            else:
+                st.scatter_chart(tabla, x=ejes[0], y=ejes[1])
+        
+        filas = seleccion.selection.rows
+        if not filas:
+            return
+        elegida = tabla.iloc[filas[0]]
+        st.subheader("🔎 Compromiso Seleccionado")
+        columnas = st.columns(len(ejes))
+        for columna, eje in zip(columnas, ejes):
+            columna.metric(eje, f"{elegida[eje]:.3f}")
+        if fuente == "🧪 Simuladas":
+            condiciones = [elegida[calculos_bio.NOMBRES_CONDICIONES[c]] for c in calculos_bio.CONDICIONES]
+            _, tiempos, estados = calculos_bio.simular_conjunto(condiciones, trayectoria=True)
+            visibles = tiempos <= condiciones[-1]
+            st.line_chart(pd.DataFrame({'Biomasa (g/L)': estados[visibles, 0, 0], 'Sustrato (g/L)': estados[visibles, 0, 1],
+                                        'Producto (g/L)': estados[visibles, 0, 2]},
+                                       index=pd.Index(tiempos[visibles], name='Tiempo (h)')))
+    
+    @fragmento
+    def renderizar_mpc_alimentacion(self):
+        """Renderizar el banco de pruebas de control predictivo de la alimentación en lazo cerrado."""
+        st.subheader("🎛️ Control Predictivo de Alimentación (MPC)")
+        st.markdown("En cada intervalo se optimiza el caudal de alimentación de las próximas horas contra el modelo "
+                    "Monod + Pirt + Luedeking-Piret (maximizar producto con OD sobre el crítico) y se aplica el primer "
+                    "movimiento a la planta simulada.")
+        
+        mpc_col1, mpc_col2, mpc_col3 = st.columns(3)
+        with mpc_col1:
+            duracion = st.slider("Duración del cultivo (h)", 12, 72, 36, key="mpc_duracion")
+            intervalo = st.select_slider("Intervalo de control (h)", [0.25, 0.5, 1.0], value=0.5, key="mpc_intervalo")
+            horizonte = st.slider("Horizonte (intervalos)", 4, 24, 16, key="mpc_horizonte")
+        with mpc_col2:
+            caudal_max = st.number_input("Caudal máximo (L/h)", value=0.05, min_value=0.005, step=0.005, format="%.3f", key="mpc_caudal")
+            sf = st.number_input("Sustrato en la alimentación (g/L)", value=300.0, min_value=10.0, key="mpc_sf")
+            od_critico = st.slider("OD crítico (%)", 5, 50, 20, key="mpc_od")
+        with mpc_col3:
+            kla = st.number_input("kLa (h⁻¹)", value=200.0, min_value=10.0, key="mpc_kla")
+            desajuste = st.slider("Desajuste μmax de la planta (%)", -20, 20, 0, key="mpc_desajuste",
+                                  help="La planta crece más rápido o más lento que el modelo del controlador")
+            presupuesto = st.number_input("Presupuesto de cómputo por intervalo (s)", value=float(intervalo * 3600),
+                                          min_value=0.01, key="mpc_presupuesto",
+                                          help="Tiempo real disponible para cada resolución (por defecto, el intervalo)")
+        
+        if not st.button("▶️ Ejecutar Lazo Cerrado", key="mpc_ejecutar"):
+            return
+        
+        parametros = {**calculos_bio.PARAMETROS_FED_BATCH, 'sf': sf, 'kla': kla, 'od_critico': float(od_critico)}
+        planta = {**parametros, 'mu_max': parametros['mu_max'] * (1 + desajuste / 100)}
+        controlador = calculos_bio.ControladorMPC(parametros, horizonte=horizonte, intervalo=intervalo, caudal_max=caudal_max)
+        with st.spinner("Resolviendo el MPC en cada intervalo..."):
+            historial = calculos_bio.lazo_cerrado(controlador, [0.5, 10.0, 0.0, 1.0], duracion, planta,
+                                                  semilla=0, presupuesto_s=presupuesto)
+        
+        indice = pd.Index(historial['tiempo'], name='Tiempo (h)')
+        res_col1, res_col2, res_col3, res_col4 = st.columns(4)
+        res_col1.metric("Producto Formado", f"{historial['P'][-1] * historial['V'][-1]:.1f} g")
+        res_col2.metric("OD Mínimo", f"{historial['od'].min():.1f} %", delta=f"{historial['od'].min() - od_critico:.1f} vs crítico")
+        res_col3.metric("Resolución Máxima", f"{historial['segundos'].max() * 1000:.0f} ms")
+        res_col4.metric("Dentro del Presupuesto", f"{historial['en_presupuesto'].mean() * 100:.0f}%")
+        
+        graf_col1, graf_col2 = st.columns(2)
+        with graf_col1:
+            st.write("**Estados de la planta**")
+            st.line_chart(pd.DataFrame({'Biomasa (g/L)': historial['X'], 'Sustrato (g/L)': historial['S'],
+                                        'Producto (g/L)': historial['P']}, index=indice))
+        with graf_col2:
+            st.write("**Oxígeno disuelto (%) y caudal (mL/h)**")
+            st.line_chart(pd.DataFrame({'OD (%)': historial['od'], 'Caudal (mL/h)': historial['caudal'] * 1000,
+                                        'OD crítico (%)': np.full(len(indice), float(od_critico))}, index=indice))
+        
+        st.write("**Tiempo de cada resolución frente al presupuesto**")
+        st.bar_chart(pd.DataFrame({'Resolución (ms)': historial['segundos'] * 1000}, index=indice))
+        st.caption(f"{len(indice)} resoluciones · mediana {np.median(historial['segundos']) * 1000:.0f} ms · "
+                   f"máximo {historial['segundos'].max() * 1000:.0f} ms · {np.median(historial['iteraciones']):.0f} iteraciones "
+                   f"(mediana) con arranque en caliente · presupuesto {presupuesto:g} s por intervalo")
+        if not historial['en_presupuesto'].all():
+            st.warning(f"⚠️ {int((~historial['en_presupuesto']).sum())} resoluciones superaron el presupuesto: "
+                       "reduce el horizonte o alarga el intervalo de control")
     
+    @fragmento
     def renderizar_pestana_simulacion(self):
         """Renderizar la pestaña de simulación: Visual + Multi-Producto + Scipy."""
         st.header("🧪 Simulación Cinética Avanzada")
@@ -2405,62 +3015,15 @@ class BioLabAppEspanol:
                 # 1. Definir el TIEMPO
                 t = np.linspace(0, tiempo_simulacion, int(pasos_tiempo))
 
-                # 2. Definir el SISTEMA DE ECUACIONES
-                def modelo_cinetico(y, t):
-                    X = y[0]
-                    S = y[1]
-                    
-                    # --- Monod ---
-                    if S > 0.001:
-                        mu = (velocidad_crecimiento_max * S) / (valor_ks + S)
-                    else:
-                        mu = 0
-                    
-                    # --- Derivadas Base ---
-                    dX_dt = mu * X
-                    
-                    # --- Pirt ---
-                    tasa_consumo = (dX_dt / yx_s) + (ms * X)
-                    dS_dt = -tasa_consumo if S > 0 else 0
-                    
-                    derivadas = [dX_dt, dS_dt]
-                    
-                    # --- Luedeking-Piret (Bucle para N productos) ---
-                    for prod in productos_seleccionados:
-                        alpha = params_productos[prod]['alpha']
-                        beta = params_productos[prod]['beta']
-                        
-                        if S > 0:
-                            dP_dt = (alpha * dX_dt) + (beta * X)
-                        else:
-                            dP_dt = 0
-                        derivadas.append(dP_dt)
-                    
-                    return derivadas
-
-                # 3. Condiciones Iniciales
-                y0 = [biomasa_inicial, sustrato_inicial]
-                for prod in productos_seleccionados:
-                    y0.append(params_productos[prod]['P0'])
-
-                # 4. Resolver Ecuaciones
-                solucion = odeint(modelo_cinetico, y0, t)
-
-                # 5. Organizar Resultados
-                X = solucion[:, 0]
-                S = solucion[:, 1]
-                
-                P_history = {}
-                for i, prod in enumerate(productos_seleccionados):
-                    P_history[prod] = solucion[:, 2 + i]
-
-                # Calcular Mu para graficar
-                Mu_track = np.zeros(len(t))
-                for i in range(len(t)):
-                    if S[i] > 0.001:
-                        Mu_track[i] = (velocidad_crecimiento_max * S[i]) / (valor_ks + S[i])
-                    else:
-                        Mu_track[i] = 0
+                # 2. Resolver Monod + Pirt + Luedeking-Piret en el núcleo de cálculo
+                series = calculos_bio.simular_cultivo(
+                    t, biomasa_inicial, sustrato_inicial, velocidad_crecimiento_max, valor_ks, yx_s, ms,
+                    {prod: params_productos[prod] for prod in productos_seleccionados}
+                )
+                X = series['X']
+                S = series['S']
+                Mu_track = series['mu']
+                P_history = {prod: series[prod] for prod in productos_seleccionados}
 
                 # --- VISUALIZACIÓN ---
                 st.success(f"✅ Simulación completada exitosamente.")
@@ -2473,7 +3036,7 @@ class BioLabAppEspanol:
                 df_sim = pd.DataFrame(data)
                 
                 # Pestañas de Resultados
-                tab1, tab2, tab3 = st.tabs(["📊 Panorama Global", "⚗️ Análisis de Metabolitos", "⚡ Crecimiento y Consumo"])
+                tab1, tab2, tab3, tab4 = st.tabs(["📊 Panorama Global", "⚗️ Análisis de Metabolitos", "⚡ Crecimiento y Consumo", "🛰️ Sensor Virtual (EKF)"])
                 
                 with tab1:
                     st.markdown("**Visión conjunta del bioproceso:**")
@@ -2506,14 +3069,48 @@ class BioLabAppEspanol:
                             p_prin = productos_seleccionados[0]
                             st.metric(f"{p_prin} Final", f"{P_history[p_prin][-1]:.2f} g/L")
 
+                with tab4:
+                    self.renderizar_sensor_virtual(t, series, biomasa_inicial, sustrato_inicial,
+                                                   velocidad_crecimiento_max, valor_ks, yx_s, ms)
+
             except Exception as e:
                 st.error(f"Error en el cálculo: {e}")
-def exportar_datos(self):
+    
+    def renderizar_sensor_virtual(self, t, series, biomasa_inicial, sustrato_inicial, mu_max, ks, yxs, ms):
+        """Estimar X, S y μ con el EKF a partir de OUR, CER y base sintéticos de la simulación."""
+        st.markdown("**Estimación en línea de biomasa y sustrato** a partir de OUR, CER y adición de base "
+                    "(filtro de Kalman extendido sobre Monod + Pirt). El filtro parte de una estimación inicial errónea.")
+        parametros = {**calculos_bio.PARAMETROS_SENSOR, 'ks': ks, 'yxs': yxs, 'ms': ms}
+        senales = calculos_bio.senales_sinteticas(series, parametros, ruido=0.03, semilla=0)
+        filtro = calculos_bio.FiltroKalmanBiomasa(1, biomasa_inicial * 2, sustrato_inicial * 0.8, mu_max * 0.7, parametros)
+        inicio = time.perf_counter()
+        estimado = calculos_bio.estimar_series(t, senales[:, None, :], filtro)
+        segundos = time.perf_counter() - inicio
+        
+        st.line_chart(pd.DataFrame({'X simulada': series['X'], 'X estimada (EKF)': estimado['X'][:, 0],
+                                    'S simulada': series['S'], 'S estimada (EKF)': estimado['S'][:, 0]},
+                                   index=pd.Index(t, name='Tiempo (h)')))
+        st.line_chart(pd.DataFrame({'μ simulada': series['mu'], 'μ estimada (EKF)': estimado['mu'][:, 0]},
+                                   index=pd.Index(t, name='Tiempo (h)')))
+        col1, col2, col3 = st.columns(3)
+        col1.metric("RMSE Biomasa", f"{np.sqrt(np.mean((estimado['X'][:, 0] - series['X']) ** 2)):.3f} g/L")
+        col2.metric("RMSE Sustrato", f"{np.sqrt(np.mean((estimado['S'][:, 0] - series['S']) ** 2)):.3f} g/L")
+        col3.metric("μmax Estimada", f"{estimado['mu_max'][-1, 0]:.3f} h⁻¹")
+        st.caption(f"{len(t)} pasos del filtro en {segundos * 1000:.0f} ms · ruido relativo de las señales 3%")
+    
+    def exportar_datos(self):
         """Exportar todos los datos experimentales."""
         if st.session_state.experimentos:
-            # ... (resto del código)
+            # Los experimentos solo guardan la referencia de sus series: se resuelven antes de serializar
+            almacen = st.session_state.almacen_series
+            experimentos = [
+                {**exp, 'series': {nombre: serie.tolist() for nombre, serie in almacen.cargar(exp['ref_series']).items()}}
+                if 'ref_series' in exp else exp
+                for exp in st.session_state.experimentos
+            ]
             # Convertir a JSON para descarga
-            datos_json = json.dumps(st.session_state.experimentos, indent=2)
+            datos_json = json.dumps(experimentos, indent=2,
+                                    default=lambda o: o.tolist() if hasattr(o, 'tolist') else str(o))
             
             st.download_button(
                 label="📄 Descargar Experimentos (JSON)",
@@ -2528,7 +3125,7 @@ def exportar_datos(self):
                 for i, exp in enumerate(st.session_state.experimentos):
                     datos_exp = {
                         'id_experimento': i,
-                        'marca_tiempo': exp['marca_tiempo'],
+                        'marca_tiempo': exp.get('marca_tiempo', exp.get('fecha')),
                         **exp.get('resultados', {})
                     }
                     lista_df.append(datos_exp)
@@ -0,0 +1,245 @@
+"""
+Motor de alarmas de parámetros de proceso.
+Las reglas se declaran como datos (límites, tasa de cambio, banda muerta y retardo) y se
+compilan en arreglos: cada evaluación revisa todas las reglas de todos los reactores con
+operaciones vectorizadas y registra solo las transiciones en un historial de eventos.
+"""
+
+import threading
+from collections import deque
+from typing import List, TypedDict
+
+import numpy as np
+import pandas as pd
+
+AVISO, ALARMA, CRITICA = 1, 2, 3
+SEVERIDADES = {0: 'Normal', AVISO: 'Aviso', ALARMA: 'Alarma', CRITICA: 'Crítica'}
+TIPOS = {'limite': 0, 'tasa': 1}
+MAX_EVENTOS = 10_000
+VENTANA_TASA_S = 60.0   # La tasa de cambio es la pendiente de una regresión sobre esta ventana
+INTERVALOS_TASA = 3     # Con muestreo más espaciado, la ventana se alarga hasta cubrir estos intervalos
+MUESTRAS_TASA = 120     # Columnas del historial de la pendiente (una cada VENTANA_TASA_S / MUESTRAS_TASA s)
+
+
+class Regla(TypedDict, total=False):
+    nombre: str
+    etiqueta: str
+    tipo: str          # 'limite' (fuera de [bajo, alto]) o 'tasa' (|pendiente| por minuto > alto)
+    bajo: float
+    alto: float
+    banda: float       # Banda muerta: la alarma se despeja al volver `banda` dentro del rango
+    retardo_s: float   # La condición debe mantenerse este tiempo antes de activar
+    severidad: int
+    mensaje: str
+
+
+# Rangos de Pseudomonas reptilivora usados en toda la app (tolerancia de pH 4.0-9.4, óptimo 6.5-7.5)
+REGLAS_PROCESO: List[Regla] = [
+    {'nombre': 'ph_optimo', 'etiqueta': 'ph', 'tipo': 'limite', 'bajo': 6.5, 'alto': 7.5, 'banda': 0.05,
+     'retardo_s': 60, 'severidad': AVISO, 'mensaje': "pH fuera del óptimo para P. reptilivora (6.5-7.5)"},
+    {'nombre': 'ph_aceptable', 'etiqueta': 'ph', 'tipo': 'limite', 'bajo': 5.5, 'alto': 8.5, 'banda': 0.05,
+     'retardo_s': 30, 'severidad': ALARMA, 'mensaje': "pH fuera del rango aceptable (5.5-8.5)"},
+    {'nombre': 'ph_tolerancia', 'etiqueta': 'ph', 'tipo': 'limite', 'bajo': 4.0, 'alto': 9.4, 'banda': 0.05,
+     'retardo_s': 0, 'severidad': CRITICA, 'mensaje': "pH fuera del rango de tolerancia de P. reptilivora (4.0-9.4)"},
+    {'nombre': 'temperatura_optima', 'etiqueta': 'temperatura', 'tipo': 'limite', 'bajo': 25.0, 'alto': 30.0,
+     'banda': 0.2, 'retardo_s': 60, 'severidad': AVISO, 'mensaje': "Temperatura fuera del óptimo de crecimiento (25-30°C)"},
+    {'nombre': 'temperatura_rango', 'etiqueta': 'temperatura', 'tipo': 'limite', 'bajo': 25.0, 'alto': 35.0,
+     'banda': 0.2, 'retardo_s': 30, 'severidad': ALARMA, 'mensaje': "Temperatura fuera del rango recomendado (25-35°C)"},
+    {'nombre': 'agitacion_rango', 'etiqueta': 'agitacion', 'tipo': 'limite', 'bajo': 200.0, 'alto': 400.0,
+     'banda': 5.0, 'retardo_s': 30, 'severidad': AVISO, 'mensaje': "Agitación fuera de 200-400 rpm: ajustar para mejor transferencia de masa"},
+    {'nombre': 'oxigeno_bajo', 'etiqueta': 'oxigeno_disuelto', 'tipo': 'limite', 'bajo': 20.0, 'alto': np.inf,
+     'banda': 2.0, 'retardo_s': 30, 'severidad': ALARMA, 'mensaje': "Oxígeno disuelto bajo (<20%): posible limitación de oxígeno"},
+    {'nombre': 'ph_tasa', 'etiqueta': 'ph', 'tipo': 'tasa', 'alto': 0.5, 'banda': 0.1,
+     'retardo_s': 30, 'severidad': ALARMA, 'mensaje': "Cambio brusco de pH (>0.5 por minuto)"},
+    {'nombre': 'temperatura_tasa', 'etiqueta': 'temperatura', 'tipo': 'tasa', 'alto': 1.0, 'banda': 0.2,
+     'retardo_s': 30, 'severidad': ALARMA, 'mensaje': "Cambio brusco de temperatura (>1°C por minuto)"},
+]
+
+
+# --- 1. EVALUACIÓN PUNTUAL (CONSIGNAS Y DATOS GUARDADOS) ---
+def nivel_condicion(etiqueta, valores, reglas=REGLAS_PROCESO):
+    """Severidad máxima de las reglas de límite violadas por cada valor (0 = dentro de todo rango)."""
+    valores = np.asarray(valores, dtype=np.float64)
+    nivel = np.zeros(valores.shape, dtype=np.int64)
+    for regla in reglas:
+        if regla['etiqueta'] == etiqueta and regla.get('tipo', 'limite') == 'limite':
+            fuera = (valores < regla.get('bajo', -np.inf)) | (valores > regla.get('alto', np.inf))
+            nivel = np.where(fuera, np.maximum(nivel, regla['severidad']), nivel)
+    return nivel if nivel.ndim else int(nivel)
+
+
+def reglas_violadas(valores, reglas=REGLAS_PROCESO):
+    """Reglas de límite violadas por un conjunto {etiqueta: valor}, de mayor a menor severidad."""
+    violadas = [
+        regla for regla in reglas
+        if regla.get('tipo', 'limite') == 'limite' and regla['etiqueta'] in valores
+        and not regla.get('bajo', -np.inf) <= valores[regla['etiqueta']] <= regla.get('alto', np.inf)
+    ]
+    return sorted(violadas, key=lambda regla: -regla['severidad'])
+
+
+# --- 2. MOTOR VECTORIZADO ---
+class MotorAlarmas:
+    """Reglas × reactores compiladas en arreglos; `evaluar` procesa un instante de todos a la vez."""
+
+    def __init__(self, reglas=REGLAS_PROCESO, n_reactores=1, etiquetas=None, nombres_reactores=None):
+        self.reglas = list(reglas)
+        self.etiquetas = list(etiquetas) if etiquetas is not None else sorted({r['etiqueta'] for r in self.reglas})
+        self.nombres_reactores = list(nombres_reactores) if nombres_reactores is not None else [
+            f"R{i + 1}" for i in range(n_reactores)
+        ]
+        self.n_reactores = len(self.nombres_reactores)
+        self._compilar()
+        self._eventos = deque(maxlen=MAX_EVENTOS)
+        self._bloqueo = threading.Lock()
+        self.evaluaciones = 0
+
+    def _compilar(self):
+        """Una fila por (regla, reactor); las reglas con etiquetas desconocidas se ignoran."""
+        posicion = {e: i for i, e in enumerate(self.etiquetas)}
+        reglas = [r for r in self.reglas if r['etiqueta'] in posicion]
+        n_reglas, n = len(reglas), len(reglas) * self.n_reactores
+        columna = lambda clave, defecto: np.repeat(np.array([r.get(clave, defecto) for r in reglas], dtype=np.float64), self.n_reactores)
+
+        self._reglas = reglas
+        self.regla = np.repeat(np.arange(n_reglas), self.n_reactores)
+        self.reactor = np.tile(np.arange(self.n_reactores), n_reglas)
+        self.etiqueta = np.repeat(np.array([posicion[r['etiqueta']] for r in reglas], dtype=np.int64), self.n_reactores)
+        self.es_tasa = np.repeat(np.array([TIPOS[r.get('tipo', 'limite')] == TIPOS['tasa'] for r in reglas], dtype=bool), self.n_reactores)
+        self.bajo = columna('bajo', -np.inf)
+        self.alto = columna('alto', np.inf)
+        self.banda = columna('banda', 0.0)
+        self.retardo = columna('retardo_s', 0.0)
+        self.severidad = columna('severidad', AVISO).astype(np.int64)
+        self._celda = self.reactor * len(self.etiquetas) + self.etiqueta  # Posición en la matriz aplanada
+        self._filas_tasa = np.flatnonzero(self.es_tasa)
+
+        self.activa = np.zeros(n, dtype=bool)
+        self.desde = np.full(n, np.nan)        # Inicio de la condición en curso (retardo)
+        # Historial corto por (reactor, etiqueta) para la pendiente de las reglas de tasa
+        forma = (self.n_reactores, len(self.etiquetas), MUESTRAS_TASA)
+        self._hist_t = np.full(forma, np.nan)
+        self._hist_v = np.full(forma, np.nan)
+        self._t_ultimo = np.full(forma[:2], -np.inf)
+        self._intervalo = np.zeros(forma[:2])  # Último intervalo entre lecturas de cada (reactor, etiqueta)
+        self._columna = 0
+        self._t_columna = -np.inf
+
+    def _actualizar_historial(self, tiempos, valores):
+        """Guardar el instante en el historial circular; una columna nueva cada VENTANA/MUESTRAS s.
+
+        Con lecturas más frecuentes se sobrescribe la columna en curso, de modo que el historial
+        siempre cubre la ventana completa sin depender de la frecuencia de muestreo.
+        """
+        with np.errstate(invalid='ignore'):
+            nuevas = ~np.isnan(valores) & (tiempos > self._t_ultimo)  # Una lectura repetida no cuenta dos veces
+        if not nuevas.any():
+            return
+        self._intervalo = np.where(nuevas & np.isfinite(self._t_ultimo), tiempos - self._t_ultimo, self._intervalo)
+        self._t_ultimo = np.where(nuevas, tiempos, self._t_ultimo)
+        t_max = np.nanmax(np.where(nuevas, tiempos, np.nan))
+        if t_max - self._t_columna >= VENTANA_TASA_S / MUESTRAS_TASA:
+            self._columna = (self._columna + 1) % MUESTRAS_TASA
+            self._t_columna = t_max
+            self._hist_t[:, :, self._columna] = np.nan
+            self._hist_v[:, :, self._columna] = np.nan
+        self._hist_t[:, :, self._columna] = np.where(nuevas, tiempos, self._hist_t[:, :, self._columna])
+        self._hist_v[:, :, self._columna] = np.where(nuevas, valores, self._hist_v[:, :, self._columna])
+
+    def tasas(self):
+        """|Pendiente| por minuto de cada (reactor, etiqueta) por mínimos cuadrados sobre la ventana.
+
+        Diferenciar dos lecturas consecutivas amplifica el ruido del sensor; la regresión sobre
+        VENTANA_TASA_S lo promedia. Si las lecturas llegan más espaciadas (la flota simulada avanza
+        60 s de proceso por lectura), la ventana cubre INTERVALOS_TASA intervalos para tener al menos
+        tres puntos. NaN si el historial cubre menos de media ventana.
+        """
+        t_fin = np.nanmax(self._hist_t, axis=2, initial=-np.inf)
+        ventana = np.maximum(VENTANA_TASA_S, INTERVALOS_TASA * self._intervalo)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dentro = self._hist_t >= (t_fin - ventana)[..., None]
+            t = np.where(dentro, self._hist_t - t_fin[..., None], 0.0)
+            v = np.where(dentro, self._hist_v, 0.0)
+            n = dentro.sum(axis=2)
+            st, sv = t.sum(axis=2), v.sum(axis=2)
+            pendiente = (n * (t * v).sum(axis=2) - st * sv) / (n * (t * t).sum(axis=2) - st ** 2)
+            cobertura = -np.where(dentro, t, 0.0).min(axis=2)
+        return np.where((n >= 3) & (cobertura >= ventana / 2), np.abs(pendiente) * 60.0, np.nan)
+
+    def evaluar(self, tiempos, valores):
+        """Evaluar un instante: `valores` y `tiempos` con forma (reactores, etiquetas); NaN = sin dato.
+
+        Devuelve el número de transiciones (activaciones + despejes) registradas.
+        """
+        valores = np.asarray(valores, dtype=np.float64)
+        tiempos = np.broadcast_to(np.asarray(tiempos, dtype=np.float64), valores.shape)
+
+        medida = valores.ravel().take(self._celda)
+        if len(self._filas_tasa):
+            self._actualizar_historial(tiempos, valores)
+            medida[self._filas_tasa] = self.tasas().ravel().take(self._celda[self._filas_tasa])
+        t = tiempos.ravel().take(self._celda)
+
+        # Banda muerta: para seguir activa basta con no haber vuelto `banda` dentro del rango
+        margen = np.where(self.activa, self.banda, 0.0)
+        with np.errstate(invalid='ignore'):
+            condicion = (medida < self.bajo + margen) | (medida > self.alto - margen)
+        self.desde = np.where(condicion, np.where(np.isnan(self.desde), t, self.desde), np.nan)
+        activa = condicion & (self.activa | (t - self.desde >= self.retardo))
+
+        cambios = np.flatnonzero(activa != self.activa)
+        if len(cambios):
+            self._registrar(cambios, activa, medida, t)
+        self.activa = activa
+        self.evaluaciones += 1
+        return len(cambios)
+
+    def evaluar_buferes(self, buferes):
+        """Evaluar con el último dato de cada reactor (una lista de BuferesTelemetria por reactor)."""
+        tiempos = np.full((self.n_reactores, len(self.etiquetas)), np.nan)
+        valores = np.full((self.n_reactores, len(self.etiquetas)), np.nan)
+        for i, bufer in enumerate(buferes):
+            ultimos = bufer.instantanea()
+            for j, etiqueta in enumerate(self.etiquetas):
+                if etiqueta in ultimos:
+                    tiempos[i, j], valores[i, j] = ultimos[etiqueta]
+        return self.evaluar(tiempos, valores)
+
+    def _registrar(self, filas, activa, medida, tiempos):
+        with self._bloqueo:
+            for i in filas:
+                regla = self._reglas[self.regla[i]]
+                self._eventos.append({
+                    'tiempo': float(tiempos[i]),
+                    'reactor': self.nombres_reactores[self.reactor[i]],
+                    'regla': regla['nombre'],
+                    'etiqueta': regla['etiqueta'],
+                    'severidad': SEVERIDADES[int(self.severidad[i])],
+                    'evento': 'Activada' if activa[i] else 'Despejada',
+                    'valor': float(medida[i]),
+                    'mensaje': regla.get('mensaje', regla['nombre']),
+                })
+
+    def activas(self):
+        """Alarmas activas (reactor, regla, severidad, mensaje, desde), de mayor a menor severidad."""
+        filas = np.flatnonzero(self.activa)
+        filas = filas[np.argsort(-self.severidad[filas], kind='stable')]
+        return pd.DataFrame({
+            'reactor': [self.nombres_reactores[r] for r in self.reactor[filas]],
+            'regla': [self._reglas[r]['nombre'] for r in self.regla[filas]],
+            'severidad': [SEVERIDADES[int(s)] for s in self.severidad[filas]],
+            'mensaje': [self._reglas[r].get('mensaje', '') for r in self.regla[filas]],
+            'desde': pd.to_datetime(self.desde[filas], unit='s'),
+        })
+
+    def eventos(self):
+        """Historial de activaciones y despejes (los más recientes primero)."""
+        with self._bloqueo:
+            eventos = list(self._eventos)
+        df = pd.DataFrame(eventos, columns=['tiempo', 'reactor', 'regla', 'etiqueta', 'severidad', 'evento', 'valor', 'mensaje'])
+        df['tiempo'] = pd.to_datetime(df['tiempo'], unit='s')
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def limpiar_eventos(self):
+        with self._bloqueo:
+            self._eventos.clear()
@@ -0,0 +1,138 @@
+"""
+Almacén de series temporales direccionado por contenido.
+Deduplica conjuntos de datos idénticos por hash y los guarda comprimidos en float32.
+"""
+
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Dict
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional: se usa zlib como respaldo
+    zstandard = None
+
+
+# --- 1. CODIFICACIÓN DE BLOQUES ---
+def _codificar_delta(valores):
+    """Delta sin pérdida sobre el patrón de bits de float32."""
+    bits = valores.view(np.uint32)
+    return np.diff(bits, prepend=np.uint32(0)).astype(np.uint32)
+
+
+def _decodificar_delta(deltas):
+    """Inversa de _codificar_delta (la suma acumulada envuelve módulo 2³²)."""
+    return np.cumsum(deltas, dtype=np.uint32).view(np.float32)
+
+
+def _comprimir(datos, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=3).compress(datos)
+    if codec == 'zlib':
+        return zlib.compress(datos, 6)
+    return datos
+
+
+def _descomprimir(datos, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(datos)
+    if codec == 'zlib':
+        return zlib.decompress(datos)
+    return datos
+
+
+# --- 2. ALMACÉN ---
+class AlmacenSeries:
+    """Almacén de series deduplicado; los experimentos guardan solo la referencia."""
+
+    def __init__(self, comprimir=True, delta=True, max_cache=16):
+        """Configurar compresión y tamaño de la caché de series descomprimidas."""
+        if not comprimir:
+            self.codec = 'ninguno'
+        else:
+            self.codec = 'zstd' if zstandard is not None else 'zlib'
+        self.delta = delta
+        self.max_cache = max_cache
+        self._bloques = {}
+        self._cache = OrderedDict()
+
+    @staticmethod
+    def calcular_huella(series: Dict[str, np.ndarray]) -> str:
+        """Hash estable de un conjunto de series (nombres, longitudes y valores float32)."""
+        h = hashlib.blake2b(digest_size=16)
+        for nombre in sorted(series):
+            valores = np.ascontiguousarray(series[nombre], dtype=np.float32).ravel()
+            h.update(nombre.encode('utf-8'))
+            h.update(np.int64(valores.size).tobytes())
+            h.update(valores.tobytes())
+        return h.hexdigest()
+
+    def guardar(self, series: Dict[str, np.ndarray]) -> str:
+        """Guardar un conjunto de series y devolver su referencia (no duplica datos ya guardados)."""
+        ref = self.calcular_huella(series)
+        if ref in self._bloques:
+            return ref
+
+        nombres = sorted(series)
+        columnas = [np.ascontiguousarray(series[n], dtype=np.float32).ravel() for n in nombres]
+        longitudes = [int(c.size) for c in columnas]
+        crudo = np.concatenate(columnas) if columnas else np.empty(0, dtype=np.float32)
+
+        if self.delta:
+            # Delta por columna para que el salto entre series no infle los residuos
+            partes = [_codificar_delta(c) for c in columnas]
+            crudo = np.concatenate(partes) if partes else np.empty(0, dtype=np.uint32)
+
+        self._bloques[ref] = {
+            'nombres': nombres,
+            'longitudes': longitudes,
+            'codec': self.codec,
+            'delta': self.delta,
+            'carga': _comprimir(crudo.tobytes(), self.codec),
+            'bytes_crudos': int(sum(longitudes) * 4),
+        }
+        return ref
+
+    def cargar(self, ref: str) -> Dict[str, np.ndarray]:
+        """Descomprimir bajo demanda las series de una referencia."""
+        if ref in self._cache:
+            self._cache.move_to_end(ref)
+            return self._cache[ref]
+
+        bloque = self._bloques[ref]
+        buffer = _descomprimir(bloque['carga'], bloque['codec'])
+        dtype = np.uint32 if bloque['delta'] else np.float32
+        plano = np.frombuffer(buffer, dtype=dtype)
+
+        series = {}
+        inicio = 0
+        for nombre, n in zip(bloque['nombres'], bloque['longitudes']):
+            segmento = plano[inicio:inicio + n]
+            series[nombre] = _decodificar_delta(segmento) if bloque['delta'] else segmento
+            inicio += n
+
+        self._cache[ref] = series
+        if len(self._cache) > self.max_cache:
+            self._cache.popitem(last=False)
+        return series
+
+    def __contains__(self, ref):
+        return ref in self._bloques
+
+    def __len__(self):
+        return len(self._bloques)
+
+    def estadisticas(self):
+        """Resumen de ocupación del almacén."""
+        bytes_crudos = sum(b['bytes_crudos'] for b in self._bloques.values())
+        bytes_almacenados = sum(len(b['carga']) for b in self._bloques.values())
+        return {
+            'series_unicas': len(self._bloques),
+            'bytes_crudos': bytes_crudos,
+            'bytes_almacenados': bytes_almacenados,
+            'razon_compresion': bytes_crudos / bytes_almacenados if bytes_almacenados else 1.0,
+            'en_cache': len(self._cache),
+        }
@@ -0,0 +1,322 @@
+"""
+Análisis cinético por lotes desde la línea de comandos.
+Procesa directorios o patrones de corridas (CSV/Excel/Parquet) en un pool de procesos con
+`calculos_bio.realizar_analisis_cinetico` y escribe una tabla consolidada; el progreso se
+guarda archivo por archivo para poder reanudar tras una interrupción.
+
+Uso:
+    python analisis_lotes.py datos/ "historico/**/*.xlsx" -o resultados.csv --reanudar
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import calculos_bio
+from antibiogramas import normalizar_nombre
+
+EXTENSIONES = ('.csv', '.xlsx', '.xls', '.parquet')
+SERIES = ('tiempo', 'biomasa', 'sustrato', 'producto')
+# Sin 'do' (oxígeno disuelto en el resto de la app) ni nombres de una letra, que son ambiguos
+SINONIMOS_SERIES = {
+    'tiempo': ['tiempo', 'tiempo h', 'time', 'time h', 'hora', 'horas'],
+    'biomasa': ['biomasa', 'biomasa g l', 'biomass', 'od600', 'do600', 'dcw', 'peso seco'],
+    'sustrato': ['sustrato', 'sustrato g l', 'substrate', 'glucosa', 'glucose'],
+    'producto': ['producto', 'producto g l', 'product'],
+}
+COLUMNAS_CONTROL = ['archivo', 'tamano', 'modificado', 'estado', 'mensaje', 'puntos',
+                    't_lectura', 't_analisis']
+ETAPAS = ['lectura', 'analisis']
+
+
+# --- 1. DESCUBRIMIENTO DE ARCHIVOS ---
+def buscar_archivos(entradas, recursivo=False):
+    """Rutas únicas y ordenadas de las corridas indicadas por directorios, patrones glob o archivos."""
+    rutas = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            patron = os.path.join(entrada, '**', '*') if recursivo else os.path.join(entrada, '*')
+            candidatos = glob.glob(patron, recursive=recursivo)
+        else:
+            candidatos = glob.glob(entrada, recursive=True) or [entrada]
+        rutas.update(
+            os.path.abspath(c) for c in candidatos
+            if os.path.isfile(c) and c.lower().endswith(EXTENSIONES)
+        )
+    return sorted(rutas)
+
+
+def huella_archivo(ruta):
+    """(tamaño, mtime en ns) para detectar si una corrida cambió desde que se procesó."""
+    info = os.stat(ruta)
+    return int(info.st_size), int(info.st_mtime_ns)
+
+
+# --- 2. LECTURA Y ANÁLISIS DE UNA CORRIDA ---
+def clave_columna(nombre):
+    """Nombre de columna sin acentos, mayúsculas ni signos: 'Biomasa (g/L)' -> 'biomasa g l'."""
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', normalizar_nombre(nombre)).split())
+
+
+def leer_corrida(ruta):
+    """DataFrame de una corrida según su extensión."""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(ruta)
+    if extension in ('.xlsx', '.xls'):
+        return pd.read_excel(ruta)
+    return pd.read_csv(ruta, sep=None, engine='python')  # Detecta ',' o ';'
+
+
+def extraer_series(df):
+    """Series tiempo/biomasa/sustrato/producto ordenadas por tiempo y sin filas incompletas.
+
+    Las columnas se reconocen por nombre (sin acentos, mayúsculas ni unidades entre paréntesis);
+    ValueError con las series que falten en lugar de adivinar por posición.
+    """
+    nombres = {clave_columna(c): c for c in df.columns}
+    columnas = {}
+    for serie in SERIES:
+        encontrada = next((nombres[s] for s in SINONIMOS_SERIES[serie] if s in nombres), None)
+        if encontrada is not None:
+            columnas[serie] = encontrada
+    faltantes = [serie for serie in SERIES if serie not in columnas]
+    if faltantes:
+        raise ValueError(f"Faltan las series {', '.join(faltantes)} "
+                         f"(columnas: {', '.join(map(str, df.columns))})")
+
+    valores = df[[columnas[s] for s in SERIES]].apply(pd.to_numeric, errors='coerce').to_numpy(np.float64)
+    valores = valores[np.isfinite(valores).all(axis=1)]
+    valores = valores[np.argsort(valores[:, 0], kind='stable')]
+    if len(valores) < 4:
+        raise ValueError(f"Solo {len(valores)} puntos completos (mínimo 4)")
+    return dict(zip(SERIES, valores.T))
+
+
+def aplanar_resultados(resultados):
+    """Resultados cinéticos como una fila plana (la fase exponencial en columnas fase_*)."""
+    fila = {k: v for k, v in resultados.items() if k != 'fase_exponencial'}
+    for clave, valor in resultados.get('fase_exponencial', {}).items():
+        fila[f'fase_{clave}'] = valor
+    return fila
+
+
+def analizar_corrida(ruta):
+    """Fila de resultados de una corrida; los errores quedan en 'estado' y 'mensaje'."""
+    tamano, modificado = huella_archivo(ruta)
+    fila = {'archivo': ruta, 'tamano': tamano, 'modificado': modificado, 'estado': 'ok', 'mensaje': ''}
+    inicio = time.perf_counter()
+    try:
+        series = extraer_series(leer_corrida(ruta))
+        fila['puntos'] = len(series['tiempo'])
+        fila['t_lectura'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        resultados = calculos_bio.realizar_analisis_cinetico(
+            series['tiempo'], series['biomasa'], series['sustrato'], series['producto']
+        )
+        fila['t_analisis'] = time.perf_counter() - inicio
+        fila.update(aplanar_resultados(resultados))
+    except Exception as e:
+        fila['estado'] = 'error'
+        fila['mensaje'] = f"{type(e).__name__}: {e}"
+        fila.setdefault('t_lectura', time.perf_counter() - inicio)
+    return fila
+
+
+# --- 3. PROGRESO Y REANUDACIÓN ---
+def ruta_progreso(salida):
+    """Archivo JSON Lines con una fila por corrida ya procesada."""
+    return salida + '.progreso.jsonl'
+
+
+def cargar_progreso(ruta):
+    """Filas ya procesadas por archivo; ignora una última línea truncada por la interrupción."""
+    filas = {}
+    if not os.path.exists(ruta):
+        return filas
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            try:
+                fila = json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+            filas[fila['archivo']] = fila
+    return filas
+
+
+def pendientes(rutas, hechas):
+    """Rutas sin resultado previo o modificadas desde que se procesaron."""
+    return [
+        r for r in rutas
+        if r not in hechas or (hechas[r]['tamano'], hechas[r]['modificado']) != huella_archivo(r)
+    ]
+
+
+def _a_json(valor):
+    """Valores de NumPy e infinitos a tipos JSON estándar."""
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and not np.isfinite(valor):
+        return None if np.isnan(valor) else ('inf' if valor > 0 else '-inf')
+    return valor
+
+
+def _termina_en_linea(ruta):
+    with open(ruta, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
+
+
+class RegistroProgreso:
+    """Escribe cada fila al terminar su corrida e informa avance y tiempo estimado."""
+
+    def __init__(self, ruta, total, salida=sys.stderr):
+        truncado = os.path.exists(ruta) and os.path.getsize(ruta) > 0 and not _termina_en_linea(ruta)
+        self.archivo = open(ruta, 'a', encoding='utf-8')
+        if truncado:
+            self.archivo.write('\n')  # Separar la línea incompleta de la interrupción anterior
+        self.total = total
+        self.salida = salida
+        self.completadas = 0
+        self.errores = 0
+        self.inicio = time.perf_counter()
+
+    def registrar(self, fila):
+        self.archivo.write(json.dumps({k: _a_json(v) for k, v in fila.items()}, ensure_ascii=False) + '\n')
+        self.archivo.flush()
+        self.completadas += 1
+        self.errores += fila['estado'] != 'ok'
+
+        transcurrido = time.perf_counter() - self.inicio
+        restante = transcurrido / self.completadas * (self.total - self.completadas)
+        detalle = 'ok' if fila['estado'] == 'ok' else fila['mensaje']
+        print(f"[{self.completadas}/{self.total}] {os.path.basename(fila['archivo'])}: {detalle} "
+              f"({transcurrido:.1f} s, ~{restante:.0f} s restantes)", file=self.salida)
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+# --- 4. EJECUCIÓN ---
+def procesar(rutas, registro, max_procesos=None):
+    """Analizar las corridas en un pool de procesos, registrando cada una al completarse."""
+    if max_procesos == 1 or len(rutas) <= 1:
+        for ruta in rutas:
+            registro.registrar(analizar_corrida(ruta))
+        return
+    pool = ProcessPoolExecutor(max_workers=max_procesos)
+    try:
+        futuros = {pool.submit(analizar_corrida, ruta): ruta for ruta in rutas}
+        for futuro in as_completed(futuros):
+            registro.registrar(futuro.result())
+    except KeyboardInterrupt:
+        # Descartar las corridas en cola en lugar de esperar a que terminen todas
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+
+def tabla_consolidada(filas, rutas):
+    """Una fila por corrida (en el orden de las rutas), columnas de control primero."""
+    df = pd.DataFrame([filas[r] for r in rutas if r in filas])
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNAS_CONTROL)
+    for columna in df.columns.difference(COLUMNAS_CONTROL):
+        if df[columna].dtype == object:
+            df[columna] = df[columna].replace({'inf': np.inf, '-inf': -np.inf})
+    columnas = [c for c in COLUMNAS_CONTROL if c in df.columns]
+    return df[columnas + [c for c in df.columns if c not in columnas]]
+
+
+def escribir_tabla(df, salida):
+    """Guardar la tabla en CSV, Excel o Parquet según la extensión."""
+    extension = os.path.splitext(salida)[1].lower()
+    if extension == '.parquet':
+        df.to_parquet(salida, index=False)
+    elif extension in ('.xlsx', '.xls'):
+        df.to_excel(salida, index=False)
+    else:
+        df.to_csv(salida, index=False)
+
+
+def imprimir_tiempos(tiempos, df, salida=sys.stderr):
+    """Resumen de tiempo por etapa (las de los trabajadores como suma de CPU en todos los procesos)."""
+    print("\nTiempo por etapa:", file=salida)
+    for etapa, segundos in tiempos.items():
+        print(f"  {etapa:<14} {segundos:9.2f} s", file=salida)
+    for etapa in ETAPAS:
+        columna = f't_{etapa}'
+        if columna in df.columns:
+            total = pd.to_numeric(df[columna], errors='coerce')
+            print(f"  {etapa:<14} {total.sum():9.2f} s (suma en trabajadores, "
+                  f"media {total.mean() * 1000:.1f} ms/corrida)", file=salida)
+
+
+def construir_parser():
+    parser = argparse.ArgumentParser(
+        description="Análisis cinético por lotes de corridas de fermentación (CSV/Excel/Parquet)."
+    )
+    parser.add_argument('entradas', nargs='+', help="Directorios, archivos o patrones glob (entre comillas)")
+    parser.add_argument('-o', '--salida', default='resultados_cineticos.csv',
+                        help="Tabla consolidada (.csv, .xlsx o .parquet)")
+    parser.add_argument('-r', '--recursivo', action='store_true', help="Recorrer subdirectorios")
+    parser.add_argument('-j', '--procesos', type=int, default=None,
+                        help="Procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument('--reanudar', action='store_true',
+                        help="Omitir corridas ya procesadas y sin cambios en la ejecución anterior")
+    return parser
+
+
+def main(argv=None):
+    args = construir_parser().parse_args(argv)
+    tiempos = {}
+
+    inicio = time.perf_counter()
+    rutas = buscar_archivos(args.entradas, args.recursivo)
+    tiempos['descubrimiento'] = time.perf_counter() - inicio
+    if not rutas:
+        print("No se encontraron corridas (.csv, .xlsx, .xls, .parquet).", file=sys.stderr)
+        return 1
+
+    progreso = ruta_progreso(args.salida)
+    if not args.reanudar and os.path.exists(progreso):
+        os.remove(progreso)
+    hechas = cargar_progreso(progreso)
+    por_hacer = pendientes(rutas, hechas)
+    print(f"{len(rutas)} corridas encontradas, {len(rutas) - len(por_hacer)} ya procesadas, "
+          f"{len(por_hacer)} pendientes.", file=sys.stderr)
+
+    inicio = time.perf_counter()
+    registro = RegistroProgreso(progreso, len(por_hacer))
+    try:
+        procesar(por_hacer, registro, args.procesos)
+    except KeyboardInterrupt:
+        print(f"\nInterrumpido: {registro.completadas} corridas guardadas en {progreso}; "
+              f"use --reanudar para continuar.", file=sys.stderr)
+        return 130
+    finally:
+        registro.cerrar()
+    tiempos['procesamiento'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    df = tabla_consolidada(cargar_progreso(progreso), rutas)
+    escribir_tabla(df, args.salida)
+    tiempos['escritura'] = time.perf_counter() - inicio
+
+    imprimir_tiempos(tiempos, df)
+    errores = int((df['estado'] != 'ok').sum())
+    print(f"\n{len(df)} corridas en {args.salida} ({errores} con error).", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
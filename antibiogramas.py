@@ -0,0 +1,518 @@
+"""
+Interpretación de antibiogramas por difusión en disco.
+Los puntos de corte se compilan una sola vez en un índice por nombre normalizado.
+"""
+
+import difflib
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from cache_resultados import memoizar
+
+SENSIBLE = 'Sensible (S)'
+INTERMEDIO = 'Intermedio (I)'
+RESISTENTE = 'Resistente (R)'
+
+# Criterios simplificados para antibióticos comunes (en mm)
+CRITERIOS_SIMPLIFICADOS = {
+    'ampicilina': {'S': 17, 'R': 13},
+    'amoxicilina': {'S': 17, 'R': 13},
+    'penicilina': {'S': 15, 'R': 11},
+    'eritromicina': {'S': 23, 'R': 13},
+    'tetraciclina': {'S': 19, 'R': 14},
+    'cloranfenicol': {'S': 18, 'R': 12},
+    'gentamicina': {'S': 15, 'R': 12},
+    'ciprofloxacina': {'S': 21, 'R': 15},
+    'vancomicina': {'S': 15, 'R': 14},
+    'ceftriaxona': {'S': 23, 'R': 19}
+}
+
+# Criterio general si no se encuentra el antibiótico específico
+CRITERIO_GENERAL = {'S': 20, 'R': 10}
+
+# Nombres alternativos frecuentes (inglés y abreviaturas) -> nombre canónico
+ALIAS_ANTIBIOTICOS = {
+    'ampicillin': 'ampicilina', 'amp': 'ampicilina',
+    'amoxicillin': 'amoxicilina', 'amx': 'amoxicilina',
+    'penicillin': 'penicilina', 'pen': 'penicilina',
+    'erythromycin': 'eritromicina', 'ery': 'eritromicina',
+    'tetracycline': 'tetraciclina', 'tet': 'tetraciclina',
+    'chloramphenicol': 'cloranfenicol', 'chl': 'cloranfenicol',
+    'gentamicin': 'gentamicina', 'gen': 'gentamicina',
+    'ciprofloxacin': 'ciprofloxacina', 'cip': 'ciprofloxacina',
+    'vancomycin': 'vancomicina', 'van': 'vancomicina',
+    'ceftriaxone': 'ceftriaxona', 'cro': 'ceftriaxona'
+}
+
+
+def normalizar_nombre(nombre):
+    """Minúsculas, sin acentos ni espacios sobrantes."""
+    texto = unicodedata.normalize('NFKD', str(nombre).strip().lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.split())
+
+
+LONGITUD_MINIMA_PARCIAL = 4  # Nombres más cortos solo se aceptan por coincidencia exacta o alias
+
+
+def resolver_nombre(nombre, nombres, indice, alias, parcial=True):
+    """Posición de un antibiótico en `nombres` (exacto, alias, parcial o difuso); -1 si no aparece.
+
+    Con `parcial=False` solo se aceptan coincidencias exactas o por alias.
+    """
+    clave = normalizar_nombre(nombre)
+    if not clave:
+        return -1
+    if clave in indice:
+        return indice[clave]
+    if clave in alias and alias[clave] in indice:
+        return indice[alias[clave]]
+    if not parcial or len(clave) < LONGITUD_MINIMA_PARCIAL:
+        return -1
+
+    # Coincidencias parciales: el nombre conocido contenido en el texto (p. ej. "Ciprofloxacina 5 μg")
+    for i, conocido in enumerate(nombres):
+        if len(conocido) >= LONGITUD_MINIMA_PARCIAL and conocido in clave:
+            return i
+    for nombre_alias, canonico in alias.items():
+        if len(nombre_alias) >= LONGITUD_MINIMA_PARCIAL and nombre_alias in clave and canonico in indice:
+            return indice[canonico]
+
+    # Errores tipográficos
+    cercanos = difflib.get_close_matches(clave, nombres, n=1, cutoff=0.85)
+    return indice[cercanos[0]] if cercanos else -1
+
+
+def clasificar(diametros, punto_s, punto_r):
+    """Clasificación vectorizada S/I/R a partir de diámetros y puntos de corte."""
+    diametros = np.asarray(diametros, dtype=np.float64)
+    return np.select(
+        [diametros >= punto_s, diametros <= punto_r],
+        [SENSIBLE, RESISTENTE],
+        default=INTERMEDIO
+    )
+
+
+# --- TABLAS VERSIONADAS CLSI/EUCAST ---
+COLUMNAS_PUNTOS_CORTE = ['estandar', 'version', 'grupo_organismo', 'antibiotico', 'contenido_disco', 'S', 'R']
+GRUPO_CUALQUIERA = '*'
+
+# Fragmentos del nombre del microorganismo -> grupo de organismos de las tablas
+GRUPOS_ORGANISMO = {
+    'escherichia': 'enterobacterales', 'e. coli': 'enterobacterales', 'klebsiella': 'enterobacterales',
+    'enterobacter': 'enterobacterales', 'salmonella': 'enterobacterales', 'shigella': 'enterobacterales',
+    'proteus': 'enterobacterales', 'citrobacter': 'enterobacterales', 'serratia': 'enterobacterales',
+    'pseudomonas': 'pseudomonas', 'p. aeruginosa': 'pseudomonas', 'acinetobacter': 'acinetobacter',
+    'staphylococcus': 'staphylococcus', 's. aureus': 'staphylococcus', 'enterococcus': 'enterococcus',
+    'streptococcus': 'streptococcus'
+}
+
+
+def _clave_contenido(valor):
+    """Contenido del disco en μg como clave de diccionario (None = cualquier contenido)."""
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(valor) else round(valor, 3)
+
+
+@lru_cache(maxsize=4096)
+def resolver_grupo_organismo(microorganismo):
+    """Grupo de organismos de las tablas para un nombre libre de microorganismo."""
+    texto = normalizar_nombre(microorganismo)
+    for fragmento, grupo in GRUPOS_ORGANISMO.items():
+        if fragmento in texto:
+            return grupo
+    return texto or GRUPO_CUALQUIERA
+
+
+def cargar_puntos_corte(origen, formato=None):
+    """Leer una tabla de puntos de corte versionada desde CSV o JSON (ruta o archivo abierto)."""
+    nombre = str(getattr(origen, 'name', origen)).lower()
+    formato = formato or ('json' if nombre.endswith('.json') else 'csv')
+    df = pd.read_json(origen) if formato == 'json' else pd.read_csv(origen)
+
+    faltantes = [c for c in COLUMNAS_PUNTOS_CORTE if c not in df.columns and c != 'contenido_disco']
+    if faltantes:
+        raise ValueError(f"Faltan columnas en la tabla de puntos de corte: {', '.join(faltantes)}")
+    if 'contenido_disco' not in df.columns:
+        df['contenido_disco'] = np.nan
+    return df[COLUMNAS_PUNTOS_CORTE]
+
+
+class IndicePuntosCorte:
+    """Índice multiclave (estándar, versión, grupo, antibiótico, contenido del disco) -> (S, R)."""
+
+    def __init__(self, alias=None, criterio_general=CRITERIO_GENERAL):
+        """Crear un índice vacío; las tablas se añaden con agregar()."""
+        self.alias = {normalizar_nombre(k): normalizar_nombre(v) for k, v in (alias or {}).items()}
+        self.criterio_general = criterio_general
+        self._claves = {}
+        self._cualquier_contenido = {}
+        self._antibioticos = {}
+        self._resolutores = {}
+
+    @classmethod
+    def desde_criterios(cls, criterios, estandar, version, alias=None):
+        """Índice con una sola versión a partir de un diccionario {antibiótico: {'S', 'R'}}."""
+        indice = cls(alias)
+        indice.agregar(pd.DataFrame([
+            {'estandar': estandar, 'version': version, 'grupo_organismo': GRUPO_CUALQUIERA,
+             'antibiotico': ab, 'contenido_disco': np.nan, 'S': c['S'], 'R': c['R']}
+            for ab, c in criterios.items()
+        ]))
+        return indice
+
+    def agregar(self, tabla):
+        """Incorporar (o reemplazar) las filas de una tabla en formato COLUMNAS_PUNTOS_CORTE."""
+        for fila in tabla.itertuples(index=False):
+            version = (str(fila.estandar).strip().upper(), str(fila.version).strip())
+            antibiotico = normalizar_nombre(fila.antibiotico)
+            grupo = normalizar_nombre(fila.grupo_organismo) or GRUPO_CUALQUIERA
+            clave = version + (grupo, antibiotico, _clave_contenido(fila.contenido_disco))
+            self._claves[clave] = (float(fila.S), float(fila.R))
+            # Respaldo para lecturas sin contenido de disco declarado
+            if clave[-1] is None or clave[:-1] not in self._cualquier_contenido:
+                self._cualquier_contenido[clave[:-1]] = self._claves[clave]
+            self._antibioticos.setdefault(version, {}).setdefault(antibiotico, None)
+        self._resolutores.clear()
+
+    def versiones(self):
+        """Pares (estándar, versión) disponibles."""
+        return sorted(self._antibioticos)
+
+    def _resolutor(self, version):
+        if version not in self._resolutores:
+            nombres = list(self._antibioticos.get(version, {}))
+            indice = {n: i for i, n in enumerate(nombres)}
+
+            def resolver(nombre):
+                i = resolver_nombre(nombre, nombres, indice, self.alias)
+                return nombres[i] if i >= 0 else None
+
+            self._resolutores[version] = lru_cache(maxsize=4096)(resolver)
+        return self._resolutores[version]
+
+    def buscar(self, estandar, version, antibiotico, microorganismo=None, contenido_disco=None):
+        """Puntos de corte (S, R) o None; cae a grupo '*' y a cualquier contenido si no hay uno específico."""
+        clave_version = (str(estandar).strip().upper(), str(version).strip())
+        canonico = self._resolutor(clave_version)(antibiotico)
+        if canonico is None:
+            return None
+        grupo = resolver_grupo_organismo(microorganismo) if microorganismo else GRUPO_CUALQUIERA
+        contenido = _clave_contenido(contenido_disco)
+        for g in (grupo, GRUPO_CUALQUIERA):
+            punto = self._claves.get(clave_version + (g, canonico, contenido))
+            if punto is None and contenido is not None:
+                punto = self._claves.get(clave_version + (g, canonico, None))
+            if punto is None and contenido is None:
+                punto = self._cualquier_contenido.get(clave_version + (g, canonico))
+            if punto is not None:
+                return punto
+        return None
+
+    def interpretar(self, antibiotico, diametro, estandar, version, microorganismo=None, contenido_disco=None):
+        """Interpretación S/I/R de una lectura individual."""
+        punto = self.buscar(estandar, version, antibiotico, microorganismo, contenido_disco)
+        s, r = punto if punto is not None else (self.criterio_general['S'], self.criterio_general['R'])
+        return str(clasificar(diametro, s, r))
+
+    def puntos_corte(self, df, estandar, version, col_antibiotico='antibiotico',
+                     col_organismo='microorganismo', col_contenido='contenido_disco'):
+        """Arreglos (S, R, específico) uniendo las lecturas contra el índice.
+
+        Cada combinación única (antibiótico, microorganismo, contenido) se busca una sola vez,
+        así que el costo por fila es solo la factorización y la indexación.
+        """
+        n = len(df)
+        columnas = []
+        for col in (col_antibiotico, col_organismo, col_contenido):
+            if col in df.columns:
+                columnas.append(pd.factorize(df[col], use_na_sentinel=False))
+            else:
+                columnas.append((np.zeros(n, dtype=np.int64), np.array([None], dtype=object)))
+
+        (cod_ab, ab_u), (cod_org, org_u), (cod_cont, cont_u) = columnas
+        clave = (cod_ab.astype(np.int64) * len(org_u) + cod_org) * len(cont_u) + cod_cont
+        cod_combo, combos = pd.factorize(clave, sort=False)
+
+        s_u = np.full(len(combos), self.criterio_general['S'], dtype=np.float64)
+        r_u = np.full(len(combos), self.criterio_general['R'], dtype=np.float64)
+        especifico_u = np.zeros(len(combos), dtype=bool)
+        for k, combo in enumerate(combos):
+            combo, i_cont = divmod(int(combo), len(cont_u))
+            i_ab, i_org = divmod(combo, len(org_u))
+            ab, org = ab_u[i_ab], org_u[i_org]
+            punto = self.buscar(estandar, version, ab if pd.notna(ab) else '',
+                                org if pd.notna(org) else None, cont_u[i_cont])
+            if punto is not None:
+                s_u[k], r_u[k] = punto
+                especifico_u[k] = True
+        return s_u[cod_combo], r_u[cod_combo], especifico_u[cod_combo]
+
+    def interpretar_lote(self, df, estandar, version, col_diametro='diametro_halo', **columnas):
+        """Interpretar todas las lecturas de un DataFrame con una versión de puntos de corte."""
+        punto_s, punto_r, _ = self.puntos_corte(df, estandar, version, **columnas)
+        etiquetas = clasificar(df[col_diametro].to_numpy(dtype=np.float64), punto_s, punto_r)
+        return pd.Series(etiquetas, index=df.index, name='interpretacion')
+
+
+ESTANDAR_POR_DEFECTO = ('BIOLAB', 'simplificado')
+
+
+def indice_por_defecto():
+    """Índice nuevo con los criterios simplificados (la app crea uno por sesión y le agrega tablas)."""
+    return IndicePuntosCorte.desde_criterios(CRITERIOS_SIMPLIFICADOS, *ESTANDAR_POR_DEFECTO, alias=ALIAS_ANTIBIOTICOS)
+
+
+INDICE_POR_DEFECTO = indice_por_defecto()
+
+
+def interpretar_sensibilidad(antibiotico, diametro, microorganismo=None, contenido_disco=None,
+                             indice=INDICE_POR_DEFECTO, version=ESTANDAR_POR_DEFECTO):
+    """Interpretación S/I/R de una lectura con el índice y la versión indicados (por defecto, los de la app)."""
+    return indice.interpretar(antibiotico, diametro, *version, microorganismo=microorganismo,
+                              contenido_disco=contenido_disco)
+
+
+def interpretar_lote(df, indice=INDICE_POR_DEFECTO, version=ESTANDAR_POR_DEFECTO, **columnas):
+    """Interpretar todas las lecturas de un DataFrame con el índice y la versión indicados."""
+    return indice.interpretar_lote(df, *version, **columnas)
+
+
+def reinterpretar_archivo(df, indice, estandar, version):
+    """Reinterpretar un archivo histórico completo bajo otra versión de puntos de corte."""
+    resultado = df.copy()
+    punto_s, punto_r, especifico = indice.puntos_corte(resultado, estandar, version)
+    resultado['interpretacion'] = clasificar(resultado['diametro_halo'].to_numpy(dtype=np.float64), punto_s, punto_r)
+    resultado['puntos_corte'] = f"{str(estandar).upper()} {version}"
+    resultado['criterio_especifico'] = especifico
+    return resultado
+
+
+# --- IMPORTACIÓN MASIVA ---
+COLUMNAS_REQUERIDAS_CSV = ['Antibiotico', 'Concentracion', 'Diametro_Halo']
+COLUMNAS_OPCIONALES_CSV = ['Unidad_Concentracion', 'Contenido_Disco', 'Microorganismo', 'Experimento',
+                           'Paciente', 'Origen', 'Fecha']
+
+# Grafías aceptadas -> (unidad canónica, factor de conversión)
+UNIDADES_CONCENTRACION = {
+    'μg/ml': ('μg/mL', 1.0), 'µg/ml': ('μg/mL', 1.0), 'ug/ml': ('μg/mL', 1.0), 'mcg/ml': ('μg/mL', 1.0),
+    'mg/l': ('μg/mL', 1.0),
+    'mg/ml': ('μg/mL', 1000.0), 'g/l': ('μg/mL', 1000.0),
+    'ui/ml': ('UI/mL', 1.0), 'iu/ml': ('UI/mL', 1.0), 'u/ml': ('UI/mL', 1.0),
+}
+
+
+def normalizar_unidades(concentraciones, unidades):
+    """Convertir concentraciones a μg/mL (o UI/mL) resolviendo cada grafía de unidad una sola vez.
+
+    Devuelve (valores, unidades canónicas, máscara de unidades reconocidas).
+    """
+    codigos, unicas = pd.factorize(pd.Series(unidades, dtype=object), use_na_sentinel=False)
+    resueltas = [UNIDADES_CONCENTRACION.get(str(u).strip().replace(' ', '').lower()) if pd.notna(u) else None
+                 for u in unicas]
+    canonica_u = np.array([r[0] if r else None for r in resueltas] + [None], dtype=object)
+    factor_u = np.array([r[1] if r else np.nan for r in resueltas] + [np.nan])
+    valores = np.asarray(concentraciones, dtype=np.float64) * factor_u[codigos]
+    return valores, canonica_u[codigos], ~np.isnan(factor_u[codigos])
+
+
+def preparar_importacion(df_csv, valores_defecto=None):
+    """Validar y normalizar un CSV de antibiograma antes de escribir nada en la sesión.
+
+    Las columnas requeridas se comprueban de entrada (ValueError si faltan); las filas con
+    valores inválidos se separan con su motivo. Devuelve (registros válidos, filas rechazadas).
+    """
+    valores_defecto = valores_defecto or {}
+    # Encabezados sin distinguir mayúsculas ni espacios
+    por_nombre = {str(c).strip().lower(): c for c in df_csv.columns}
+    columnas = {c: por_nombre.get(c.lower()) for c in COLUMNAS_REQUERIDAS_CSV + COLUMNAS_OPCIONALES_CSV}
+    faltantes = [c for c in COLUMNAS_REQUERIDAS_CSV if columnas[c] is None]
+    if faltantes:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(faltantes)}")
+
+    def columna(nombre, defecto=None):
+        if columnas[nombre] is None:
+            return pd.Series(defecto, index=df_csv.index, dtype=object)
+        return df_csv[columnas[nombre]] if defecto is None else df_csv[columnas[nombre]].fillna(defecto)
+
+    cod_ab, antibioticos_u = pd.factorize(columna('Antibiotico'), use_na_sentinel=False)
+    antibiotico = np.array([str(a).strip() if pd.notna(a) else '' for a in antibioticos_u], dtype=object)[cod_ab]
+    concentracion = pd.to_numeric(columna('Concentracion'), errors='coerce').to_numpy(dtype=np.float64)
+    diametro = pd.to_numeric(columna('Diametro_Halo'), errors='coerce').to_numpy(dtype=np.float64)
+    valores, unidades, unidad_valida = normalizar_unidades(concentracion, columna('Unidad_Concentracion', 'μg/mL'))
+
+    # Fechas: cada valor distinto se interpreta y formatea una sola vez
+    cod_fecha, fechas_u = pd.factorize(columna('Fecha', valores_defecto.get('fecha')), use_na_sentinel=False)
+    parseadas = pd.to_datetime(pd.Series(fechas_u, dtype=object), errors='coerce', format='ISO8601')
+    fecha = parseadas.dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy(dtype=object)[cod_fecha]
+    fecha_invalida = (parseadas.isna() & pd.notna(fechas_u)).to_numpy()[cod_fecha]
+
+    motivos = pd.Series('', index=df_csv.index, dtype=object)
+    for mascara, motivo in (
+        (antibiotico == '', 'antibiótico vacío; '),
+        (~(concentracion > 0), 'concentración no válida; '),
+        (~(diametro >= 0), 'diámetro no válido; '),
+        (~unidad_valida, 'unidad desconocida; '),
+        (fecha_invalida, 'fecha no válida; '),
+    ):
+        if mascara.any():
+            motivos = motivos.where(~mascara, motivos + motivo)
+    validas = (motivos == '').to_numpy()
+
+    df_validos = pd.DataFrame({
+        'experimento': columna('Experimento', valores_defecto.get('experimento')),
+        'microorganismo': columna('Microorganismo', valores_defecto.get('microorganismo')),
+        'antibiotico': antibiotico,
+        'concentracion': valores,
+        'unidad_concentracion': unidades,
+        'diametro_halo': diametro,
+        'contenido_disco': pd.to_numeric(columna('Contenido_Disco', np.nan), errors='coerce'),
+        'paciente': columna('Paciente', valores_defecto.get('paciente')),
+        'origen': columna('Origen', valores_defecto.get('origen')),
+        'fecha': fecha,
+    })[validas].reset_index(drop=True)
+
+    df_rechazadas = df_csv[~validas].copy()
+    df_rechazadas.insert(0, 'fila', df_rechazadas.index + 2)  # línea del CSV (tras el encabezado)
+    df_rechazadas['motivo'] = motivos[~validas].str.rstrip('; ')
+    return df_validos, df_rechazadas.reset_index(drop=True)
+
+
+# --- AGREGADOS ESTADÍSTICOS ---
+ETIQUETAS_SIR = [SENSIBLE, INTERMEDIO, RESISTENTE]
+
+
+def codificar_sir(interpretaciones):
+    """Columna categórica S/I/R (códigos int8) a partir de las etiquetas de interpretación."""
+    codigos, unicos = pd.factorize(interpretaciones)
+    posicion = {etiqueta: i for i, etiqueta in enumerate(ETIQUETAS_SIR)}
+    codigos_unicos = np.array([posicion.get(u, -1) for u in unicos] + [-1], dtype=np.int8)
+    return pd.Categorical.from_codes(codigos_unicos[codigos], categories=ETIQUETAS_SIR)
+
+
+def meses_de_fechas(fechas):
+    """Mes (datetime64[M]) de cada fecha, interpretando solo los valores únicos."""
+    codigos, unicos = pd.factorize(fechas)
+    fechas_unicas = pd.to_datetime(pd.Series(unicos), errors='coerce', format='ISO8601')
+    meses_unicos = np.append(fechas_unicas.to_numpy().astype('datetime64[M]'), np.datetime64('NaT', 'M'))
+    return pd.Series(meses_unicos[codigos], index=fechas.index)
+
+
+def tabla_sir(df, columna, col_sir='sir'):
+    """Conteos S/I/R, total y porcentajes por valor de `columna` en una sola agrupación."""
+    conteos = (df.groupby([columna, col_sir], observed=False, sort=False).size()
+                 .unstack(fill_value=0)
+                 .reindex(columns=ETIQUETAS_SIR, fill_value=0))
+    conteos = conteos[conteos.sum(axis=1) > 0]
+    tabla = pd.DataFrame({
+        'Total Pruebas': conteos.sum(axis=1),
+        'Sensibles': conteos[SENSIBLE],
+        'Resistentes': conteos[RESISTENTE],
+        'Intermedios': conteos[INTERMEDIO],
+    })
+    total = tabla['Total Pruebas'].where(tabla['Total Pruebas'] > 0)
+    tabla['% Sensibilidad'] = (tabla['Sensibles'] / total * 100).fillna(0.0)
+    tabla['% Resistencia'] = (tabla['Resistentes'] / total * 100).fillna(0.0)
+    return tabla
+
+
+@memoizar(max_entradas=8)
+def resumen_estadistico(df, min_pruebas_mdr=3, min_resistentes_mdr=2):
+    """Todas las tablas del análisis estadístico a partir de una sola codificación S/I/R."""
+    datos = pd.DataFrame({
+        'experimento': df['experimento'],
+        'microorganismo': df['microorganismo'],
+        'antibiotico': df['antibiotico'],
+        'sir': codificar_sir(df['interpretacion'])
+    })
+
+    resumen = {
+        'por_antibiotico': tabla_sir(datos, 'antibiotico'),
+        'por_microorganismo': tabla_sir(datos, 'microorganismo'),
+        'por_experimento': tabla_sir(datos, 'experimento'),
+    }
+
+    if 'fecha' in df.columns:
+        datos['mes_ano'] = meses_de_fechas(df['fecha'])
+        por_mes = datos.groupby(['mes_ano', 'sir'], observed=True).size().unstack(fill_value=0)
+        por_mes.index = por_mes.index.to_period('M')
+        resumen['por_mes'] = por_mes
+
+    por_experimento = resumen['por_experimento']
+    resumen['resistencia_multiple'] = por_experimento[
+        (por_experimento['Total Pruebas'] >= min_pruebas_mdr) &
+        (por_experimento['Resistentes'] >= min_resistentes_mdr)
+    ]
+    return resumen
+
+
+# --- ESTIMACIÓN DE CMI POR REGRESIÓN ---
+DIAMETRO_DISCO_MM = 6.0
+CLAVES_CMI = ['microorganismo', 'antibiotico', 'unidad_concentracion']
+
+
+def ajustar_cmi(df, diametro_disco=DIAMETRO_DISCO_MM, nivel=0.95):
+    """Regresión diámetro ~ log2(concentración) por organismo–antibiótico y CMI estimada.
+
+    Todos los grupos se ajustan en una sola pasada de mínimos cuadrados agrupados (sumas con
+    bincount). La CMI es la concentración a la que el halo extrapolado se reduce al diámetro
+    del disco; su intervalo sale de la predicción inversa (método delta sobre log2 C).
+    """
+    datos = df[df['concentracion'] > 0].dropna(subset=['concentracion', 'diametro_halo'])
+    if 'unidad_concentracion' in datos.columns:
+        # Solo diluciones (μg/mL, UI/mL...): el contenido de un disco en μg no es una concentración
+        datos = datos[normalizar_unidades(datos['concentracion'], datos['unidad_concentracion'])[2]]
+    claves = [c for c in CLAVES_CMI if c in datos.columns]
+    if datos.empty:
+        return pd.DataFrame(columns=claves + ['n', 'pendiente', 'intercepto', 'r2', 'cmi', 'cmi_inf', 'cmi_sup'])
+
+    # Códigos por columna combinados en una clave entera (evita construir tuplas por fila)
+    factores = [pd.factorize(datos[c], use_na_sentinel=False) for c in claves]
+    combinado = np.ravel_multi_index([f[0] for f in factores], [max(len(f[1]), 1) for f in factores])
+    codigos, unicos = pd.factorize(combinado)
+    posiciones = np.unravel_index(unicos, [max(len(f[1]), 1) for f in factores])
+    grupos = pd.DataFrame({c: np.asarray(f[1], dtype=object)[p] for c, f, p in zip(claves, factores, posiciones)})
+    x = np.log2(datos['concentracion'].to_numpy(dtype=np.float64))
+    y = datos['diametro_halo'].to_numpy(dtype=np.float64)
+    g = len(grupos)
+
+    n = np.bincount(codigos, minlength=g).astype(np.float64)
+    sx, sy = np.bincount(codigos, x, g), np.bincount(codigos, y, g)
+    sxx, sxy, syy = np.bincount(codigos, x * x, g), np.bincount(codigos, x * y, g), np.bincount(codigos, y * y, g)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        media_x, media_y = sx / n, sy / n
+        cxx = sxx - n * media_x ** 2
+        cxy = sxy - n * media_x * media_y
+        cyy = syy - n * media_y ** 2
+        pendiente = cxy / cxx
+        intercepto = media_y - pendiente * media_x
+        ss_res = np.maximum(cyy - pendiente * cxy, 0.0)
+        r2 = np.where(cyy > 0, 1 - ss_res / cyy, 0.0)
+
+        # Predicción inversa: log2 CMI donde el diámetro iguala al disco
+        valido = (n >= 3) & (cxx > 0) & (pendiente > 0)
+        log2_cmi = (diametro_disco - intercepto) / pendiente
+        s2 = ss_res / (n - 2)
+        error = np.sqrt(s2 / pendiente ** 2 * (1 / n + (log2_cmi - media_x) ** 2 / cxx))
+        t = stats.t.ppf(0.5 + nivel / 2, np.maximum(n - 2, 1))
+        cmi = np.where(valido, np.exp2(log2_cmi), np.nan)
+        cmi_inf = np.where(valido, np.exp2(log2_cmi - t * error), np.nan)
+        cmi_sup = np.where(valido, np.exp2(log2_cmi + t * error), np.nan)
+
+    modelos = grupos
+    modelos['n'] = n.astype(int)
+    modelos['pendiente'] = pendiente
+    modelos['intercepto'] = intercepto
+    modelos['r2'] = r2
+    modelos['cmi'] = cmi
+    modelos['cmi_inf'] = cmi_inf
+    modelos['cmi_sup'] = cmi_sup
+    return modelos
@@ -0,0 +1,213 @@
+"""
+Caché de resultados para las funciones de cálculo puras.
+Las entradas (arreglos NumPy, DataFrames, textos, parámetros) se identifican por una huella
+barata de forma y contenido; los resultados se guardan en cachés LRU acotadas por número de
+entradas y memoria, con contadores de aciertos visibles en el panel de diagnóstico.
+"""
+
+import copy
+import functools
+import hashlib
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xxhash
+except ImportError:  # Dependencia opcional: se usa blake2b como respaldo
+    xxhash = None
+
+MAX_ENTRADAS = 32
+MAX_MB = 64
+_REGISTRO = {}
+
+
+# --- 1. HUELLAS DE ENTRADAS ---
+def _nuevo_hash():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+def _actualizar_arreglo(h, valores):
+    valores = np.asarray(valores)
+    h.update(f'{valores.dtype.str}{valores.shape}'.encode())
+    if valores.dtype == object:
+        h.update(pd.util.hash_array(valores.ravel()).tobytes())
+    else:
+        h.update(np.ascontiguousarray(valores).view(np.uint8).ravel())
+
+
+def _actualizar(h, valor):
+    """Agregar `valor` a la huella según su tipo (los contenedores se recorren)."""
+    if valor is None or isinstance(valor, (bool, int, float, complex, str, bytes, np.generic)):
+        h.update(f'{type(valor).__name__}:{valor!r};'.encode())
+    elif isinstance(valor, np.ndarray):
+        _actualizar_arreglo(h, valor)
+    elif isinstance(valor, pd.DataFrame):
+        h.update(f'df{valor.shape}'.encode())
+        _actualizar(h, valor.index)
+        for nombre in valor.columns:
+            _actualizar(h, nombre)
+            _actualizar(h, valor[nombre])
+    elif isinstance(valor, pd.Series):
+        h.update(b'serie')
+        _actualizar(h, valor.name)
+        _actualizar(h, valor.index)
+        _actualizar(h, valor.array)
+    elif isinstance(valor, pd.RangeIndex):
+        h.update(f'rango{valor.start},{valor.stop},{valor.step}'.encode())
+    elif isinstance(valor, pd.Categorical):
+        _actualizar(h, valor.categories)
+        _actualizar_arreglo(h, valor.codes)
+    elif isinstance(valor, (pd.Index, pd.api.extensions.ExtensionArray)):
+        _actualizar_arreglo(h, valor.to_numpy() if valor.dtype.kind in 'biufcmM' else valor.astype(object))
+    elif isinstance(valor, (list, tuple)):
+        h.update(f'{type(valor).__name__}{len(valor)}'.encode())
+        for elemento in valor:
+            _actualizar(h, elemento)
+    elif isinstance(valor, dict):
+        h.update(f'dict{len(valor)}'.encode())
+        for clave in sorted(valor, key=repr):
+            _actualizar(h, clave)
+            _actualizar(h, valor[clave])
+    else:
+        try:
+            h.update(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            raise TypeError(f"No se puede calcular la huella de {type(valor).__name__}") from e
+
+
+def huella(*valores):
+    """Digest hexadecimal de forma y contenido de los valores (arreglos sin copiar ni convertir)."""
+    h = _nuevo_hash()
+    for valor in valores:
+        _actualizar(h, valor)
+    return h.hexdigest()
+
+
+def tamano_bytes(valor):
+    """Memoria aproximada de un resultado (arreglos y DataFrames por sus búferes)."""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        uso = valor.memory_usage(index=True, deep=False)
+        return int(uso.sum() if isinstance(uso, pd.Series) else uso)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano_bytes(k) + tamano_bytes(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(tamano_bytes(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+# --- 2. CACHÉ LRU ---
+class CacheLRU:
+    """Resultados por huella con desalojo del menos usado al superar entradas o memoria."""
+
+    def __init__(self, nombre, max_entradas=MAX_ENTRADAS, max_mb=MAX_MB):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.max_bytes = int(max_mb * 1024 ** 2)
+        self._entradas = OrderedDict()  # clave -> (resultado, bytes, segundos de cálculo)
+        self._bloqueo = threading.Lock()
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.segundos_ahorrados = 0.0
+        self.segundos_huella = 0.0
+
+    def obtener(self, clave):
+        """(True, resultado) si la clave está en caché; (False, None) si no."""
+        with self._bloqueo:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return False, None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            self.segundos_ahorrados += entrada[2]
+            return True, entrada[0]
+
+    def guardar(self, clave, resultado, segundos=0.0):
+        """Guardar un resultado; los que no caben en el límite de memoria no se guardan."""
+        tamano = tamano_bytes(resultado)
+        if tamano > self.max_bytes:
+            return
+        with self._bloqueo:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= anterior[1]
+            self._entradas[clave] = (resultado, tamano, segundos)
+            self.bytes += tamano
+            while len(self._entradas) > self.max_entradas or self.bytes > self.max_bytes:
+                _, (_, liberados, _) = self._entradas.popitem(last=False)
+                self.bytes -= liberados
+                self.desalojos += 1
+
+    def limpiar(self):
+        with self._bloqueo:
+            self._entradas.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            'cache': self.nombre,
+            'entradas': len(self._entradas),
+            'max_entradas': self.max_entradas,
+            'memoria_mb': self.bytes / 1024 ** 2,
+            'max_mb': self.max_bytes / 1024 ** 2,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            'desalojos': self.desalojos,
+            'segundos_ahorrados': self.segundos_ahorrados,
+            'segundos_huella': self.segundos_huella,
+        }
+
+
+# --- 3. DECORADOR Y DIAGNÓSTICO ---
+def memoizar(nombre=None, max_entradas=MAX_ENTRADAS, max_mb=MAX_MB, copiar=False):
+    """Decorador: reutiliza el resultado si los argumentos tienen la misma huella.
+
+    Las funciones decoradas deben ser puras. Con copiar=True se devuelve una copia profunda
+    para los llamadores que modifican el resultado (p. ej. diccionarios que se guardan).
+    """
+    def decorador(funcion):
+        cache = CacheLRU(nombre or f'{funcion.__module__}.{funcion.__qualname__}', max_entradas, max_mb)
+        _REGISTRO[cache.nombre] = cache
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            inicio = time.perf_counter()
+            clave = huella(args, kwargs)
+            cache.segundos_huella += time.perf_counter() - inicio
+
+            encontrado, resultado = cache.obtener(clave)
+            if not encontrado:
+                inicio = time.perf_counter()
+                resultado = funcion(*args, **kwargs)
+                cache.guardar(clave, resultado, time.perf_counter() - inicio)
+            return copy.deepcopy(resultado) if copiar else resultado
+
+        envoltura.cache = cache
+        return envoltura
+    return decorador
+
+
+def estadisticas():
+    """Una fila por caché registrada (entradas, aciertos, memoria y tiempo ahorrado)."""
+    return pd.DataFrame([cache.estadisticas() for cache in _REGISTRO.values()])
+
+
+def limpiar_caches():
+    """Vaciar todas las cachés (los contadores se conservan)."""
+    for cache in _REGISTRO.values():
+        cache.limpiar()
@@ -0,0 +1,61 @@
+"""
+Núcleo de cálculo de BioLab sin dependencias de Streamlit.
+La interfaz solo llama a estas funciones; scripts por lotes, pruebas y mediciones de
+rendimiento usan exactamente las mismas rutas de cálculo sin levantar la aplicación.
+
+Depende de dos módulos de la raíz del repositorio, que deben estar en el path: `cache_resultados`
+(memoización) y `antibiogramas` (puntos de corte, reexportados aquí). Ninguno importa Streamlit.
+"""
+
+from calculos_bio.cinetica import (
+    ConfigAnalisis, ResultadosCineticos, parsear_serie, realizar_analisis_cinetico
+)
+from calculos_bio.control import (
+    PARAMETROS_FED_BATCH, ControladorMPC, ParametrosFedBatch, lazo_cerrado, oxigeno_disuelto, predecir
+)
+from calculos_bio.estimacion import (
+    PARAMETROS_SENSOR, SENALES, FiltroKalmanBiomasa, ParametrosSensor, SensorVirtualOxigeno, estimar_series,
+    our_desde_oxigeno, senales_sinteticas
+)
+from calculos_bio.fases import (
+    FaseExponencial, ajustar_fase_manual, detectar_fase_exponencial,
+    detectar_fase_exponencial_optimizada, regresion_ventanas
+)
+from calculos_bio.optimizacion import (
+    LIMITES_POR_DEFECTO, MIN_EXPERIMENTOS, OBJETIVOS, PARAMETROS_PROCESO, datos_entrenamiento,
+    matriz_objetivos, optimizar_parametros, valores_objetivo
+)
+from calculos_bio.optimizacion_modelo import (
+    CONDICIONES, LIMITES_CONDICIONES, MODELO_PROCESO, NOMBRES_CONDICIONES, CacheEvaluaciones, ModeloProceso,
+    mu_max_condiciones, optimizar_condiciones, puntuaciones_condiciones, simular_conjunto
+)
+from calculos_bio.pareto import (
+    FrentePareto, distancia_hacinamiento, explorar_frente, ordenamiento_no_dominado
+)
+from calculos_bio.simulacion import (
+    ParametrosProducto, modelo_cinetico_monod_luedeking, simular_bioproceso, simular_cultivo
+)
+from calculos_bio.sustituto import SustitutoGP, mejora_esperada
+from calculos_bio.transferencia import calcular_kla_dinamico
+# Los puntos de corte viven en el módulo de la raíz, que también usan vigilancia y metabolitos
+from antibiogramas import (
+    ESTANDAR_POR_DEFECTO, IndicePuntosCorte, indice_por_defecto, interpretar_lote, interpretar_sensibilidad
+)
+
+__all__ = [
+    'ConfigAnalisis', 'ResultadosCineticos', 'parsear_serie', 'realizar_analisis_cinetico',
+    'PARAMETROS_FED_BATCH', 'ControladorMPC', 'ParametrosFedBatch', 'lazo_cerrado', 'oxigeno_disuelto', 'predecir',
+    'PARAMETROS_SENSOR', 'SENALES', 'FiltroKalmanBiomasa', 'ParametrosSensor', 'SensorVirtualOxigeno', 'estimar_series',
+    'our_desde_oxigeno', 'senales_sinteticas',
+    'FaseExponencial', 'ajustar_fase_manual', 'detectar_fase_exponencial',
+    'detectar_fase_exponencial_optimizada', 'regresion_ventanas',
+    'LIMITES_POR_DEFECTO', 'MIN_EXPERIMENTOS', 'OBJETIVOS', 'PARAMETROS_PROCESO', 'datos_entrenamiento',
+    'matriz_objetivos', 'optimizar_parametros', 'valores_objetivo',
+    'CONDICIONES', 'LIMITES_CONDICIONES', 'MODELO_PROCESO', 'NOMBRES_CONDICIONES', 'CacheEvaluaciones', 'ModeloProceso',
+    'mu_max_condiciones', 'optimizar_condiciones', 'puntuaciones_condiciones', 'simular_conjunto',
+    'FrentePareto', 'distancia_hacinamiento', 'explorar_frente', 'ordenamiento_no_dominado',
+    'ParametrosProducto', 'modelo_cinetico_monod_luedeking', 'simular_bioproceso', 'simular_cultivo',
+    'SustitutoGP', 'mejora_esperada',
+    'calcular_kla_dinamico',
+    'ESTANDAR_POR_DEFECTO', 'IndicePuntosCorte', 'indice_por_defecto', 'interpretar_lote', 'interpretar_sensibilidad',
+]
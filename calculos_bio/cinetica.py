@@ -0,0 +1,153 @@
+"""
+Análisis cinético integral de un cultivo por lotes (sin dependencias de interfaz).
+Calcula parámetros de crecimiento, rendimientos, productividades y tiempo de duplicación.
+"""
+
+import math
+from typing import Optional, Sequence, TypedDict
+
+import numpy as np
+
+from cache_resultados import memoizar
+from calculos_bio.fases import ajustar_fase_manual, regresion_ventanas
+
+MIN_R2_AUTOMATICO = 0.8
+
+
+class ConfigAnalisis(TypedDict, total=False):
+    metodo_deteccion: str  # 'Automático' o 'Manual'
+    inicio_manual: Optional[int]
+    fin_manual: Optional[int]
+
+
+class ResultadosCineticos(TypedDict, total=False):
+    biomasa_maxima: float
+    biomasa_final: float
+    biomasa_inicial: float
+    sustrato_consumido: float
+    producto_formado: float
+    tiempo_cultivo: float
+    mu_max: float
+    mu_promedio: float
+    r_squared_exp: float
+    fase_exponencial: dict
+    velocidad_crecimiento_max: float
+    velocidad_crecimiento_prom: float
+    rendimiento_biomasa: float
+    rendimiento_producto: float
+    productividad_biomasa: float
+    productividad_producto: float
+    consumo_especifico_sustrato: float
+    formacion_especifica_producto: float
+    tiempo_duplicacion: float
+
+
+@memoizar()
+def parsear_serie(texto: str) -> np.ndarray:
+    """Serie numérica a partir de un valor por línea (formato de los campos de entrada)."""
+    return np.array([float(x.strip()) for x in str(texto).split('\n') if x.strip()])
+
+
+def _fase_automatica(tiempo, log_biomasa):
+    """Ventana (≥3 puntos) con mayor R² y pendiente positiva; a igualdad, la más temprana."""
+    inicio, fin, pendiente, r2 = regresion_ventanas(tiempo, log_biomasa, 3)
+    validas = (pendiente > 0) & (r2 > MIN_R2_AUTOMATICO)
+    if not validas.any():
+        return 0, len(tiempo) - 1, 0.0, 0.0
+    k = int(np.argmax(np.where(validas, r2, -np.inf)))
+    return int(inicio[k]), int(fin[k]), float(pendiente[k]), float(r2[k])
+
+
+@memoizar(copiar=True)
+def realizar_analisis_cinetico(tiempo: Sequence[float], biomasa: Sequence[float], sustrato: Sequence[float],
+                               producto: Sequence[float], config_analisis: Optional[ConfigAnalisis] = None
+                               ) -> ResultadosCineticos:
+    """Realizar análisis cinético integral."""
+    tiempo = np.asarray(tiempo, dtype=np.float64)
+    biomasa = np.asarray(biomasa, dtype=np.float64)
+    sustrato = np.asarray(sustrato, dtype=np.float64)
+    producto = np.asarray(producto, dtype=np.float64)
+    if config_analisis is None:
+        config_analisis = {'metodo_deteccion': 'Automático'}
+
+    # Parámetros básicos
+    resultados: ResultadosCineticos = {
+        'biomasa_maxima': float(np.max(biomasa)),
+        'biomasa_final': float(biomasa[-1]),
+        'biomasa_inicial': float(biomasa[0]),
+        'sustrato_consumido': float(sustrato[0] - sustrato[-1]),
+        'producto_formado': float(producto[-1] - producto[0]),
+        'tiempo_cultivo': float(tiempo[-1] - tiempo[0]),
+    }
+
+    # Determinar fase exponencial según configuración
+    if config_analisis.get('metodo_deteccion') == 'Manual' and config_analisis.get('inicio_manual') is not None:
+        inicio_idx = config_analisis['inicio_manual']
+        fin_idx = config_analisis['fin_manual']
+        ajuste = ajustar_fase_manual(tiempo, biomasa, inicio_idx, fin_idx) if inicio_idx < fin_idx < len(tiempo) else None
+        if ajuste is not None:
+            pendiente, _, r_squared = ajuste
+            resultados['mu_max'] = pendiente
+            resultados['mu_promedio'] = pendiente
+            resultados['r_squared_exp'] = r_squared
+            resultados['fase_exponencial'] = {
+                'inicio': float(tiempo[inicio_idx]),
+                'fin': float(tiempo[fin_idx]),
+                'duracion': float(tiempo[fin_idx] - tiempo[inicio_idx]),
+                'metodo': 'Manual'
+            }
+        else:
+            resultados['mu_max'] = 0.0
+            resultados['mu_promedio'] = 0.0
+            resultados['r_squared_exp'] = 0.0
+    else:
+        # Detección automática de fase exponencial
+        log_biomasa = np.log(biomasa + 1e-10)  # Evitar log(0)
+        mejor_inicio, mejor_fin, mejor_mu, mejor_r2 = _fase_automatica(tiempo, log_biomasa)
+        resultados['mu_max'] = mejor_mu
+        resultados['mu_promedio'] = mejor_mu
+        resultados['r_squared_exp'] = mejor_r2
+        resultados['fase_exponencial'] = {
+            'inicio': float(tiempo[mejor_inicio]),
+            'fin': float(tiempo[mejor_fin]),
+            'duracion': float(tiempo[mejor_fin] - tiempo[mejor_inicio]),
+            'metodo': 'Automático'
+        }
+
+    # Valores de compatibilidad
+    resultados['velocidad_crecimiento_max'] = resultados['mu_max']
+    resultados['velocidad_crecimiento_prom'] = resultados['mu_promedio']
+
+    # Coeficientes de rendimiento
+    if resultados['sustrato_consumido'] > 0:
+        resultados['rendimiento_biomasa'] = (resultados['biomasa_final'] - resultados['biomasa_inicial']) / resultados['sustrato_consumido']
+        resultados['rendimiento_producto'] = resultados['producto_formado'] / resultados['sustrato_consumido']
+    else:
+        resultados['rendimiento_biomasa'] = 0.0
+        resultados['rendimiento_producto'] = 0.0
+
+    # Cálculos de productividad
+    if resultados['tiempo_cultivo'] > 0:
+        # Formación neta de biomasa, como la productividad de producto y la del simulador
+        resultados['productividad_biomasa'] = (resultados['biomasa_final'] - resultados['biomasa_inicial']) / resultados['tiempo_cultivo']
+        resultados['productividad_producto'] = resultados['producto_formado'] / resultados['tiempo_cultivo']
+    else:
+        resultados['productividad_biomasa'] = 0.0
+        resultados['productividad_producto'] = 0.0
+
+    # Velocidades específicas
+    biomasa_promedio = float(np.mean(biomasa))
+    if biomasa_promedio > 0 and resultados['tiempo_cultivo'] > 0:
+        resultados['consumo_especifico_sustrato'] = resultados['sustrato_consumido'] / (biomasa_promedio * resultados['tiempo_cultivo'])
+        resultados['formacion_especifica_producto'] = resultados['producto_formado'] / (biomasa_promedio * resultados['tiempo_cultivo'])
+    else:
+        resultados['consumo_especifico_sustrato'] = 0.0
+        resultados['formacion_especifica_producto'] = 0.0
+
+    # Tiempo de duplicación (si se observa crecimiento)
+    if resultados['velocidad_crecimiento_max'] > 0:
+        resultados['tiempo_duplicacion'] = math.log(2) / resultados['velocidad_crecimiento_max']
+    else:
+        resultados['tiempo_duplicacion'] = float('inf')
+
+    return resultados
@@ -0,0 +1,180 @@
+"""
+Control predictivo (MPC) de la alimentación en cultivo alimentado (fed-batch).
+En cada intervalo se optimiza la trayectoria futura de caudal de alimentación contra el
+modelo Monod + Pirt + Luedeking-Piret (maximizar producto con OD sobre el crítico), partiendo
+de la solución anterior desplazada; el lazo cerrado usa el integrador de SciPy como planta.
+"""
+
+import time
+from typing import Dict, TypedDict
+
+import numpy as np
+from scipy.integrate import odeint
+from scipy.optimize import minimize
+
+
+class ParametrosFedBatch(TypedDict):
+    mu_max: float     # h⁻¹
+    ks: float         # g/L
+    yxs: float        # g X / g S
+    ms: float         # g S / g X / h
+    alpha: float      # g P / g X
+    beta: float       # g P / g X / h
+    yps: float        # g P / g S
+    kp: float         # g/L de sustrato a la mitad de la producción no asociada y el mantenimiento
+    sf: float         # g/L de sustrato en la alimentación
+    yxo: float        # g X / mmol O₂
+    mo: float         # mmol O₂ / g X / h
+    kla: float        # h⁻¹
+    c_saturacion: float  # mmol O₂/L
+    od_critico: float    # % de saturación
+    v_max: float      # L
+
+
+PARAMETROS_FED_BATCH: ParametrosFedBatch = {
+    'mu_max': 0.347, 'ks': 21.1, 'yxs': 0.13, 'ms': 0.01, 'alpha': 0.5, 'beta': 0.1, 'yps': 0.5, 'kp': 2.0,
+    'sf': 300.0, 'yxo': 0.032, 'mo': 0.3, 'kla': 200.0, 'c_saturacion': 0.21,
+    'od_critico': 20.0, 'v_max': 2.0,
+}
+
+
+# --- 1. MODELO FED-BATCH VECTORIZADO ---
+def derivadas_fed_batch(estado, caudal, p):
+    """d[X, S, P, V]/dt para estados (..., 4) y caudales (...) en L/h.
+
+    El producto consume sustrato (qP / Yp/s); la producción no asociada al crecimiento y el
+    mantenimiento se saturan con S/(kp + S), de modo que sin sustrato no se forma producto y
+    el balance de masa se cierra.
+    """
+    X, S, P, V = (estado[..., i] for i in range(4))
+    S = np.maximum(S, 0.0)
+    mu = p['mu_max'] * S / (p['ks'] + S)
+    limitacion = S / (p['kp'] + S)
+    qp = p['alpha'] * mu + p['beta'] * limitacion
+    dilucion = caudal / V
+    dX = mu * X - dilucion * X
+    dS = -(mu / p['yxs'] + p['ms'] * limitacion + qp / p['yps']) * X + dilucion * (p['sf'] - S)
+    dP = qp * X - dilucion * P
+    return np.stack((dX, dS, dP, caudal), axis=-1)
+
+
+def oxigeno_disuelto(estado, p):
+    """OD (%) cuasi-estacionario: C = C* − OUR/kLa, con OUR de Pirt."""
+    X, S = estado[..., 0], np.maximum(estado[..., 1], 0.0)
+    mu = p['mu_max'] * S / (p['ks'] + S)
+    our = (mu / p['yxo'] + p['mo']) * X
+    return 100.0 * (1.0 - our / (p['kla'] * p['c_saturacion']))
+
+
+def predecir(estado, caudales, intervalo, p, subpasos=2):
+    """RK4 por lotes: caudales (lotes × horizonte) constantes por intervalo.
+
+    Devuelve el estado final (lotes × 4) y el OD al final de cada subpaso (lotes × horizonte × subpasos).
+    """
+    caudales = np.atleast_2d(caudales)
+    x = np.broadcast_to(np.asarray(estado, dtype=np.float64), (len(caudales), 4)).copy()
+    h = intervalo / subpasos
+    od = np.empty(caudales.shape + (subpasos,))
+    for k in range(caudales.shape[1]):
+        u = caudales[:, k]
+        for j in range(subpasos):
+            k1 = derivadas_fed_batch(x, u, p)
+            k2 = derivadas_fed_batch(x + h / 2 * k1, u, p)
+            k3 = derivadas_fed_batch(x + h / 2 * k2, u, p)
+            k4 = derivadas_fed_batch(x + h * k3, u, p)
+            x = x + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+            od[:, k, j] = oxigeno_disuelto(x, p)
+    return x, od
+
+
+# --- 2. CONTROLADOR MPC ---
+class ControladorMPC:
+    """Optimiza el caudal de los próximos `horizonte` intervalos y aplica solo el primero.
+
+    La penalización de OD bajo y de volumen máximo es cuadrática (restricciones blandas); el
+    gradiente se obtiene por diferencias finitas evaluando las horizonte + 1 trayectorias en
+    un solo lote, y cada resolución arranca de la anterior desplazada un intervalo.
+    """
+
+    def __init__(self, parametros: ParametrosFedBatch = PARAMETROS_FED_BATCH, horizonte=16, intervalo=0.5,
+                 caudal_max=0.05, peso_od=10.0, peso_volumen=1e3, peso_movimiento=1.0, max_iteraciones=30):
+        self.parametros = dict(parametros)
+        self.horizonte = horizonte
+        self.intervalo = intervalo
+        self.caudal_max = caudal_max
+        self.peso_od = peso_od
+        self.peso_volumen = peso_volumen
+        self.peso_movimiento = peso_movimiento
+        self.max_iteraciones = max_iteraciones
+        self.plan = np.zeros(horizonte)
+        self._anterior = 0.0
+
+    def _costos(self, caudales, estado):
+        """Costo de cada trayectoria del lote: −producto final + penalizaciones."""
+        p = self.parametros
+        final, od = predecir(estado, caudales, self.intervalo, p)
+        producto = final[:, 2] * final[:, 3]
+        deficit_od = np.maximum(p['od_critico'] - od, 0.0)
+        exceso_v = np.maximum(final[:, 3] - p['v_max'], 0.0)
+        movimientos = np.diff(np.column_stack((np.full(len(caudales), self._anterior), caudales)), axis=1) / self.caudal_max
+        return (-producto + self.peso_od * (deficit_od ** 2).sum(axis=(1, 2))
+                + self.peso_volumen * exceso_v ** 2 + self.peso_movimiento * (movimientos ** 2).sum(axis=1))
+
+    def _costo_y_gradiente(self, z, estado):
+        """Costo y gradiente respecto del caudal normalizado z = caudal / caudal_max."""
+        paso = 1e-6
+        lote = np.vstack((z, z + paso * np.eye(len(z)))) * self.caudal_max
+        costos = self._costos(lote, estado)
+        return costos[0], (costos[1:] - costos[0]) / paso
+
+    def resolver(self, estado):
+        """Plan óptimo desde `estado`; devuelve el caudal a aplicar y datos de la resolución."""
+        inicio = time.perf_counter()
+        inicial = np.clip(np.append(self.plan[1:], self.plan[-1]) / self.caudal_max, 0.0, 1.0)  # Arranque en caliente
+        resultado = minimize(self._costo_y_gradiente, inicial, args=(np.asarray(estado, dtype=np.float64),),
+                             jac=True, method='L-BFGS-B', bounds=[(0.0, 1.0)] * self.horizonte,
+                             options={'maxiter': self.max_iteraciones, 'ftol': 1e-7})
+        self.plan = resultado.x * self.caudal_max
+        self._anterior = float(self.plan[0])
+        return self._anterior, {
+            'segundos': time.perf_counter() - inicio,
+            'iteraciones': int(resultado.nit),
+            'evaluaciones': int(resultado.nfev),
+            'costo': float(resultado.fun),
+        }
+
+
+# --- 3. LAZO CERRADO CONTRA LA PLANTA SIMULADA ---
+def _derivadas_planta(y, t, caudal, p):
+    return derivadas_fed_batch(np.asarray(y), np.float64(caudal), p)
+
+
+def lazo_cerrado(controlador: ControladorMPC, estado_inicial, duracion, parametros_planta: ParametrosFedBatch = None,
+                 ruido=0.02, semilla=None, presupuesto_s=None) -> Dict[str, np.ndarray]:
+    """Simular el lazo: medir (con ruido), resolver el MPC, aplicar el primer caudal un intervalo en la planta.
+
+    `parametros_planta` permite un desajuste planta-modelo; `presupuesto_s` es el tiempo de
+    cómputo disponible por intervalo (por defecto el propio intervalo en segundos).
+    """
+    rng = np.random.default_rng(semilla)
+    planta = dict(parametros_planta or controlador.parametros)
+    presupuesto_s = presupuesto_s if presupuesto_s is not None else controlador.intervalo * 3600.0
+    n = int(round(duracion / controlador.intervalo))
+    estado = np.asarray(estado_inicial, dtype=np.float64)
+
+    historial = {clave: np.empty(n) for clave in
+                 ('tiempo', 'X', 'S', 'P', 'V', 'od', 'caudal', 'segundos', 'iteraciones')}
+    for k in range(n):
+        medido = estado * (1 + ruido * rng.standard_normal(4) * np.array([1, 1, 1, 0]))
+        caudal, resolucion = controlador.resolver(np.maximum(medido, 0.0))
+        historial['tiempo'][k] = k * controlador.intervalo
+        historial['X'][k], historial['S'][k], historial['P'][k], historial['V'][k] = estado
+        historial['od'][k] = oxigeno_disuelto(estado, planta)
+        historial['caudal'][k] = caudal
+        historial['segundos'][k] = resolucion['segundos']
+        historial['iteraciones'][k] = resolucion['iteraciones']
+        estado = odeint(_derivadas_planta, estado, [0.0, controlador.intervalo], args=(caudal, planta))[-1]
+        estado[1] = max(estado[1], 0.0)
+    historial['en_presupuesto'] = historial['segundos'] <= presupuesto_s
+    historial['presupuesto_s'] = np.full(n, presupuesto_s)
+    return historial
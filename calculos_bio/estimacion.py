@@ -0,0 +1,227 @@
+"""
+Sensor virtual de biomasa: filtro de Kalman extendido sobre el modelo Monod + Pirt.
+Estima X, S y μmax (y de ahí μ) a partir de señales en línea (OUR, CER, adición de base)
+para muchos reactores a la vez; estados y covarianzas van en arreglos por lote y cada paso
+cuesta lo mismo sin importar la duración del cultivo.
+"""
+
+from collections import deque
+from typing import Dict, Sequence, TypedDict
+
+import numpy as np
+
+SENALES = ('our', 'cer', 'base')
+NOMBRES_SENALES = {
+    'our': 'OUR (mmol O₂/L/h)',
+    'cer': 'CER (mmol CO₂/L/h)',
+    'base': 'Adición de base (mmol/L/h)',
+}
+N_ESTADOS = 3  # X, S, μmax
+
+
+class ParametrosSensor(TypedDict):
+    ks: float    # g/L
+    yxs: float   # g X / g S
+    ms: float    # g S / g X / h
+    yxo: float   # g X / mmol O₂
+    mo: float    # mmol O₂ / g X / h
+    yxc: float   # g X / mmol CO₂
+    mc: float    # mmol CO₂ / g X / h
+    kb: float    # mmol base / g X formado
+
+
+PARAMETROS_SENSOR: ParametrosSensor = {
+    'ks': 21.1, 'yxs': 0.13, 'ms': 0.01,
+    'yxo': 0.032, 'mo': 0.3, 'yxc': 0.035, 'mc': 0.25, 'kb': 5.0,
+}
+
+
+# --- 1. MODELO Y JACOBIANOS ANALÍTICOS ---
+def _coeficientes_senales(parametros):
+    """Cada señal es (a·μ + b)·X: OUR y CER por Pirt, la base asociada al crecimiento."""
+    a = np.array([1 / parametros['yxo'], 1 / parametros['yxc'], parametros['kb']])
+    b = np.array([parametros['mo'], parametros['mc'], 0.0])
+    return a, b
+
+
+def _mu(estado, ks):
+    """μ, ∂μ/∂S y ∂μ/∂μmax por reactor (S y μmax recortados a valores no negativos)."""
+    S = np.maximum(estado[:, 1], 0.0)
+    mu_max = np.maximum(estado[:, 2], 0.0)
+    fraccion = S / (ks + S)
+    return mu_max * fraccion, mu_max * ks / (ks + S) ** 2, fraccion
+
+
+def derivadas_estado(estado, parametros):
+    """dX/dt, dS/dt y dμmax/dt (paseo aleatorio) para estados (reactores × 3)."""
+    X = estado[:, 0]
+    mu, _, _ = _mu(estado, parametros['ks'])
+    dX = mu * X
+    dS = -(mu / parametros['yxs'] + parametros['ms']) * X
+    return np.column_stack((dX, np.where(estado[:, 1] > 0, dS, 0.0), np.zeros_like(X)))
+
+
+def jacobiano_estado(estado, parametros):
+    """∂f/∂x analítico (reactores × 3 × 3)."""
+    X = estado[:, 0]
+    mu, mu_s, mu_m = _mu(estado, parametros['ks'])
+    yxs = parametros['yxs']
+    J = np.zeros((len(estado), N_ESTADOS, N_ESTADOS))
+    J[:, 0, 0] = mu
+    J[:, 0, 1] = X * mu_s
+    J[:, 0, 2] = X * mu_m
+    activo = estado[:, 1] > 0
+    J[:, 1, 0] = np.where(activo, -(mu / yxs + parametros['ms']), 0.0)
+    J[:, 1, 1] = np.where(activo, -X * mu_s / yxs, 0.0)
+    J[:, 1, 2] = np.where(activo, -X * mu_m / yxs, 0.0)
+    return J
+
+
+def medicion_esperada(estado, parametros):
+    """Señales predichas por el modelo (reactores × señales) y su jacobiano (reactores × señales × 3)."""
+    X = estado[:, 0]
+    mu, mu_s, mu_m = _mu(estado, parametros['ks'])
+    a, b = _coeficientes_senales(parametros)
+    h = (mu[:, None] * a + b) * X[:, None]
+    H = np.empty((len(estado), len(a), N_ESTADOS))
+    H[:, :, 0] = mu[:, None] * a + b
+    H[:, :, 1] = a * (X * mu_s)[:, None]
+    H[:, :, 2] = a * (X * mu_m)[:, None]
+    return h, H
+
+
+# --- 2. FILTRO POR LOTES ---
+class FiltroKalmanBiomasa:
+    """EKF discreto (Euler) para n reactores: estado (n, 3) y covarianza (n, 3, 3)."""
+
+    def __init__(self, n_reactores, biomasa_inicial, sustrato_inicial, mu_max_inicial,
+                 parametros: ParametrosSensor = PARAMETROS_SENSOR,
+                 desv_inicial=(0.1, 5.0, 0.1), ruido_proceso=(0.01, 0.05, 0.005), ruido_medicion=(0.5, 0.5, 0.3)):
+        self.parametros = dict(parametros)
+        self.n_reactores = n_reactores
+        self.estado = np.column_stack([
+            np.broadcast_to(np.asarray(valor, dtype=np.float64), n_reactores)
+            for valor in (biomasa_inicial, sustrato_inicial, mu_max_inicial)
+        ]).copy()
+        self.cov = np.tile(np.diag(np.square(desv_inicial)), (n_reactores, 1, 1))
+        self.Q = np.diag(np.square(ruido_proceso))       # Por hora
+        self.R = np.diag(np.square(ruido_medicion))
+
+    def predecir(self, dt):
+        """Propagar estado y covarianza dt horas: x += f(x)·dt, P = F P Fᵀ + Q·dt."""
+        F = np.eye(N_ESTADOS) + jacobiano_estado(self.estado, self.parametros) * dt
+        self.estado = self.estado + derivadas_estado(self.estado, self.parametros) * dt
+        np.maximum(self.estado, 0.0, out=self.estado)
+        self.cov = F @ self.cov @ F.transpose(0, 2, 1) + self.Q * dt
+
+    def corregir(self, mediciones):
+        """Asimilar mediciones (n, señales); NaN = señal no disponible en ese reactor."""
+        mediciones = np.asarray(mediciones, dtype=np.float64).reshape(self.n_reactores, len(SENALES))
+        h, H = medicion_esperada(self.estado, self.parametros)
+        disponible = np.isfinite(mediciones)
+        innovacion = np.where(disponible, mediciones - h, 0.0)
+        H = np.where(disponible[:, :, None], H, 0.0)
+
+        PHt = self.cov @ H.transpose(0, 2, 1)
+        S = H @ PHt + self.R
+        K = np.linalg.solve(S, PHt.transpose(0, 2, 1)).transpose(0, 2, 1)  # P Hᵀ S⁻¹ (S simétrica)
+        self.estado = self.estado + (K @ innovacion[:, :, None])[:, :, 0]
+        np.maximum(self.estado, 0.0, out=self.estado)
+
+        # Forma de Joseph: conserva la covarianza simétrica y definida positiva
+        I_KH = np.eye(N_ESTADOS) - K @ H
+        self.cov = I_KH @ self.cov @ I_KH.transpose(0, 2, 1) + K @ self.R @ K.transpose(0, 2, 1)
+
+    def paso(self, dt, mediciones):
+        self.predecir(dt)
+        self.corregir(mediciones)
+        return self.estimaciones()
+
+    def estimaciones(self):
+        """X, S, μ y μmax estimados con la desviación estándar de X, S y μmax."""
+        mu, _, _ = _mu(self.estado, self.parametros['ks'])
+        desv = np.sqrt(np.diagonal(self.cov, axis1=1, axis2=2))
+        return {
+            'X': self.estado[:, 0].copy(), 'S': self.estado[:, 1].copy(),
+            'mu': mu, 'mu_max': self.estado[:, 2].copy(),
+            'desv_X': desv[:, 0], 'desv_S': desv[:, 1], 'desv_mu_max': desv[:, 2],
+        }
+
+
+def estimar_series(tiempos: Sequence[float], mediciones, filtro: FiltroKalmanBiomasa) -> Dict[str, np.ndarray]:
+    """Recorrer una serie (instantes × reactores × señales) con el filtro; devuelve cada estimación por instante."""
+    tiempos = np.asarray(tiempos, dtype=np.float64)
+    mediciones = np.asarray(mediciones, dtype=np.float64).reshape(len(tiempos), filtro.n_reactores, len(SENALES))
+    historial = {}
+    for i in range(len(tiempos)):
+        if i > 0:
+            filtro.predecir(tiempos[i] - tiempos[i - 1])
+        filtro.corregir(mediciones[i])
+        for clave, valor in filtro.estimaciones().items():
+            historial.setdefault(clave, np.empty((len(tiempos), filtro.n_reactores)))[i] = valor
+    return historial
+
+
+# --- 3. SEÑALES EN LÍNEA ---
+def our_desde_oxigeno(tiempo, oxigeno_pct, kla, c_saturacion=0.21):
+    """OUR (mmol/L/h) por balance de oxígeno disuelto: kLa·(C* − C) − dC/dt, con C* en mmol/L al 100%."""
+    C = np.asarray(oxigeno_pct, dtype=np.float64) / 100.0 * c_saturacion
+    return kla * (c_saturacion - C) - np.gradient(C, np.asarray(tiempo, dtype=np.float64))
+
+
+class SensorVirtualOxigeno:
+    """EKF de un reactor alimentado en línea con la OUR del oxígeno disuelto.
+
+    El filtro se conserva entre llamadas: cada punto nuevo cuesta un predecir/corregir, sin
+    volver a recorrer la historia. `historial` guarda las últimas `capacidad` estimaciones.
+    """
+
+    def __init__(self, kla, biomasa_inicial, sustrato_inicial, mu_max_inicial,
+                 parametros: ParametrosSensor = PARAMETROS_SENSOR, c_saturacion=0.21, capacidad=1000):
+        self.kla = kla
+        self.c_saturacion = c_saturacion
+        self.filtro = FiltroKalmanBiomasa(1, biomasa_inicial, sustrato_inicial, mu_max_inicial, parametros)
+        self.historial = {clave: deque(maxlen=capacidad) for clave in ('tiempo', 'our', 'X', 'S', 'mu', 'desv_X')}
+        self.pasos = 0
+        self._anterior = None  # (tiempo, oxígeno) del último punto visto
+
+    @property
+    def ultimo_tiempo(self):
+        return -np.inf if self._anterior is None else self._anterior[0]
+
+    def actualizar(self, tiempo, oxigeno_pct):
+        """Asimilar los puntos (tiempo en h) posteriores al último visto; devuelve cuántos se asimilaron."""
+        tiempo = np.asarray(tiempo, dtype=np.float64)
+        oxigeno = np.asarray(oxigeno_pct, dtype=np.float64)
+        nuevos = (tiempo > self.ultimo_tiempo) & np.isfinite(oxigeno)
+        tiempo, oxigeno = tiempo[nuevos], oxigeno[nuevos]
+        if len(tiempo) == 0:
+            return 0
+        if self._anterior is not None:
+            # El punto anterior solo aporta la derivada del oxígeno del primero nuevo
+            tiempo = np.concatenate(([self._anterior[0]], tiempo))
+            oxigeno = np.concatenate(([self._anterior[1]], oxigeno))
+        self._anterior = (tiempo[-1], oxigeno[-1])
+        if len(tiempo) < 2:
+            return 0
+
+        our = our_desde_oxigeno(tiempo, oxigeno, self.kla, self.c_saturacion)
+        mediciones = np.full((1, len(SENALES)), np.nan)
+        for i in range(1, len(tiempo)):
+            self.filtro.predecir(tiempo[i] - tiempo[i - 1])
+            mediciones[0, SENALES.index('our')] = our[i]
+            self.filtro.corregir(mediciones)
+            estimado = self.filtro.estimaciones()
+            for clave, valor in (('tiempo', tiempo[i]), ('our', our[i]), ('X', estimado['X'][0]),
+                                 ('S', estimado['S'][0]), ('mu', estimado['mu'][0]), ('desv_X', estimado['desv_X'][0])):
+                self.historial[clave].append(valor)
+        self.pasos += len(tiempo) - 1
+        return len(tiempo) - 1
+
+
+def senales_sinteticas(series, parametros: ParametrosSensor = PARAMETROS_SENSOR, ruido=0.03, semilla=None):
+    """OUR, CER y base (instantes × señales) que producirían las series simuladas X y μ, con ruido relativo."""
+    rng = np.random.default_rng(semilla)
+    a, b = _coeficientes_senales(parametros)
+    senales = (np.asarray(series['mu'])[:, None] * a + b) * np.asarray(series['X'])[:, None]
+    return senales * (1 + ruido * rng.standard_normal(senales.shape))
@@ -0,0 +1,151 @@
+"""
+Detección de la fase exponencial por regresión de ln(biomasa) frente al tiempo.
+Todas las ventanas candidatas se evalúan a la vez con sumas acumuladas.
+"""
+
+from typing import Optional, TypedDict
+
+import numpy as np
+from scipy.stats import linregress
+
+from cache_resultados import memoizar
+
+
+class FaseExponencial(TypedDict, total=False):
+    detectada: bool
+    inicio: float
+    fin: float
+    duracion: float
+    velocidad_crecimiento: float
+    r_cuadrado: float
+    metodo: str
+
+
+def _sin_fase() -> FaseExponencial:
+    return {'detectada': False, 'inicio': 0, 'fin': 0, 'duracion': 0,
+            'velocidad_crecimiento': 0, 'r_cuadrado': 0}
+
+
+# --- 1. REGRESIÓN POR VENTANAS ---
+def regresion_ventanas(tiempo: np.ndarray, valores: np.ndarray, min_puntos: int = 3,
+                       max_puntos: Optional[int] = None):
+    """Pendiente y R² de la recta en cada ventana contigua [inicio, fin] de la serie.
+
+    Devuelve arreglos (inicio, fin, pendiente, r2) para todas las ventanas con entre
+    `min_puntos` y `max_puntos` puntos, calculados con sumas acumuladas en O(n²) sin bucles.
+    """
+    t = np.asarray(tiempo, dtype=np.float64)
+    y = np.asarray(valores, dtype=np.float64)
+    n = len(t)
+    max_puntos = n if max_puntos is None else min(max_puntos, n)
+    if n < min_puntos or max_puntos < min_puntos:
+        vacio = np.empty(0)
+        return vacio.astype(int), vacio.astype(int), vacio, vacio
+
+    # Centrar reduce la cancelación numérica en las sumas de cuadrados
+    t = t - t.mean()
+    y = y - y.mean()
+    acumular = lambda v: np.concatenate(([0.0], np.cumsum(v)))
+    st, sy, stt, sty, syy = acumular(t), acumular(y), acumular(t * t), acumular(t * y), acumular(y * y)
+
+    inicio, fin = np.triu_indices(n, k=min_puntos - 1)
+    puntos = fin - inicio + 1
+    dentro = puntos <= max_puntos
+    inicio, fin, puntos = inicio[dentro], fin[dentro], puntos[dentro].astype(np.float64)
+
+    def suma(acumulada):
+        return acumulada[fin + 1] - acumulada[inicio]
+
+    ct = suma(st)
+    cy = suma(sy)
+    sxx = suma(stt) - ct * ct / puntos
+    sxy = suma(sty) - ct * cy / puntos
+    syy_v = suma(syy) - cy * cy / puntos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pendiente = np.where(sxx > 0, sxy / sxx, 0.0)
+        r2 = np.where((sxx > 0) & (syy_v > 0), sxy * sxy / (sxx * syy_v), 0.0)
+    return inicio, fin, pendiente, r2
+
+
+# --- 2. DETECCIÓN DE FASES ---
+@memoizar()
+def detectar_fase_exponencial(tiempo: np.ndarray, biomasa: np.ndarray, min_r2: float = 0.85,
+                              mu_min: float = 0.01, mu_max: float = 2.0, max_puntos: int = 7) -> FaseExponencial:
+    """Mejor ventana (3 a `max_puntos` puntos) con R² alto y velocidad de crecimiento razonable."""
+    tiempo = np.asarray(tiempo, dtype=np.float64)
+    if len(tiempo) < 4:
+        return _sin_fase()
+
+    log_biomasa = np.log(np.asarray(biomasa, dtype=np.float64) + 1e-10)  # Evitar log(0)
+    inicio, fin, pendiente, r2 = regresion_ventanas(tiempo, log_biomasa, 3, min(max_puntos, len(tiempo) - 1))
+    validas = (r2 > min_r2) & (pendiente > mu_min) & (pendiente < mu_max)
+    if not validas.any():
+        return _sin_fase()
+
+    # Mayor R²; a igualdad, la ventana más corta y temprana
+    orden = np.lexsort((inicio, fin - inicio, -np.where(validas, r2, -np.inf)))
+    k = orden[0]
+    return {
+        'detectada': True,
+        'inicio': tiempo[inicio[k]],
+        'fin': tiempo[fin[k]],
+        'duracion': tiempo[fin[k]] - tiempo[inicio[k]],
+        'velocidad_crecimiento': pendiente[k],
+        'r_cuadrado': r2[k]
+    }
+
+
+def detectar_fase_exponencial_optimizada(tiempo, biomasa):
+    """Detecta la fase exponencial buscando la ventana con mejor R²."""
+    if len(tiempo) < 4:
+        return {'detectada': False, 'mu_max': 0, 'r2': 0, 'inicio': 0, 'fin': 0}
+
+    log_biomasa = np.log(biomasa + 1e-10) # Evitar log(0)
+    mejor_r2 = 0
+    resultado = {
+        'detectada': False, 'inicio': tiempo[0], 'fin': tiempo[-1],
+        'duracion': 0, 'velocidad_crecimiento': 0, 'r_cuadrado': 0
+    }
+
+    n_puntos = len(tiempo)
+    min_window = 3
+    max_window = max(4, int(n_puntos * 0.6))
+
+    for ventana in range(min_window, max_window + 1):
+        for i in range(n_puntos - ventana + 1):
+            t_subset = tiempo[i : i + ventana]
+            ln_x_subset = log_biomasa[i : i + ventana]
+            slope, intercept, r_value, _, _ = linregress(t_subset, ln_x_subset)
+            r_sq = r_value ** 2
+
+            if r_sq > mejor_r2 and r_sq > 0.90 and slope > 0:
+                mejor_r2 = r_sq
+                resultado.update({
+                    'detectada': True,
+                    'inicio': t_subset[0],
+                    'fin': t_subset[-1],
+                    'duracion': t_subset[-1] - t_subset[0],
+                    'velocidad_crecimiento': slope,
+                    'r_cuadrado': r_sq
+                })
+    return resultado
+
+
+def ajustar_fase_manual(tiempo: np.ndarray, biomasa: np.ndarray, inicio_idx: int, fin_idx: int):
+    """Pendiente (μ), intercepto y R² de ln(biomasa) en el rango de índices [inicio_idx, fin_idx]."""
+    tiempo_sel = np.asarray(tiempo, dtype=np.float64)[inicio_idx:fin_idx + 1]
+    ln_biomasa = np.log(np.asarray(biomasa, dtype=np.float64)[inicio_idx:fin_idx + 1] + 1e-10)
+    if len(tiempo_sel) < 2:
+        return None
+
+    x_mean = np.mean(tiempo_sel)
+    y_mean = np.mean(ln_biomasa)
+    denominador = np.sum((tiempo_sel - x_mean) ** 2)
+    if denominador <= 0:
+        return None
+    pendiente = np.sum((tiempo_sel - x_mean) * (ln_biomasa - y_mean)) / denominador
+    intercepto = y_mean - pendiente * x_mean
+    ss_tot = np.sum((ln_biomasa - y_mean) ** 2)
+    ss_res = np.sum((ln_biomasa - (pendiente * tiempo_sel + intercepto)) ** 2)
+    r2 = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+    return float(pendiente), float(intercepto), float(r2)
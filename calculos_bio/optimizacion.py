@@ -0,0 +1,155 @@
+"""
+Optimización de condiciones de proceso a partir de experimentos históricos.
+Un proceso gaussiano ajustado a los experimentos guardados (agitación, aireación y temperatura)
+propone un lote de condiciones por mejora esperada dentro de la caja de parámetros, con la
+predicción y su incertidumbre.
+"""
+
+import copy
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.stats import qmc
+
+from calculos_bio.sustituto import SustitutoGP, mejora_esperada
+
+# Objetivo -> (clave en los resultados, signo para maximizar)
+OBJETIVOS = {
+    "Maximizar Rendimiento Biomasa": ('rendimiento_biomasa', 1.0),
+    "Maximizar Rendimiento Producto": ('rendimiento_producto', 1.0),
+    "Maximizar Productividad": ('productividad_biomasa', 1.0),
+    "Minimizar Tiempo Cultivo": ('tiempo_cultivo', -1.0),
+}
+PARAMETROS_PROCESO = ('agitacion', 'aireacion', 'temperatura')
+LIMITES_POR_DEFECTO = {'agitacion': (200.0, 800.0), 'aireacion': (0.5, 5.0), 'temperatura': (25.0, 40.0)}
+MIN_EXPERIMENTOS = 3
+N_CANDIDATOS = 4096
+N_REFINADOS = 4
+
+
+def _resultados(exp: Dict[str, Any]) -> Dict[str, Any]:
+    """Los experimentos guardados con parámetros del biorreactor llevan los resultados en el nivel superior."""
+    return exp.get('resultados', exp)
+
+
+def valores_objetivo(experimentos: Sequence[Dict[str, Any]], objetivo: str) -> np.ndarray:
+    """Puntuación (mayor es mejor) de cada experimento para el objetivo; NaN si no tiene resultados."""
+    clave, signo = OBJETIVOS.get(objetivo, OBJETIVOS["Maximizar Rendimiento Biomasa"])
+    return np.array([signo * _resultados(exp).get(clave, np.nan) for exp in experimentos], dtype=np.float64)
+
+
+def matriz_objetivos(experimentos: Sequence[Dict[str, Any]], objetivos: Sequence[str]) -> np.ndarray:
+    """Puntuaciones (experimentos × objetivos) para comparar varios objetivos a la vez."""
+    return np.column_stack([valores_objetivo(experimentos, objetivo) for objetivo in objetivos]).reshape(
+        len(experimentos), len(objetivos))
+
+
+def datos_entrenamiento(experimentos: Sequence[Dict[str, Any]], objetivo: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(índices, parámetros de proceso, puntuación) de los experimentos con condiciones y resultado completos."""
+    puntuacion = valores_objetivo(experimentos, objetivo)
+    parametros = np.array([[exp.get(p, np.nan) for p in PARAMETROS_PROCESO] for exp in experimentos],
+                          dtype=np.float64).reshape(len(experimentos), len(PARAMETROS_PROCESO))
+    validos = np.flatnonzero(np.isfinite(puntuacion) & np.isfinite(parametros).all(axis=1))
+    return validos, parametros[validos], puntuacion[validos]
+
+
+def _maximo_predicho(sustituto: SustitutoGP, mejor: float, candidatos: np.ndarray) -> Dict[str, Any]:
+    """Condición con la mayor media predicha (explotación), refinada desde los mejores candidatos."""
+    limites = [(0.0, 1.0)] * candidatos.shape[1]
+    inicios = candidatos[np.argsort(sustituto.predecir(candidatos)[0])[-N_REFINADOS:]]
+    refinados = [minimize(lambda x: -sustituto.predecir(x)[0][0], x0, method='L-BFGS-B', bounds=limites) for x0 in inicios]
+    x = min(refinados, key=lambda r: r.fun).x
+    media, desv = sustituto.predecir(x)
+    ei, pi = mejora_esperada(media, desv, mejor)
+    return {'x': x, 'media': float(media[0]), 'desv': float(desv[0]), 'ei': float(ei[0]), 'pi': float(pi[0])}
+
+
+def _proponer_lote(sustituto: SustitutoGP, mejor: float, n_lote: int, candidatos: np.ndarray) -> List[Dict[str, float]]:
+    """Lote por "kriging believer": tras elegir cada punto se agrega su media predicha como dato ficticio.
+
+    La EI se evalúa sobre todos los candidatos Sobol a la vez y los mejores se refinan con L-BFGS-B.
+    """
+    ficticio = copy.deepcopy(sustituto)
+    ficticio._n_ajuste = np.inf  # Los datos ficticios solo extienden el factor, sin reajustar hiperparámetros
+    limites = [(0.0, 1.0)] * candidatos.shape[1]
+
+    def menos_ei(x):
+        media, desv = ficticio.predecir(x)
+        return -mejora_esperada(media, desv, mejor)[0][0]
+
+    lote = []
+    for _ in range(n_lote):
+        media, desv = ficticio.predecir(candidatos)
+        ei, _ = mejora_esperada(media, desv, mejor)
+        inicios = candidatos[np.argsort(ei)[-N_REFINADOS:]]
+        refinados = [minimize(menos_ei, x0, method='L-BFGS-B', bounds=limites) for x0 in inicios]
+        x = min(refinados, key=lambda r: r.fun).x
+
+        media, desv = sustituto.predecir(x)
+        ei, pi = mejora_esperada(media, desv, mejor)
+        lote.append({'x': x, 'media': float(media[0]), 'desv': float(desv[0]), 'ei': float(ei[0]), 'pi': float(pi[0])})
+        ficticio.actualizar(np.vstack((ficticio.X, x)), np.append(ficticio.y, ficticio.predecir(x)[0]))
+    return lote
+
+
+def optimizar_parametros(experimentos: Sequence[Dict[str, Any]], objetivo: str,
+                         limites: Optional[Dict[str, Tuple[float, float]]] = None, n_lote: int = 4,
+                         sustituto: Optional[SustitutoGP] = None,
+                         rng: Optional[np.random.Generator] = None) -> Optional[Dict[str, Any]]:
+    """Recomendar condiciones de proceso con un GP ajustado a los experimentos y mejora esperada.
+
+    `sustituto` permite conservar el modelo entre llamadas: si solo se agregaron experimentos,
+    el ajuste se extiende en lugar de rehacerse. Devuelve None si hay menos de MIN_EXPERIMENTOS
+    experimentos con agitación, aireación, temperatura y resultado.
+    """
+    limites = {**LIMITES_POR_DEFECTO, **(limites or {})}
+    indices, parametros, puntuacion = datos_entrenamiento(experimentos, objetivo)
+    if len(indices) < MIN_EXPERIMENTOS:
+        return None
+
+    rng = rng or np.random.default_rng()
+    bajo = np.array([limites[p][0] for p in PARAMETROS_PROCESO], dtype=np.float64)
+    alto = np.array([limites[p][1] for p in PARAMETROS_PROCESO], dtype=np.float64)
+    rango = np.where(alto > bajo, alto - bajo, 1.0)
+    sustituto = sustituto if sustituto is not None else SustitutoGP()
+    sustituto.actualizar((parametros - bajo) / rango, puntuacion)
+
+    mejor = float(puntuacion.max())
+    candidatos = qmc.Sobol(len(PARAMETROS_PROCESO), seed=rng).random(N_CANDIDATOS)
+    primera = _maximo_predicho(sustituto, mejor, candidatos)
+    lote = _proponer_lote(sustituto, mejor, n_lote, candidatos)
+    for propuesta in [primera] + lote:
+        propuesta.update(zip(PARAMETROS_PROCESO, bajo + propuesta.pop('x') * rango))
+
+    _, signo = OBJETIVOS.get(objetivo, OBJETIVOS["Maximizar Rendimiento Biomasa"])
+    mejora = (primera['media'] - mejor) / abs(mejor) * 100 if mejor != 0 else 0.0
+    incertidumbre = primera['desv'] / abs(mejor) * 100 if mejor != 0 else 0.0
+
+    recomendaciones = [
+        f"Ejecutar el lote de {len(lote)} experimentos sugerido (mejora esperada) y guardar cada uno con sus parámetros del biorreactor",
+    ]
+    if primera['pi'] < 0.5:
+        recomendaciones.append("Es poco probable superar el mejor experimento con lo ya explorado: el lote sugerido explora zonas con pocos datos")
+    if primera['desv'] > abs(primera['media'] - mejor):
+        recomendaciones.append("La incertidumbre supera la mejora predicha: agregar experimentos antes de fijar condiciones")
+    if len(indices) < 3 * len(PARAMETROS_PROCESO):
+        recomendaciones.append(f"Con {len(indices)} experimentos el modelo es preliminar; se recomiendan al menos "
+                               f"{3 * len(PARAMETROS_PROCESO)}")
+
+    return {
+        'mejor_experimento': int(indices[np.argmax(puntuacion)]),
+        'mejor_observado': signo * mejor,
+        'rpm_recomendado': primera['agitacion'],
+        'vvm_recomendado': primera['aireacion'],
+        'temp_recomendada': primera['temperatura'],
+        'prediccion': signo * primera['media'],
+        'desviacion': primera['desv'],
+        'mejora': mejora,
+        'incertidumbre': incertidumbre,
+        'confianza': primera['pi'] * 100,  # Probabilidad de mejorar el mejor experimento
+        'lote': [{**p, 'media': signo * p['media']} for p in lote],
+        'n_experimentos': len(indices),
+        'longitud_escala': sustituto.longitud,
+        'recomendaciones': recomendaciones,
+    }
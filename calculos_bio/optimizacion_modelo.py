@@ -0,0 +1,247 @@
+"""
+Optimización de condiciones de operación contra el simulador cinético.
+Las condiciones (caudal de alimentación, sustrato inicial, temperatura, pH y tiempo de cosecha)
+se traducen en μmax con modelos cardinales de temperatura y pH; cada generación de evolución
+diferencial se simula como un solo conjunto vectorizado y las evaluaciones ya hechas se
+reutilizan desde una caché por condición cuantizada.
+"""
+
+import time
+from itertools import islice
+from typing import Dict, Optional, Tuple, TypedDict
+
+import numpy as np
+from scipy.optimize import differential_evolution
+
+from cache_resultados import huella
+from calculos_bio.control import derivadas_fed_batch
+from calculos_bio.optimizacion import OBJETIVOS
+
+CONDICIONES = ('caudal', 'sustrato_inicial', 'temperatura', 'ph', 'tiempo_cosecha')
+NOMBRES_CONDICIONES = {
+    'caudal': 'Caudal de alimentación (L/h)',
+    'sustrato_inicial': 'Sustrato inicial (g/L)',
+    'temperatura': 'Temperatura (°C)',
+    'ph': 'pH',
+    'tiempo_cosecha': 'Tiempo de cosecha (h)',
+}
+LIMITES_CONDICIONES = {
+    'caudal': (0.0, 0.05), 'sustrato_inicial': (5.0, 80.0), 'temperatura': (20.0, 40.0),
+    'ph': (5.0, 9.0), 'tiempo_cosecha': (12.0, 96.0),
+}
+# Resolución de la caché de evaluaciones: condiciones más cercanas que esto se consideran iguales
+RESOLUCION_CACHE = np.array([1e-4, 0.05, 0.01, 0.005, 0.05])
+PASO_INTEGRACION = 0.25  # h
+CONVERSION_MINIMA = 0.95  # Fracción del sustrato consumida para "Minimizar Tiempo Cultivo"
+MAX_EVALUACIONES = 200_000  # Condiciones conservadas en la caché (se descartan las más antiguas)
+
+
+class ModeloProceso(TypedDict):
+    mu_opt: float     # h⁻¹ a temperatura y pH óptimos
+    ks: float
+    yxs: float
+    ms: float
+    alpha: float
+    beta: float
+    yps: float        # g P / g S
+    kp: float         # g/L
+    sf: float         # g/L en la alimentación
+    x0: float         # g/L inoculados
+    v0: float         # L iniciales
+    v_max: float      # L
+    t_min: float
+    t_opt: float
+    t_max: float
+    ph_min: float
+    ph_opt: float
+    ph_max: float
+
+
+# Pseudomonas reptilivora: pH 4.0-9.4 con óptimo 7, crecimiento óptimo cerca de 30°C
+MODELO_PROCESO: ModeloProceso = {
+    'mu_opt': 0.347, 'ks': 21.1, 'yxs': 0.13, 'ms': 0.01, 'alpha': 0.5, 'beta': 0.1, 'yps': 0.5, 'kp': 2.0,
+    'sf': 300.0, 'x0': 0.2, 'v0': 1.0, 'v_max': 2.0,
+    't_min': 10.0, 't_opt': 30.0, 't_max': 40.0, 'ph_min': 4.0, 'ph_opt': 7.0, 'ph_max': 9.4,
+}
+
+
+# --- 1. CONDICIONES -> PARÁMETROS CINÉTICOS ---
+def factor_temperatura(T, modelo: ModeloProceso = MODELO_PROCESO):
+    """Modelo cardinal de temperatura con inflexión (CTMI, Rosso et al.); 0 fuera de [t_min, t_max]."""
+    T = np.asarray(T, dtype=np.float64)
+    t_min, t_opt, t_max = modelo['t_min'], modelo['t_opt'], modelo['t_max']
+    numerador = (T - t_max) * (T - t_min) ** 2
+    denominador = (t_opt - t_min) * ((t_opt - t_min) * (T - t_opt) - (t_opt - t_max) * (t_opt + t_min - 2 * T))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factor = numerador / denominador
+    return np.where((T > t_min) & (T < t_max), np.clip(factor, 0.0, 1.0), 0.0)
+
+
+def factor_ph(ph, modelo: ModeloProceso = MODELO_PROCESO):
+    """Modelo cardinal de pH (CPM); 0 fuera de [ph_min, ph_max]."""
+    ph = np.asarray(ph, dtype=np.float64)
+    producto = (ph - modelo['ph_min']) * (ph - modelo['ph_max'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factor = producto / (producto - (ph - modelo['ph_opt']) ** 2)
+    return np.where((ph > modelo['ph_min']) & (ph < modelo['ph_max']), np.clip(factor, 0.0, 1.0), 0.0)
+
+
+def mu_max_condiciones(temperatura, ph, modelo: ModeloProceso = MODELO_PROCESO):
+    return modelo['mu_opt'] * factor_temperatura(temperatura, modelo) * factor_ph(ph, modelo)
+
+
+# --- 2. SIMULACIÓN POR CONJUNTOS ---
+def simular_conjunto(condiciones, modelo: ModeloProceso = MODELO_PROCESO, trayectoria=False):
+    """Simular todas las condiciones (candidatos × 5) a la vez con RK4 de paso fijo.
+
+    Devuelve el estado [X, S, P, V] al tiempo de cosecha de cada candidato (interpolado entre
+    pasos); con trayectoria=True, además los tiempos y estados de todos los pasos.
+    """
+    condiciones = np.atleast_2d(np.asarray(condiciones, dtype=np.float64))
+    caudal, s0, temperatura, ph, cosecha = condiciones.T
+    p = {**modelo, 'mu_max': mu_max_condiciones(temperatura, ph, modelo)}
+    n_pasos = int(np.ceil(cosecha.max() / PASO_INTEGRACION))
+    h = PASO_INTEGRACION
+
+    x = np.column_stack((np.full(len(condiciones), modelo['x0']), s0,
+                         np.zeros(len(condiciones)), np.full(len(condiciones), modelo['v0'])))
+    estados = np.empty((n_pasos + 1,) + x.shape)
+    estados[0] = x
+    for k in range(n_pasos):
+        u = np.where(x[:, 3] < modelo['v_max'], caudal, 0.0)  # La alimentación se corta al volumen máximo
+        k1 = derivadas_fed_batch(x, u, p)
+        k2 = derivadas_fed_batch(x + h / 2 * k1, u, p)
+        k3 = derivadas_fed_batch(x + h / 2 * k2, u, p)
+        k4 = derivadas_fed_batch(x + h * k3, u, p)
+        x = x + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        x[:, 1] = np.maximum(x[:, 1], 0.0)
+        estados[k + 1] = x
+
+    posicion = cosecha / h
+    i = np.minimum(np.floor(posicion).astype(np.int64), n_pasos - 1)
+    fraccion = (posicion - i)[:, None]
+    filas = np.arange(len(condiciones))
+    final = estados[i, filas] * (1 - fraccion) + estados[i + 1, filas] * fraccion
+    if trayectoria:
+        return final, np.arange(n_pasos + 1) * h, estados
+    return final
+
+
+def metricas_conjunto(condiciones, final, modelo: ModeloProceso = MODELO_PROCESO) -> Dict[str, np.ndarray]:
+    """Métricas con las mismas claves que el análisis cinético (rendimientos, productividad, tiempo).
+
+    Los rendimientos se refieren al sustrato suministrado (inicial + alimentado) y no pueden
+    superar Yp/s porque el modelo carga la formación de producto al sustrato. La productividad
+    de biomasa es la formación neta por volumen y tiempo, (X·V − X0·V0)/(V·t), que en lote
+    coincide con (Xf − X0)/t del análisis cinético.
+    """
+    condiciones = np.atleast_2d(condiciones)
+    s0, cosecha = condiciones[:, 1], condiciones[:, 4]
+    X, S, P, V = final.T
+    suministrado = s0 * modelo['v0'] + modelo['sf'] * (V - modelo['v0'])
+    consumido = suministrado - S * V
+    biomasa_formada = X * V - modelo['x0'] * modelo['v0']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'rendimiento_biomasa': np.where(suministrado > 0, biomasa_formada / suministrado, 0.0),
+            'rendimiento_producto': np.where(suministrado > 0, P * V / suministrado, 0.0),
+            'productividad_biomasa': biomasa_formada / (V * cosecha),
+            'tiempo_cultivo': cosecha,
+            'conversion': np.where(suministrado > 0, consumido / suministrado, 0.0),
+            'biomasa_final': X, 'sustrato_final': S, 'producto_final': P, 'volumen_final': V,
+        }
+
+
+def puntuacion_objetivo(metricas: Dict[str, np.ndarray], objetivo: str) -> np.ndarray:
+    """Puntuación (mayor es mejor); minimizar tiempo exige consumir CONVERSION_MINIMA del sustrato."""
+    clave, signo = OBJETIVOS.get(objetivo, OBJETIVOS["Maximizar Rendimiento Biomasa"])
+    puntuacion = signo * metricas[clave]
+    if clave == 'tiempo_cultivo':
+        puntuacion = puntuacion - 1e3 * np.maximum(CONVERSION_MINIMA - metricas['conversion'], 0.0)
+    return puntuacion
+
+
+# --- 3. CACHÉ DE EVALUACIONES Y EVOLUCIÓN DIFERENCIAL ---
+class CacheEvaluaciones:
+    """Estado de cosecha por condición cuantizada; sirve para cualquier objetivo del mismo modelo."""
+
+    def __init__(self):
+        self._estados = {}
+        self.aciertos = 0
+        self.simuladas = 0
+
+    def __len__(self):
+        return len(self._estados)
+
+    def evaluar(self, condiciones, modelo: ModeloProceso = MODELO_PROCESO):
+        """Estados finales (candidatos × 4); solo se simulan en lote las condiciones nuevas."""
+        condiciones = np.atleast_2d(condiciones)
+        prefijo = huella(modelo).encode()
+        claves = [prefijo + fila.tobytes() for fila in np.round(condiciones / RESOLUCION_CACHE).astype(np.int64)]
+        faltan = [i for i, clave in enumerate(claves) if clave not in self._estados]
+        if faltan:
+            for i, estado in zip(faltan, simular_conjunto(condiciones[faltan], modelo)):
+                self._estados[claves[i]] = estado
+        estados = np.array([self._estados[clave] for clave in claves])
+        for antigua in list(islice(self._estados, max(0, len(self._estados) - MAX_EVALUACIONES))):
+            del self._estados[antigua]
+        self.aciertos += len(claves) - len(faltan)
+        self.simuladas += len(faltan)
+        return estados
+
+
+def puntuaciones_condiciones(condiciones, objetivos, modelo: ModeloProceso = MODELO_PROCESO,
+                             cache: Optional[CacheEvaluaciones] = None):
+    """Puntuaciones (candidatos × objetivos) y métricas de cada condición, con una sola simulación en lote."""
+    condiciones = np.atleast_2d(np.asarray(condiciones, dtype=np.float64))
+    final = cache.evaluar(condiciones, modelo) if cache is not None else simular_conjunto(condiciones, modelo)
+    metricas = metricas_conjunto(condiciones, final, modelo)
+    return np.column_stack([puntuacion_objetivo(metricas, objetivo) for objetivo in objetivos]), metricas
+
+
+def optimizar_condiciones(objetivo: str, limites: Optional[Dict[str, Tuple[float, float]]] = None,
+                          modelo: ModeloProceso = MODELO_PROCESO, poblacion=15, generaciones=60, semilla=0,
+                          cache: Optional[CacheEvaluaciones] = None) -> Dict:
+    """Evolución diferencial (población completa por llamada, vectorizada) sobre las condiciones de operación.
+
+    Con una `cache` conservada entre llamadas, las condiciones ya simuladas (para cualquier objetivo)
+    no se vuelven a integrar.
+    """
+    limites = {**LIMITES_CONDICIONES, **(limites or {})}
+    cotas = [limites[c] for c in CONDICIONES]
+    cache = cache if cache is not None else CacheEvaluaciones()
+    aciertos_previos, simuladas_previas = cache.aciertos, cache.simuladas
+    convergencia = []
+
+    def costo(poblacion_t):
+        condiciones = poblacion_t.T  # differential_evolution vectorizado entrega (dimensiones × candidatos)
+        final = cache.evaluar(condiciones, modelo)
+        return -puntuacion_objetivo(metricas_conjunto(condiciones, final, modelo), objetivo)
+
+    def registrar(intermediate_result):
+        convergencia.append(-intermediate_result.fun)
+
+    inicio = time.perf_counter()
+    resultado = differential_evolution(costo, cotas, popsize=poblacion, maxiter=generaciones, rng=semilla,
+                                       vectorized=True, updating='deferred', polish=False, tol=1e-6,
+                                       callback=registrar)
+    segundos = time.perf_counter() - inicio
+
+    mejor = resultado.x
+    final, tiempos, estados = simular_conjunto(mejor, modelo, trayectoria=True)
+    metricas = {clave: float(valor[0]) for clave, valor in metricas_conjunto(mejor, final, modelo).items()}
+    visibles = tiempos <= mejor[4] + PASO_INTEGRACION
+    return {
+        'condiciones': dict(zip(CONDICIONES, map(float, mejor))),
+        'mu_max': float(mu_max_condiciones(mejor[2], mejor[3], modelo)),
+        'puntuacion': float(-resultado.fun),
+        'metricas': metricas,
+        'convergencia': np.array(convergencia),
+        'trayectoria': {'tiempo': tiempos[visibles], 'X': estados[visibles, 0, 0], 'S': estados[visibles, 0, 1],
+                        'P': estados[visibles, 0, 2], 'V': estados[visibles, 0, 3]},
+        'generaciones': int(resultado.nit),
+        'evaluaciones': (cache.simuladas - simuladas_previas) + (cache.aciertos - aciertos_previos),
+        'simuladas': cache.simuladas - simuladas_previas,
+        'aciertos_cache': cache.aciertos - aciertos_previos,
+        'segundos': segundos,
+    }
@@ -0,0 +1,184 @@
+"""
+Optimización multiobjetivo: frente de Pareto sobre corridas simuladas o históricas.
+Las puntuaciones siguen la convención de los optimizadores (mayor es mejor, los objetivos a
+minimizar van con signo negativo); el ordenamiento no dominado recorre los puntos una vez en
+orden lexicográfico y ubica cada uno en su frente por bisección.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.stats import qmc
+
+from calculos_bio.optimizacion_modelo import (
+    CONDICIONES, LIMITES_CONDICIONES, MODELO_PROCESO, CacheEvaluaciones, ModeloProceso, puntuaciones_condiciones
+)
+
+
+# --- 1. ORDENAMIENTO NO DOMINADO ---
+def _frentes_2d(orden):
+    """Con f1 decreciente, un punto pertenece al primer frente cuyo último f2 es menor que el suyo."""
+    ultimos = []  # −f2 del último punto de cada frente: creciente de un frente al siguiente
+    rangos = np.empty(len(orden), dtype=np.int64)
+    for i, f2 in enumerate(orden[:, 1].tolist()):
+        k = bisect_right(ultimos, -f2)
+        if k == len(ultimos):
+            ultimos.append(-f2)
+        else:
+            ultimos[k] = -f2
+        rangos[i] = k
+    return rangos
+
+
+def _dominado_escalera(escalera, f2, f3):
+    """¿Algún punto de la escalera (f2 creciente, f3 decreciente) tiene f2 y f3 mayores o iguales?"""
+    f2s, f3s_neg = escalera
+    i = bisect_left(f2s, f2)
+    return i < len(f2s) and f3s_neg[i] <= -f3
+
+
+def _insertar_escalera(escalera, f2, f3):
+    """Agregar (f2, f3) quitando los escalones que domina en la proyección."""
+    f2s, f3s_neg = escalera
+    j = bisect_right(f2s, f2)
+    k = bisect_left(f3s_neg, -f3, 0, j)
+    f2s[k:j] = [f2]
+    f3s_neg[k:j] = [-f3]
+
+
+def _frentes_3d(orden):
+    """Como en 2D, pero cada frente es una escalera en (f2, f3) y el frente se busca por bisección.
+
+    Si un punto está dominado por el frente k+1 también lo está por el k, así que los frentes que
+    lo dominan forman un prefijo: O(log² N) por punto.
+    """
+    frentes = []
+    rangos = np.empty(len(orden), dtype=np.int64)
+    for i, (f2, f3) in enumerate(orden[:, 1:].tolist()):
+        bajo, alto = 0, len(frentes)
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if _dominado_escalera(frentes[medio], f2, f3):
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo == len(frentes):
+            frentes.append(([], []))
+        _insertar_escalera(frentes[bajo], f2, f3)
+        rangos[i] = bajo
+    return rangos
+
+
+def _frentes_deb(orden):
+    """Ordenamiento rápido de Deb (NSGA-II) con la matriz de dominancia completa: O(M·N²)."""
+    domina = ((orden[:, None, :] >= orden[None, :, :]).all(axis=2)
+              & (orden[:, None, :] > orden[None, :, :]).any(axis=2))
+    cuenta = domina.sum(axis=0)
+    rangos = np.full(len(orden), -1, dtype=np.int64)
+    frente, k = np.flatnonzero(cuenta == 0), 0
+    while frente.size:
+        rangos[frente] = k
+        cuenta = cuenta - domina[frente].sum(axis=0)
+        frente, k = np.flatnonzero((cuenta == 0) & (rangos < 0)), k + 1
+    return rangos
+
+
+def ordenamiento_no_dominado(puntuaciones) -> np.ndarray:
+    """Número de frente (0 = no dominado) de cada fila de puntuaciones (puntos × objetivos), mayor es mejor.
+
+    Los puntos repetidos comparten frente. Con 2 y 3 objetivos cuesta O(N log N) y O(N log² N);
+    con más, se usa el ordenamiento de Deb.
+    """
+    puntuaciones = np.asarray(puntuaciones, dtype=np.float64)
+    if len(puntuaciones) == 0:
+        return np.empty(0, dtype=np.int64)
+    unicos, inversa = np.unique(puntuaciones, axis=0, return_inverse=True)
+    orden = unicos[::-1]  # Lexicográfico decreciente: nadie es dominado por un punto posterior
+    m = orden.shape[1]
+    if m == 1:
+        rangos = np.arange(len(orden))
+    elif m == 2:
+        rangos = _frentes_2d(orden)
+    elif m == 3:
+        rangos = _frentes_3d(orden)
+    else:
+        rangos = _frentes_deb(orden)
+    return rangos[::-1][inversa.reshape(-1)]
+
+
+def distancia_hacinamiento(puntuaciones) -> np.ndarray:
+    """Distancia de hacinamiento de NSGA-II dentro de un frente; los extremos de cada objetivo valen inf."""
+    puntuaciones = np.asarray(puntuaciones, dtype=np.float64)
+    n, m = puntuaciones.shape
+    distancia = np.zeros(n)
+    if n <= 2:
+        return np.full(n, np.inf)
+    for j in range(m):
+        orden = np.argsort(puntuaciones[:, j], kind='stable')
+        valores = puntuaciones[orden, j]
+        rango = valores[-1] - valores[0]
+        distancia[orden[[0, -1]]] = np.inf
+        if rango > 0:
+            distancia[orden[1:-1]] += (valores[2:] - valores[:-2]) / rango
+    return distancia
+
+
+# --- 2. FRENTE INCREMENTAL ---
+class FrentePareto:
+    """Soluciones no dominadas de todo lo agregado hasta ahora, con sus atributos por columna.
+
+    Un punto dominado nunca vuelve al frente, así que cada lote solo se compara con el frente
+    vigente y no con todo el historial.
+    """
+
+    def __init__(self, objetivos: Sequence[str]):
+        self.objetivos = tuple(objetivos)
+        self.puntuaciones = np.empty((0, len(self.objetivos)))
+        self.atributos: Dict[str, np.ndarray] = {}
+        self.evaluadas = 0
+
+    def __len__(self):
+        return len(self.puntuaciones)
+
+    def agregar(self, puntuaciones, atributos: Dict[str, np.ndarray]) -> int:
+        """Fusionar un lote (puntos × objetivos) con el frente; devuelve cuántos puntos del lote entraron."""
+        puntuaciones = np.asarray(puntuaciones, dtype=np.float64).reshape(-1, len(self.objetivos))
+        self.evaluadas += len(puntuaciones)
+        validas = np.isfinite(puntuaciones).all(axis=1)
+        nuevas = {clave: np.asarray(valor)[validas] for clave, valor in atributos.items()}
+        todas = np.vstack((self.puntuaciones, puntuaciones[validas]))
+        en_frente = ordenamiento_no_dominado(todas) == 0
+
+        previas = len(self.puntuaciones)
+        self.puntuaciones = todas[en_frente]
+        self.atributos = {clave: np.concatenate((self.atributos[clave], valor))[en_frente] if previas else valor[en_frente]
+                          for clave, valor in nuevas.items()}
+        return int(en_frente[previas:].sum())
+
+    def tabla(self) -> Dict[str, np.ndarray]:
+        """Atributos del frente ordenados por el primer objetivo, con su distancia de hacinamiento."""
+        orden = np.argsort(-self.puntuaciones[:, 0], kind='stable')
+        return {**{clave: valor[orden] for clave, valor in self.atributos.items()},
+                'hacinamiento': distancia_hacinamiento(self.puntuaciones)[orden]}
+
+
+# --- 3. EXPLORACIÓN CON EL SIMULADOR ---
+def explorar_frente(frente: FrentePareto, n: int = 1024, limites: Optional[Dict[str, Tuple[float, float]]] = None,
+                    modelo: ModeloProceso = MODELO_PROCESO, cache: Optional[CacheEvaluaciones] = None,
+                    semilla: int = 0) -> int:
+    """Simular n condiciones más de la secuencia Sobol y fusionarlas con el frente.
+
+    La secuencia continúa donde quedó la llamada anterior (según `frente.evaluadas`), así que
+    cada lote cubre puntos nuevos de la caja de condiciones.
+    """
+    limites = {**LIMITES_CONDICIONES, **(limites or {})}
+    bajo = np.array([limites[c][0] for c in CONDICIONES], dtype=np.float64)
+    alto = np.array([limites[c][1] for c in CONDICIONES], dtype=np.float64)
+    sobol = qmc.Sobol(len(CONDICIONES), seed=semilla)
+    if frente.evaluadas:
+        sobol.fast_forward(frente.evaluadas)
+    condiciones = bajo + sobol.random(n) * (alto - bajo)
+
+    puntuaciones, metricas = puntuaciones_condiciones(condiciones, frente.objetivos, modelo, cache)
+    return frente.agregar(puntuaciones, {**dict(zip(CONDICIONES, condiciones.T)), **metricas})
@@ -0,0 +1,105 @@
+"""
+Modelo sustituto de proceso gaussiano (kernel RBF) y mejora esperada.
+Las entradas se normalizan a la caja de parámetros y la salida se estandariza; al agregar
+experimentos el factor de Cholesky se extiende por bloques en lugar de refactorizarse, y
+los hiperparámetros se reajustan solo cuando los datos crecen lo suficiente.
+"""
+
+import numpy as np
+from scipy.linalg import cho_solve, solve_triangular
+from scipy.special import ndtr
+
+LONGITUDES = np.geomspace(0.05, 3.0, 14)     # Escala del kernel en la caja normalizada [0, 1]^d
+RUIDOS = np.array([1e-4, 1e-3, 1e-2, 1e-1])  # Varianza de ruido relativa a la de la salida
+CRECIMIENTO_REAJUSTE = 1.25                  # Reajustar hiperparámetros al crecer los datos un 25%
+
+
+def kernel_rbf(a, b, longitud):
+    d2 = np.sum(a * a, axis=1)[:, None] + np.sum(b * b, axis=1)[None, :] - 2.0 * a @ b.T
+    return np.exp(-0.5 * np.maximum(d2, 0.0) / longitud ** 2)
+
+
+def _log_verosimilitud(X, y, longitud, ruido):
+    """Log-verosimilitud marginal del GP (salida estandarizada); -inf si la matriz no es definida positiva."""
+    K = kernel_rbf(X, X, longitud) + ruido * np.eye(len(X))
+    try:
+        L = np.linalg.cholesky(K)
+    except np.linalg.LinAlgError:
+        return -np.inf
+    alfa = cho_solve((L, True), y)
+    return -0.5 * y @ alfa - np.log(np.diag(L)).sum() - 0.5 * len(X) * np.log(2 * np.pi)
+
+
+class SustitutoGP:
+    """GP sobre entradas en [0, 1]^d; `actualizar` reutiliza la factorización previa si solo hay filas nuevas."""
+
+    def __init__(self):
+        self.X = np.empty((0, 0))
+        self.y = np.empty(0)
+        self.longitud = 0.3
+        self.ruido = 1e-2
+        self._L = None
+        self._n_ajuste = 0
+        self.refactorizaciones = 0
+        self.extensiones = 0
+
+    def __len__(self):
+        return len(self.y)
+
+    def actualizar(self, X, y):
+        """Ajustar a (X, y); si X extiende los datos anteriores se agregan filas al factor de Cholesky."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n = len(self.y)
+        prefijo = (0 < n <= len(y) and X.shape[1] == self.X.shape[1]
+                   and np.array_equal(X[:n], self.X) and np.array_equal(y[:n], self.y))
+        if prefijo and len(y) == n:
+            return
+        self.X, self.y = X, y
+        self._media, self._escala = y.mean(), (y.std() if y.std() > 0 else 1.0)
+        if prefijo and len(y) < CRECIMIENTO_REAJUSTE * self._n_ajuste:
+            self._extender(n)
+        else:
+            self._ajustar_hiperparametros()
+        self._alfa = cho_solve((self._L, True), self._y_std())
+
+    def _y_std(self):
+        return (self.y - self._media) / self._escala
+
+    def _ajustar_hiperparametros(self):
+        """Máxima verosimilitud marginal sobre una rejilla de longitud × ruido, luego factorizar."""
+        y = self._y_std()
+        mejor = max(((l, r) for l in LONGITUDES for r in RUIDOS),
+                    key=lambda lr: _log_verosimilitud(self.X, y, *lr))
+        self.longitud, self.ruido = mejor
+        self._L = np.linalg.cholesky(kernel_rbf(self.X, self.X, self.longitud) + self.ruido * np.eye(len(self.X)))
+        self._n_ajuste = len(self.y)
+        self.refactorizaciones += 1
+
+    def _extender(self, n):
+        """Bloque de Cholesky para las filas nuevas: O(n²·m) en lugar de O((n+m)³)."""
+        nuevos = self.X[n:]
+        B = solve_triangular(self._L, kernel_rbf(self.X[:n], nuevos, self.longitud), lower=True)
+        C = kernel_rbf(nuevos, nuevos, self.longitud) + self.ruido * np.eye(len(nuevos)) - B.T @ B
+        L = np.zeros((len(self.X), len(self.X)))
+        L[:n, :n] = self._L
+        L[n:, :n] = B.T
+        L[n:, n:] = np.linalg.cholesky(C)
+        self._L = L
+        self.extensiones += 1
+
+    def predecir(self, X):
+        """Media y desviación estándar (escala original) en los puntos X."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        Ks = kernel_rbf(X, self.X, self.longitud)
+        media = Ks @ self._alfa
+        V = solve_triangular(self._L, Ks.T, lower=True)
+        varianza = np.maximum(1.0 - np.sum(V * V, axis=0), 1e-12)
+        return self._media + self._escala * media, self._escala * np.sqrt(varianza)
+
+
+def mejora_esperada(media, desv, mejor, xi=0.0):
+    """EI (maximización) y probabilidad de mejora, vectorizadas sobre los candidatos."""
+    z = (media - mejor - xi) / desv
+    densidad = np.exp(-0.5 * z ** 2) / np.sqrt(2 * np.pi)
+    return (media - mejor - xi) * ndtr(z) + desv * densidad, ndtr(z)
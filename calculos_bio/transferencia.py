@@ -0,0 +1,30 @@
+"""
+Transferencia de masa: kLa dinámico a partir de curvas de oxígeno disuelto.
+"""
+
+import numpy as np
+from scipy.stats import linregress
+
+
+# --- 1. TRANSFERENCIA DE MASA (KLa Dinámico) ---
+def calcular_kla_dinamico(tiempo, do_valores, do_saturacion=100.0):
+    """Calcula KLa usando ln(C* - CL) = -KLa * t + C"""
+    try:
+        mask = (do_valores < do_saturacion) & (do_valores > 0)
+        t_valid = tiempo[mask]
+        do_valid = do_valores[mask]
+        
+        if len(t_valid) < 3:
+            return {'exito': False, 'error': "Pocos puntos válidos (< 100% DO)."}
+
+        # Linealización
+        y_log = np.log(do_saturacion - do_valid)
+        slope, intercept, r_value, _, _ = linregress(t_valid, y_log)
+        
+        return {
+            'exito': True, 'kla': -slope, 'r2': r_value**2, 'pendiente': slope,
+            'datos_t': t_valid, 'datos_y_log': y_log,
+            'datos_y_pred': slope * t_valid + intercept
+        }
+    except Exception as e:
+        return {'exito': False, 'error': str(e)}
\ No newline at end of file
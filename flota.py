@@ -0,0 +1,215 @@
+"""
+Flota de biorreactores de banco en paralelo.
+Consignas, lecturas y estimaciones cinéticas de todos los reactores viven en arreglos
+compartidos con un eje por reactor: cada instante se escribe como una fila (reactores ×
+etiquetas) y el resumen del tablero se calcula en una sola pasada vectorizada.
+"""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import alarmas
+import telemetria
+from telemetria import _escribir_circular, _leer_circular
+
+N_REACTORES = 24
+ETIQUETAS_FLOTA = telemetria.ETIQUETAS + ('biomasa',)
+CAPACIDAD_FLOTA = 7_200      # Instantes conservados por reactor
+VENTANA_CINETICA = 7_200     # Segundos de proceso para estimar μ (regresión de ln X)
+CONSIGNAS_FLOTA = (7.0, 28.0, 300.0, 40.0)  # Centro de los rangos óptimos de las reglas de alarma
+ESTADOS = np.array(['🟢 Normal', '🟡 Aviso', '🟠 Alarma', '🔴 Crítica'])
+
+
+# --- 1. ESTADO COMPARTIDO DE LA FLOTA ---
+class Flota:
+    """Consignas (reactores × etiquetas), historial circular (instantes × reactores × etiquetas) y μ por reactor."""
+
+    def __init__(self, n_reactores=N_REACTORES, consignas=None, capacidad=CAPACIDAD_FLOTA):
+        self.nombres = [f"R{i + 1:02d}" for i in range(n_reactores)]
+        self.n_reactores = n_reactores
+        self.etiquetas = ETIQUETAS_FLOTA
+        self.capacidad = capacidad
+        consignas = consignas or {}
+        self.consignas = np.tile(
+            np.array([consignas.get(e, c) for e, c in zip(telemetria.ETIQUETAS, CONSIGNAS_FLOTA)], dtype=np.float64),
+            (n_reactores, 1))
+        self.tiempos = np.full(capacidad, np.nan)
+        self.valores = np.full((capacidad, n_reactores, len(self.etiquetas)), np.nan)
+        self.escritos = 0
+        self.mu = np.full(n_reactores, np.nan)
+        self.r2 = np.full(n_reactores, np.nan)
+        self.motor_alarmas = alarmas.MotorAlarmas(n_reactores=n_reactores, etiquetas=telemetria.ETIQUETAS,
+                                                  nombres_reactores=self.nombres)
+        self._bloqueo = threading.Lock()
+
+    def __len__(self):
+        return min(self.escritos, self.capacidad)
+
+    def agregar(self, tiempos, valores):
+        """Escribir un lote de instantes (m,) × (m, reactores, etiquetas) y actualizar alarmas y μ."""
+        tiempos = np.asarray(tiempos, dtype=np.float64)
+        valores = np.asarray(valores, dtype=np.float64)
+        if len(tiempos) == 0:
+            return
+        with self._bloqueo:
+            _escribir_circular((self.tiempos, self.valores), (tiempos, valores), self.escritos, self.capacidad)
+            self.escritos += len(tiempos)
+            self.motor_alarmas.evaluar(tiempos[-1], valores[-1, :, :len(telemetria.ETIQUETAS)])
+            self._estimar_cinetica()
+
+    def ventana(self, segundos=None):
+        """Copias (tiempos, valores) de los instantes más recientes; con `segundos`, solo esa ventana."""
+        with self._bloqueo:
+            return self._ventana(segundos)
+
+    def _ventana(self, segundos):
+        n = len(self)
+        tiempos = _leer_circular(self.tiempos, self.escritos, self.capacidad, n)
+        inicio = 0 if segundos is None or n == 0 else np.searchsorted(tiempos, tiempos[-1] - segundos)
+        m = n - inicio
+        return tiempos[inicio:], _leer_circular(self.valores, self.escritos, self.capacidad, m)
+
+    def _estimar_cinetica(self):
+        """μ de todos los reactores a la vez: pendiente de ln(biomasa) vs tiempo (h) en la ventana reciente."""
+        tiempos, valores = self._ventana(VENTANA_CINETICA)
+        biomasa = valores[:, :, self.etiquetas.index('biomasa')]
+        valida = np.isfinite(biomasa) & (biomasa > 0)
+        n = valida.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            y = np.where(valida, np.log(np.where(valida, biomasa, 1.0)), 0.0)
+            t = np.where(valida, (tiempos - tiempos[-1])[:, None] / 3600.0, 0.0)
+            t_media = t.sum(axis=0) / n
+            y_media = y.sum(axis=0) / n
+            dt = np.where(valida, t - t_media, 0.0)
+            dy = np.where(valida, y - y_media, 0.0)
+            sxx, syy, sxy = (dt * dt).sum(axis=0), (dy * dy).sum(axis=0), (dt * dy).sum(axis=0)
+            self.mu = np.where(n >= 3, sxy / sxx, np.nan)
+            self.r2 = np.where(n >= 3, sxy ** 2 / (sxx * syy), np.nan)
+
+    def serie_grafico(self, etiqueta='biomasa', segundos=None, max_puntos=telemetria.MAX_PUNTOS_GRAFICO):
+        """(tiempos, valores instantes × reactores) de una etiqueta con a lo sumo ~`max_puntos` instantes.
+
+        Cada reactor se reduce con LTTB a su parte de `max_puntos` y se conservan los instantes
+        elegidos para cualquiera de ellos, así ningún reactor pierde sus picos.
+        """
+        tiempos, valores = self.ventana(segundos)
+        serie = valores[:, :, self.etiquetas.index(etiqueta)]
+        if len(tiempos) <= max_puntos:
+            return tiempos, serie
+        por_reactor = max(3, max_puntos // self.n_reactores)
+        rellena = pd.DataFrame(serie).ffill().bfill().fillna(0.0).to_numpy()
+        indices = np.unique(np.concatenate([telemetria.lttb(tiempos, rellena[:, j], por_reactor)
+                                            for j in range(self.n_reactores)]))
+        return tiempos[indices], serie[indices]
+
+    def actualizar_consignas(self, consignas):
+        """Reemplazar las consignas (reactores × etiquetas de telemetría) de una vez."""
+        consignas = np.asarray(consignas, dtype=np.float64)
+        with self._bloqueo:
+            self.consignas[:] = consignas
+
+    def tabla_consignas(self):
+        return pd.DataFrame(self.consignas, index=pd.Index(self.nombres, name='Reactor'),
+                            columns=[telemetria.NOMBRES_ETIQUETAS[e] for e in telemetria.ETIQUETAS])
+
+    def resumen(self):
+        """Una fila por reactor: última lectura, desvío de consigna, μ, td y alarmas (sin bucles por reactor)."""
+        with self._bloqueo:
+            if self.escritos == 0:
+                return pd.DataFrame()
+            ultimo = self.valores[(self.escritos - 1) % self.capacidad].copy()
+            consignas = self.consignas.copy()
+            mu, r2 = self.mu.copy(), self.r2.copy()
+            motor = self.motor_alarmas
+            activas = motor.activa.copy()
+
+        n_alarmas = np.bincount(motor.reactor[activas], minlength=self.n_reactores)
+        severidad = np.zeros(self.n_reactores, dtype=np.int64)
+        np.maximum.at(severidad, motor.reactor[activas], motor.severidad[activas])
+        n_tel = len(telemetria.ETIQUETAS)
+        desvio = ultimo[:, :n_tel] - consignas
+        with np.errstate(invalid='ignore', divide='ignore'):
+            duplicacion = np.where((mu > 0) & (r2 >= 0.5), np.log(2) / mu, np.nan)  # Solo en crecimiento claro
+
+        datos = {'Estado': ESTADOS[severidad]}
+        for j, etiqueta in enumerate(telemetria.ETIQUETAS):
+            datos[telemetria.NOMBRES_ETIQUETAS[etiqueta]] = ultimo[:, j]
+            datos[f"Δ {etiqueta}"] = desvio[:, j]
+        datos.update({
+            'Biomasa (g/L)': ultimo[:, n_tel],
+            'μ (h⁻¹)': mu,
+            'R² ln X': r2,
+            'td (h)': duplicacion,
+            'Alarmas': n_alarmas,
+        })
+        return pd.DataFrame(datos, index=pd.Index(self.nombres, name='Reactor'))
+
+    def memoria_bytes(self):
+        return self.tiempos.nbytes + self.valores.nbytes + self.consignas.nbytes
+
+
+# --- 2. SIMULACIÓN Y LECTOR EN SEGUNDO PLANO ---
+class SimuladorFlota:
+    """Todos los reactores en un paso vectorizado: lazos de control con ruido (Ornstein-Uhlenbeck)
+    y crecimiento logístico con μmax por cepa, penalizado por pH y temperatura fuera del óptimo.
+
+    `aceleracion` segundos de proceso transcurren por cada segundo real.
+    """
+
+    RUIDO = np.array([0.05, 0.2, 3.0, 1.5])
+    RETORNO = 0.2
+
+    def __init__(self, flota, frecuencia_hz=1.0, aceleracion=60.0, semilla=None):
+        self.flota = flota
+        self.frecuencia_hz = frecuencia_hz
+        self.aceleracion = aceleracion
+        self._rng = np.random.default_rng(semilla)
+        n = flota.n_reactores
+        self.mu_max = self._rng.uniform(0.35, 0.65, n)
+        self.x_max = self._rng.uniform(5.0, 8.0, n)
+        self._x = self._rng.uniform(0.05, 2.0, n)   # Inóculos escalonados: cada reactor en otra fase
+        self._control = flota.consignas.copy()
+        self._t = time.time()
+
+    def descripcion(self):
+        return f"Simulador de flota ({self.flota.n_reactores} reactores, ×{self.aceleracion:g})"
+
+    def paso(self, dt):
+        """Avanzar dt segundos reales; devuelve (tiempo de proceso, lecturas reactores × etiquetas)."""
+        dt_proceso = dt * self.aceleracion
+        consignas = self.flota.consignas
+        retorno = min(1.0, self.RETORNO * dt_proceso)
+        self._control += retorno * (consignas - self._control) + self.RUIDO * np.sqrt(dt) * self._rng.standard_normal(self._control.shape)
+
+        ph, temperatura = self._control[:, 0], self._control[:, 1]
+        mu = self.mu_max * np.exp(-((ph - 7.0) / 1.2) ** 2) * np.exp(-((temperatura - 28.0) / 6.0) ** 2)
+        self._x += mu * self._x * (1 - self._x / self.x_max) * dt_proceso / 3600.0
+        self._t += dt_proceso
+
+        biomasa = self._x * (1 + 0.01 * self._rng.standard_normal(len(self._x)))
+        return self._t, np.column_stack((self._control, biomasa))
+
+    async def lotes(self, detenido):
+        dt = 1.0 / self.frecuencia_hz
+        while not detenido():
+            t, lectura = self.paso(dt)
+            yield np.array([t]), lectura[None]
+            await asyncio.sleep(dt)
+
+
+class LectorFlota(telemetria.LectorFondo):
+    """Lector en segundo plano que vuelca los lotes (tiempos, reactores × etiquetas) en la flota."""
+
+    NOMBRE_HILO = 'lector-flota'
+
+    def __init__(self, flota, fuente, inactividad_maxima=telemetria.LectorFondo.INACTIVIDAD_MAXIMA):
+        super().__init__(fuente, inactividad_maxima)
+        self.flota = flota
+
+    def procesar(self, lote):
+        tiempos, valores = lote
+        self.flota.agregar(tiempos, valores)
@@ -0,0 +1,224 @@
+"""
+Medición automática de halos de inhibición en fotografías de placas Mueller-Hinton.
+Detecta los discos de antibiótico y mide el diámetro del halo con perfiles radiales
+vectorizados (NumPy/SciPy); los lotes de imágenes se procesan en un pool de procesos.
+"""
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import ndimage
+
+DIAMETRO_DISCO_MM = 6.0
+RADIO_MAXIMO_MM = 25.0
+N_ANGULOS = 72
+COLUMNAS_HALOS = ['imagen', 'disco', 'x', 'y', 'diametro_halo', 'contraste', 'calidad']
+
+
+# --- 1. CARGA Y PREPROCESAMIENTO ---
+def cargar_imagen(origen):
+    """Imagen en escala de grises float32 [0, 1] desde una ruta o archivo abierto."""
+    from PIL import Image  # Pillow ya viene con Streamlit
+
+    with Image.open(origen) as imagen:
+        gris = np.asarray(imagen.convert('L'), dtype=np.float32)
+    return gris / 255.0
+
+
+def suavizar(imagen, sigma=1.5):
+    """Filtro gaussiano para atenuar el ruido de la cámara y la textura del agar."""
+    return ndimage.gaussian_filter(np.asarray(imagen, dtype=np.float32), sigma)
+
+
+# --- 2. DETECCIÓN DE DISCOS ---
+def detectar_discos(imagen, min_relleno=0.6):
+    """Centros (fila, columna) y radios en píxeles de los discos (los objetos más brillantes)."""
+    fondo = np.median(imagen)
+    brillo_discos = np.percentile(imagen, 99.5)
+    if brillo_discos - fondo < 0.05:
+        return np.empty((0, 2)), np.empty(0)
+
+    etiquetas, n = ndimage.label(imagen > (fondo + brillo_discos) / 2)
+    if n == 0:
+        return np.empty((0, 2)), np.empty(0)
+
+    indices = np.arange(1, n + 1)
+    areas = ndimage.sum_labels(np.ones_like(imagen), etiquetas, indices)
+    cajas = ndimage.find_objects(etiquetas)
+    relleno = np.array([a / ((c[0].stop - c[0].start) * (c[1].stop - c[1].start)) for a, c in zip(areas, cajas)])
+
+    # Los discos son círculos (relleno ~π/4) de área similar entre sí
+    candidatos = (areas >= 20) & (relleno >= min_relleno)
+    if not candidatos.any():
+        return np.empty((0, 2)), np.empty(0)
+    area_tipica = np.median(areas[candidatos])
+    validos = candidatos & (areas > 0.4 * area_tipica) & (areas < 2.5 * area_tipica)
+
+    centros = np.array(ndimage.center_of_mass(imagen, etiquetas, indices[validos])).reshape(-1, 2)
+    radios = np.sqrt(areas[validos] / np.pi)
+    return centros, radios
+
+
+# --- 3. PERFILES RADIALES ---
+def perfiles_radiales(imagen, centros, radio_max, n_angulos=N_ANGULOS):
+    """Intensidades (disco, ángulo, radio) muestreadas en coordenadas polares en una sola llamada."""
+    radios = np.arange(int(radio_max) + 1, dtype=np.float32)
+    angulos = np.linspace(0, 2 * np.pi, n_angulos, endpoint=False, dtype=np.float32)
+    filas = centros[:, 0, None, None] + np.sin(angulos)[None, :, None] * radios[None, None, :]
+    columnas = centros[:, 1, None, None] + np.cos(angulos)[None, :, None] * radios[None, None, :]
+    valores = ndimage.map_coordinates(imagen, [filas.ravel(), columnas.ravel()], order=1, mode='nearest')
+    return valores.reshape(filas.shape)
+
+
+def _primer_cruce(perfiles, umbral, signo, desde):
+    """Radio subpíxel del primer cruce de `umbral` a lo largo del último eje (NaN si no cruza)."""
+    r = np.arange(perfiles.shape[-1])
+    signo = np.broadcast_to(signo, umbral.shape)[..., None]
+    cruzado = (signo * (perfiles - umbral[..., None]) > 0) & (r >= desde[..., None])
+    hay_cruce = cruzado.any(axis=-1)
+    k = np.maximum(cruzado.argmax(axis=-1), 1)
+    antes = np.take_along_axis(perfiles, (k - 1)[..., None], axis=-1)[..., 0]
+    despues = np.take_along_axis(perfiles, k[..., None], axis=-1)[..., 0]
+    paso = despues - antes
+    fraccion = np.clip(np.divide(umbral - antes, paso, out=np.ones_like(paso), where=paso != 0), 0, 1)
+    return np.where(hay_cruce, k - 1 + fraccion, np.nan)
+
+
+def refinar_radios_disco(perfiles, radios_estimados):
+    """Radio de cada disco a partir de su perfil (el umbral global lo subestima junto a un halo)."""
+    n_radios = perfiles.shape[2]
+    r = np.arange(n_radios)
+    interior = r[None, :] < np.maximum(radios_estimados * 0.5, 1)[:, None]
+    exterior = (r[None, :] >= (radios_estimados * 1.3)[:, None]) & (r[None, :] < (radios_estimados * 1.6 + 2)[:, None])
+    nivel_disco = np.nanmedian(np.where(interior[:, None, :], perfiles, np.nan), axis=(1, 2))
+    nivel_fuera = np.nanmedian(np.where(exterior[:, None, :], perfiles, np.nan), axis=(1, 2))
+    umbral = np.broadcast_to(((nivel_disco + nivel_fuera) / 2)[:, None], perfiles.shape[:2])
+    desde = np.ones(perfiles.shape[:2], dtype=int)
+    radios = np.nanmedian(_primer_cruce(perfiles, umbral, -1.0, desde), axis=1)
+    return np.where(np.isnan(radios), radios_estimados, radios)
+
+
+def medir_bordes(perfiles, radios_disco, min_contraste=0.04):
+    """Radio del borde del halo por disco y su contraste, a partir de los perfiles radiales.
+
+    El nivel del halo se toma justo fuera del disco y el del césped bacteriano en el anillo
+    exterior; el borde es el primer cruce del punto medio en cada ángulo (mediana entre ángulos).
+    """
+    n_discos, _, n_radios = perfiles.shape
+    r = np.arange(n_radios)
+    inicio = np.clip(np.ceil(radios_disco * 1.3).astype(int), 1, n_radios - 2)
+
+    # Niveles por disco y ángulo
+    fuera_disco = (r[None, :] >= inicio[:, None]) & (r[None, :] < np.minimum(inicio * 1.4 + 2, n_radios)[:, None])
+    nivel_halo = np.nanmedian(np.where(fuera_disco[:, None, :], perfiles, np.nan), axis=2)
+    nivel_cesped = np.median(perfiles[:, :, int(n_radios * 0.85):], axis=2)
+    contraste = np.median(nivel_cesped - nivel_halo, axis=1)
+
+    # Primer cruce del umbral intermedio (en dirección al césped) fuera del disco
+    umbral = (nivel_halo + nivel_cesped) / 2
+    signo = np.sign(contraste)[:, None]
+    desde = np.broadcast_to(inicio[:, None], umbral.shape)
+    borde = _primer_cruce(perfiles, umbral, signo, desde)
+    hay_cruce = ~np.isnan(borde)
+
+    radio_borde = np.nanmedian(np.where(hay_cruce.any(axis=1)[:, None], borde, 0.0), axis=1)
+    # Sin contraste apreciable no hay halo: el diámetro es el del propio disco
+    sin_halo = np.abs(contraste) < min_contraste
+    radio_borde = np.where(sin_halo | np.isnan(radio_borde), radios_disco, np.maximum(radio_borde, radios_disco))
+    calidad = hay_cruce.mean(axis=1)
+    return radio_borde, contraste, calidad
+
+
+# --- 4. ANÁLISIS DE PLACAS ---
+def analizar_placa(imagen, nombre='placa', mm_por_pixel=None, diametro_disco_mm=DIAMETRO_DISCO_MM):
+    """Tabla de halos (una fila por disco) para una imagen ya cargada."""
+    imagen = suavizar(imagen)
+    centros, radios_disco = detectar_discos(imagen)
+    if len(centros) == 0:
+        return pd.DataFrame(columns=COLUMNAS_HALOS)
+
+    # Escala a partir del tamaño conocido del disco si no se indica
+    escala_por_disco = mm_por_pixel is None
+    if escala_por_disco:
+        mm_por_pixel = diametro_disco_mm / (2 * np.median(radios_disco))
+
+    radio_max = min(RADIO_MAXIMO_MM / mm_por_pixel, max(imagen.shape) / 2)
+    perfiles = perfiles_radiales(imagen, centros, radio_max)
+    radios_disco = refinar_radios_disco(perfiles, radios_disco)
+    if escala_por_disco:
+        mm_por_pixel = diametro_disco_mm / (2 * np.median(radios_disco))
+    radio_borde, contraste, calidad = medir_bordes(perfiles, radios_disco)
+
+    # Orden horario desde las 12 en punto alrededor del centro de la placa. El barrido empieza
+    # medio intervalo entre discos antes de las 12 para que un disco justo arriba (ángulo ~2π
+    # por redondeo) no quede al final
+    centro_placa = centros.mean(axis=0)
+    inicio_barrido = np.pi / len(centros)
+    angulo = np.mod(np.arctan2(centros[:, 1] - centro_placa[1], centro_placa[0] - centros[:, 0]) + inicio_barrido,
+                    2 * np.pi)
+    orden = np.argsort(angulo) if len(centros) > 1 else np.arange(len(centros))
+
+    return pd.DataFrame({
+        'imagen': nombre,
+        'disco': np.arange(1, len(centros) + 1),
+        'x': centros[orden, 1].round(1),
+        'y': centros[orden, 0].round(1),
+        'diametro_halo': (2 * radio_borde[orden] * mm_por_pixel).round(1),
+        'contraste': contraste[orden].round(3),
+        'calidad': calidad[orden].round(2),
+    })
+
+
+def _analizar_archivo(argumentos):
+    origen, mm_por_pixel = argumentos
+    if isinstance(origen, tuple):
+        # (nombre, bytes) para archivos subidos que no existen en disco
+        nombre, contenido = origen
+        return analizar_placa(cargar_imagen(io.BytesIO(contenido)), nombre, mm_por_pixel)
+    return analizar_placa(cargar_imagen(origen), os.path.basename(str(origen)), mm_por_pixel)
+
+
+def procesar_lote(imagenes, mm_por_pixel=None, max_procesos=None):
+    """Analizar muchas placas en paralelo (pool de procesos) y concatenar los resultados.
+
+    Cada imagen es una ruta o una tupla (nombre, bytes).
+    """
+    imagenes = list(imagenes)
+    if not imagenes:
+        return pd.DataFrame(columns=COLUMNAS_HALOS)
+    argumentos = [(imagen, mm_por_pixel) for imagen in imagenes]
+    if len(imagenes) == 1 or max_procesos == 1:
+        return pd.concat([_analizar_archivo(a) for a in argumentos], ignore_index=True)
+    with ProcessPoolExecutor(max_workers=max_procesos) as pool:
+        resultados = list(pool.map(_analizar_archivo, argumentos, chunksize=4))
+    return pd.concat(resultados, ignore_index=True)
+
+
+def asignar_antibioticos(df_halos, antibioticos, primer_disco=None):
+    """Asignar antibióticos a los discos en orden horario dentro de cada placa.
+
+    Por omisión el primer antibiótico corresponde al disco 1 (el primero desde las 12).
+    `primer_disco` ({imagen: número de disco} o un número para todas las placas) indica qué
+    disco detectado lleva el primer antibiótico; el resto sigue en orden horario.
+    """
+    antibioticos = list(antibioticos)
+    df = df_halos.copy()
+    disco = df['disco'].to_numpy()
+    if primer_disco is None:
+        posicion = disco - 1
+    else:
+        if isinstance(primer_disco, dict):
+            primero = df['imagen'].map(primer_disco).fillna(1).to_numpy(dtype=np.int64)
+        else:
+            primero = np.full(len(df), int(primer_disco), dtype=np.int64)
+        n_discos = df.groupby('imagen')['disco'].transform('size').to_numpy()
+        posicion = np.mod(disco - primero, n_discos)
+    df['antibiotico'] = np.where(
+        posicion < len(antibioticos),
+        np.array(antibioticos + [None], dtype=object)[np.minimum(posicion, len(antibioticos))],
+        None
+    )
+    return df
@@ -0,0 +1,466 @@
+"""
+Almacén columnar de mediciones de metabolitos en formato largo.
+Cada medición es una fila (experimento, tiempo, metabolito, categoría, unidad, valor) con
+códigos categóricos, tiempos float64 y valores float32; las vistas anchas se calculan una
+vez por versión.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy.integrate import trapezoid
+
+from antibiogramas import normalizar_nombre, resolver_nombre
+from cache_resultados import memoizar
+
+# Catálogo de metabolitos conocidos: nombre -> (categoría, grupo, unidad)
+CATALOGO_METABOLITOS = {
+    'acetato': ('Primarios', 'Ácidos Orgánicos', 'mg/L'),
+    'lactato': ('Primarios', 'Ácidos Orgánicos', 'mg/L'),
+    'piruvato': ('Primarios', 'Ácidos Orgánicos', 'mg/L'),
+    'citrato': ('Primarios', 'Ácidos Orgánicos', 'mg/L'),
+    'glucosa': ('Primarios', 'Azúcares y Derivados', 'mg/L'),
+    'fructosa': ('Primarios', 'Azúcares y Derivados', 'mg/L'),
+    'galactosa': ('Primarios', 'Azúcares y Derivados', 'mg/L'),
+    'trehalosa': ('Primarios', 'Azúcares y Derivados', 'mg/L'),
+    'alanina': ('Primarios', 'Aminoácidos', 'mg/L'),
+    'glicina': ('Primarios', 'Aminoácidos', 'mg/L'),
+    'serina': ('Primarios', 'Aminoácidos', 'mg/L'),
+    'prolina': ('Primarios', 'Aminoácidos', 'mg/L'),
+    'piocianina': ('Secundarios', 'Antibióticos', 'μg/L'),
+    'pioverdina': ('Secundarios', 'Antibióticos', 'μg/L'),
+    'fluopsina': ('Secundarios', 'Antibióticos', 'μg/L'),
+    'phenazinas': ('Secundarios', 'Antibióticos', 'μg/L'),
+    'quinolonas': ('Secundarios', 'Antibióticos', 'μg/L'),
+    'lipasas': ('Secundarios', 'Enzimas', 'U/mL'),
+    'proteasas': ('Secundarios', 'Enzimas', 'U/mL'),
+    'elastasas': ('Secundarios', 'Enzimas', 'U/mL'),
+    'lecitinasas': ('Secundarios', 'Enzimas', 'U/mL'),
+    'ramnolipidos': ('Secundarios', 'Biosurfactantes', 'mg/L'),
+    'surfactina': ('Secundarios', 'Biosurfactantes', 'mg/L'),
+    'soforolipidos': ('Secundarios', 'Biosurfactantes', 'mg/L'),
+    'bioemulsina': ('Secundarios', 'Biosurfactantes', 'mg/L'),
+}
+
+# Nombres alternativos (inglés, abreviaturas y nombres de exportación HPLC/LC-MS) -> catálogo
+ALIAS_METABOLITOS = {
+    'acetate': 'acetato', 'acetic acid': 'acetato', 'acido acetico': 'acetato',
+    'lactate': 'lactato', 'lactic acid': 'lactato', 'acido lactico': 'lactato',
+    'pyruvate': 'piruvato', 'pyruvic acid': 'piruvato', 'acido piruvico': 'piruvato',
+    'citrate': 'citrato', 'citric acid': 'citrato', 'acido citrico': 'citrato',
+    'glucose': 'glucosa', 'd-glucose': 'glucosa', 'dextrosa': 'glucosa',
+    'fructose': 'fructosa', 'galactose': 'galactosa', 'trehalose': 'trehalosa',
+    'alanine': 'alanina', 'ala': 'alanina', 'glycine': 'glicina', 'gly': 'glicina',
+    'serine': 'serina', 'ser': 'serina', 'proline': 'prolina', 'pro': 'prolina',
+    'pyocyanin': 'piocianina', 'pyocyanine': 'piocianina', 'pyo': 'piocianina',
+    'pyoverdine': 'pioverdina', 'pyoverdin': 'pioverdina', 'pvd': 'pioverdina',
+    'fluopsin': 'fluopsina', 'fluopsin c': 'fluopsina',
+    'phenazine': 'phenazinas', 'phenazines': 'phenazinas', 'fenazinas': 'phenazinas', 'pca': 'phenazinas',
+    'quinolone': 'quinolonas', 'quinolones': 'quinolonas', 'pqs': 'quinolonas', 'hhq': 'quinolonas',
+    'lipase': 'lipasas', 'lipasa': 'lipasas', 'protease': 'proteasas', 'proteasa': 'proteasas',
+    'elastase': 'elastasas', 'elastasa': 'elastasas', 'lasb': 'elastasas',
+    'lecithinase': 'lecitinasas', 'lecitinasa': 'lecitinasas', 'phospholipase c': 'lecitinasas',
+    'rhamnolipid': 'ramnolipidos', 'rhamnolipids': 'ramnolipidos', 'ramnolipido': 'ramnolipidos',
+    'surfactin': 'surfactina', 'sophorolipid': 'soforolipidos', 'sophorolipids': 'soforolipidos',
+    'bioemulsin': 'bioemulsina',
+}
+
+# Unidad -> (dimensión, factor a la unidad base: mg/L para masa, U/mL para actividad)
+UNIDADES_METABOLITOS = {
+    'g/l': ('masa', 1000.0), 'mg/ml': ('masa', 1000.0),
+    'mg/l': ('masa', 1.0), 'μg/ml': ('masa', 1.0), 'µg/ml': ('masa', 1.0), 'ug/ml': ('masa', 1.0), 'ppm': ('masa', 1.0),
+    'μg/l': ('masa', 1e-3), 'µg/l': ('masa', 1e-3), 'ug/l': ('masa', 1e-3), 'ng/ml': ('masa', 1e-3), 'ppb': ('masa', 1e-3),
+    'u/ml': ('actividad', 1.0), 'ui/ml': ('actividad', 1.0), 'iu/ml': ('actividad', 1.0),
+    'u/l': ('actividad', 1e-3), 'mu/ml': ('actividad', 1e-3),
+}
+
+COLUMNAS_CATEGORICAS = ['experimento', 'metabolito', 'categoria', 'unidad']
+COLUMNAS_MEDICIONES = ['experimento', 'tiempo_h', 'metabolito', 'categoria', 'unidad', 'valor']
+COLUMNAS_MUESTRAS = ['experimento', 'tiempo_h', 'cepa', 'medio', 'fase_crecimiento', 'fecha']
+
+
+class _Diccionario:
+    """Códigos enteros estables para los valores de una columna categórica."""
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codificar(self, valores):
+        """Códigos int32 de un arreglo, asignando código nuevo a los valores no vistos."""
+        locales, unicos = pd.factorize(pd.Series(valores, dtype=object), use_na_sentinel=False)
+        globales = np.empty(len(unicos), dtype=np.int32)
+        for i, valor in enumerate(unicos):
+            valor = str(valor) if pd.notna(valor) else ''
+            if valor not in self._codigos:
+                self._codigos[valor] = len(self.valores)
+                self.valores.append(valor)
+            globales[i] = self._codigos[valor]
+        return globales[locales]
+
+
+class AlmacenMetabolitos:
+    """Mediciones de metabolitos en columnas (códigos + números) con vistas en caché por versión."""
+
+    def __init__(self):
+        """Crear un almacén vacío."""
+        self._diccionarios = {col: _Diccionario() for col in COLUMNAS_CATEGORICAS}
+        self._bloques = []
+        self._muestras = []
+        self._cache = {}
+        self.version = 0
+
+    def agregar(self, mediciones, muestras=None):
+        """Agregar un lote de mediciones en formato largo (una sola operación por lote).
+
+        `mediciones` tiene las columnas COLUMNAS_MEDICIONES; `categoria` y `unidad` se toman del
+        catálogo cuando faltan. `muestras` (opcional) describe cada (experimento, tiempo_h).
+        """
+        mediciones = pd.DataFrame(mediciones)
+        if len(mediciones) == 0:
+            return 0
+        # Normalizar nombres y consultar el catálogo una vez por metabolito distinto
+        cod_nombre, nombres_u = pd.factorize(mediciones['metabolito'], use_na_sentinel=False)
+        nombres_u = np.array([str(m).strip().lower() for m in nombres_u], dtype=object)
+        catalogo_u = [CATALOGO_METABOLITOS.get(m, ('Otros', 'Otros', '')) for m in nombres_u]
+        columnas = {
+            'experimento': mediciones['experimento'],
+            'metabolito': nombres_u[cod_nombre],
+            'categoria': (mediciones['categoria'] if 'categoria' in mediciones
+                          else np.array([c[0] for c in catalogo_u], dtype=object)[cod_nombre]),
+            'unidad': (mediciones['unidad'] if 'unidad' in mediciones
+                       else np.array([c[2] for c in catalogo_u], dtype=object)[cod_nombre]),
+        }
+        bloque = {col: self._diccionarios[col].codificar(columnas[col]) for col in COLUMNAS_CATEGORICAS}
+        # El tiempo se guarda en float64, igual que en `muestras`, para que las claves
+        # (experimento, tiempo_h) coincidan exactamente (12.3 en float32 es 12.3000002)
+        bloque['tiempo_h'] = mediciones['tiempo_h'].to_numpy(dtype=np.float64)
+        bloque['valor'] = mediciones['valor'].to_numpy(dtype=np.float32)
+        self._bloques.append(bloque)
+
+        if muestras is not None and len(muestras) > 0:
+            muestras = pd.DataFrame(muestras).reindex(columns=COLUMNAS_MUESTRAS)
+            muestras['tiempo_h'] = muestras['tiempo_h'].astype(np.float64)
+            self._muestras.append(muestras)
+        self._invalidar()
+        return len(mediciones)
+
+    def _invalidar(self):
+        self.version += 1
+        self._cache.clear()
+
+    def limpiar(self):
+        """Eliminar todas las mediciones; la versión sigue creciendo (las cachés externas la usan de clave)."""
+        version = self.version
+        self.__init__()
+        self.version = version + 1
+
+    def __len__(self):
+        return sum(len(b['valor']) for b in self._bloques)
+
+    def _columnas(self):
+        """Bloques consolidados en un único conjunto de arreglos (se hace una vez por inserción)."""
+        if len(self._bloques) > 1:
+            self._bloques = [{col: np.concatenate([b[col] for b in self._bloques]) for col in self._bloques[0]}]
+        return self._bloques[0] if self._bloques else None
+
+    def tabla(self):
+        """Mediciones en formato largo con columnas categóricas."""
+        if 'tabla' not in self._cache:
+            columnas = self._columnas()
+            if columnas is None:
+                self._cache['tabla'] = pd.DataFrame(columns=COLUMNAS_MEDICIONES)
+            else:
+                datos = {}
+                for col in COLUMNAS_MEDICIONES:
+                    if col in self._diccionarios:
+                        datos[col] = pd.Categorical.from_codes(columnas[col], self._diccionarios[col].valores)
+                    else:
+                        datos[col] = columnas[col]
+                self._cache['tabla'] = pd.DataFrame(datos)
+        return self._cache['tabla']
+
+    def muestras(self):
+        """Metadatos de cultivo por (experimento, tiempo_h); el último registro prevalece."""
+        if 'muestras' not in self._cache:
+            if self._muestras:
+                self._muestras = [pd.concat(self._muestras, ignore_index=True)]
+                muestras = self._muestras[0].drop_duplicates(['experimento', 'tiempo_h'], keep='last')
+            else:
+                muestras = pd.DataFrame(columns=COLUMNAS_MUESTRAS)
+            self._cache['muestras'] = muestras.reset_index(drop=True)
+        return self._cache['muestras']
+
+    def experimentos(self, categoria=None):
+        """Experimentos con mediciones (opcionalmente de una categoría)."""
+        tabla = self.tabla()
+        if categoria is not None:
+            tabla = tabla[tabla['categoria'] == categoria]
+        return list(pd.unique(tabla['experimento'].astype(str)))
+
+    def pivote(self, categoria=None, experimento=None):
+        """Vista ancha (experimento, tiempo_h) × metabolito; réplicas promediadas, en caché hasta el próximo insert."""
+        clave = ('pivote', categoria, experimento)
+        if clave not in self._cache:
+            tabla = self.tabla()
+            if categoria is not None:
+                tabla = tabla[tabla['categoria'] == categoria]
+            if experimento is not None:
+                tabla = tabla[tabla['experimento'] == experimento]
+            ancha = (tabla.groupby(['experimento', 'tiempo_h', 'metabolito'], observed=True)['valor'].mean()
+                          .unstack('metabolito'))
+            ancha.columns = ancha.columns.astype(str)
+            self._cache[clave] = ancha
+        return self._cache[clave]
+
+
+# --- IMPORTACIÓN DE RESULTADOS HPLC/LC-MS ---
+# Encabezados reconocidos en las exportaciones de los equipos -> columna interna
+SINONIMOS_COLUMNAS = {
+    'experimento': ['experimento', 'experiment', 'lote', 'batch'],
+    'muestra': ['muestra', 'sample', 'sample name', 'nombre muestra', 'vial'],
+    'tiempo_h': ['tiempo_h', 'tiempo', 'tiempo (h)', 'time', 'time (h)', 'time_h', 'hora'],
+    'analito': ['analito', 'metabolito', 'analyte', 'compound', 'compuesto', 'name', 'component'],
+    'valor': ['concentracion', 'concentración', 'concentration', 'conc', 'amount', 'cantidad', 'valor', 'result'],
+    'unidad': ['unidad', 'unit', 'units', 'unidades'],
+}
+
+
+class IndiceMetabolitos:
+    """Resolución de nombres de analitos al catálogo (exacto, alias, parcial o difuso) con caché."""
+
+    def __init__(self, catalogo=CATALOGO_METABOLITOS, alias=ALIAS_METABOLITOS):
+        """Compilar el catálogo y los alias por nombre normalizado."""
+        self.nombres = [normalizar_nombre(n) for n in catalogo]
+        self.canonicos = list(catalogo)
+        self.indice = {n: i for i, n in enumerate(self.nombres)}
+        self.alias = {normalizar_nombre(k): normalizar_nombre(v) for k, v in alias.items()}
+        self.resolver = lru_cache(maxsize=4096)(self._resolver)
+
+    def _resolver(self, nombre):
+        i = resolver_nombre(nombre, self.nombres, self.indice, self.alias)
+        return self.canonicos[i] if i >= 0 else None
+
+    def resolver_exacto(self, nombre):
+        """Nombre de catálogo solo por coincidencia exacta o alias (None en otro caso)."""
+        i = resolver_nombre(nombre, self.nombres, self.indice, self.alias, parcial=False)
+        return self.canonicos[i] if i >= 0 else None
+
+    def resolver_lote(self, nombres):
+        """Nombre de catálogo para cada analito (None si no se reconoce), resolviendo cada nombre único una vez."""
+        codigos, unicos = pd.factorize(pd.Series(nombres, dtype=object).fillna(''), sort=False)
+        resueltos = np.array([self.resolver(str(n)) for n in unicos] + [None], dtype=object)
+        return resueltos[codigos]
+
+
+INDICE_METABOLITOS = IndiceMetabolitos()
+
+
+def factores_conversion(unidades, metabolitos):
+    """Factor para llevar cada valor a la unidad del catálogo de su metabolito (NaN si no es convertible)."""
+    claves = pd.Series(unidades, dtype=object).fillna('').astype(str).str.replace(' ', '').str.lower()
+    cod_u, unidades_u = pd.factorize(claves, sort=False)
+    cod_m, metabolitos_u = pd.factorize(pd.Series(metabolitos, dtype=object), sort=False, use_na_sentinel=False)
+
+    origen = [UNIDADES_METABOLITOS.get(u, (None, np.nan)) for u in unidades_u]
+    destino = [UNIDADES_METABOLITOS.get(CATALOGO_METABOLITOS[m][2].lower(), (None, np.nan))
+               if m in CATALOGO_METABOLITOS else (None, np.nan) for m in metabolitos_u]
+    # Matriz pequeña (unidades × metabolitos distintos) indexada después por fila
+    tabla = np.array([[o[1] / d[1] if o[0] is not None and o[0] == d[0] else np.nan for d in destino]
+                      for o in origen]).reshape(len(origen), len(destino))
+    return tabla[cod_u, cod_m]
+
+
+def _buscar_columnas(df):
+    por_nombre = {normalizar_nombre(c): c for c in df.columns}
+    return {interna: next((por_nombre[normalizar_nombre(s)] for s in sinonimos if normalizar_nombre(s) in por_nombre), None)
+            for interna, sinonimos in SINONIMOS_COLUMNAS.items()}
+
+
+def preparar_resultados_cromatografia(df, valores_defecto=None, indice=INDICE_METABOLITOS):
+    """Convertir una exportación HPLC/LC-MS en mediciones y muestras para AlmacenMetabolitos.
+
+    Acepta formato largo (una fila por muestra y analito) o ancho (una columna por analito).
+    En formato ancho solo se aceptan encabezados que coinciden exactamente o por alias con el
+    catálogo; el resto se informa sin importar. Devuelve (mediciones, muestras, filas
+    rechazadas con motivo, columnas no reconocidas); ValueError si no hay datos reconocibles.
+    """
+    valores_defecto = valores_defecto or {}
+    columnas = _buscar_columnas(df)
+    metadatos = [c for c in (columnas['experimento'], columnas['muestra'], columnas['tiempo_h'],
+                             columnas['unidad']) if c is not None]
+
+    no_reconocidas = []
+    if columnas['analito'] is not None and columnas['valor'] is not None:
+        largo = df
+        analito, valor = df[columnas['analito']], df[columnas['valor']]
+    else:
+        # Formato ancho: un encabezado corto como "pH" o "ID" no debe adivinarse como analito
+        restantes = [c for c in df.columns if c not in metadatos]
+        analitos = [c for c in restantes if indice.resolver_exacto(str(c)) is not None]
+        no_reconocidas = [str(c) for c in restantes if c not in analitos]
+        if not analitos:
+            raise ValueError("No se encontraron columnas de analito/concentración ni analitos conocidos")
+        largo = df.melt(id_vars=metadatos, value_vars=analitos, var_name='_analito', value_name='_valor')
+        analito, valor = largo['_analito'], largo['_valor']
+
+    n = len(largo)
+
+    def columna(interna, defecto):
+        if columnas[interna] is None:
+            return np.full(n, defecto, dtype=object)
+        return largo[columnas[interna]].to_numpy(dtype=object)
+
+    metabolito = indice.resolver_lote(analito)
+    valores = pd.to_numeric(valor, errors='coerce').to_numpy(dtype=np.float64)
+    unidad = columna('unidad', valores_defecto.get('unidad', 'mg/L'))
+    factor = factores_conversion(unidad, metabolito)
+    tiempo = pd.to_numeric(pd.Series(columna('tiempo_h', valores_defecto.get('tiempo_h', 0.0))),
+                           errors='coerce').to_numpy(dtype=np.float64)
+
+    motivos = np.full(n, '', dtype=object)
+    for mascara, motivo in (
+        (pd.isna(metabolito), 'analito no reconocido; '),
+        (~(valores >= 0), 'concentración no válida; '),
+        (pd.notna(metabolito) & np.isnan(factor), 'unidad no convertible; '),
+        (np.isnan(tiempo), 'tiempo no válido; '),
+    ):
+        if mascara.any():
+            motivos = np.where(mascara, motivos + motivo, motivos)
+    validas = motivos == ''
+
+    experimento = columna('experimento', valores_defecto.get('experimento', 'Importado'))
+    mediciones = pd.DataFrame({
+        'experimento': experimento[validas],
+        'tiempo_h': tiempo[validas],
+        'metabolito': metabolito[validas],
+        'valor': valores[validas] * factor[validas],
+    })
+    muestras = mediciones[['experimento', 'tiempo_h']].drop_duplicates().assign(
+        cepa=valores_defecto.get('cepa'), medio=valores_defecto.get('medio'),
+        fase_crecimiento=valores_defecto.get('fase_crecimiento'), fecha=valores_defecto.get('fecha')
+    )
+
+    rechazadas = largo[~validas].copy()
+    rechazadas['motivo'] = pd.Series(motivos[~validas], index=rechazadas.index).str.rstrip('; ')
+    return mediciones, muestras.reset_index(drop=True), rechazadas.reset_index(drop=True), no_reconocidas
+
+
+# --- CINÉTICA METABÓLICA (LUEDEKING-PIRET) ---
+UMBRAL_ASOCIACION = 0.8  # Fracción de la producción explicada por el crecimiento
+
+
+def clasificar_produccion(fraccion_crecimiento, alfa, beta):
+    """Asociado / no asociado al crecimiento / mixto según la fracción de producción ligada a dX."""
+    return np.select(
+        [(alfa <= 0) & (beta <= 0),
+         fraccion_crecimiento >= UMBRAL_ASOCIACION,
+         fraccion_crecimiento <= 1 - UMBRAL_ASOCIACION],
+        ['Consumido / sin producción', 'Asociado al crecimiento', 'No asociado al crecimiento'],
+        default='Mixto'
+    )
+
+
+@memoizar()
+def ajustar_luedeking_piret(productos, tiempo_biomasa, biomasa):
+    """α y β de dP/dt = α·dX/dt + β·X para todos los metabolitos a la vez.
+
+    `productos` es una vista ancha (índice tiempo_h, una columna por metabolito). Como el
+    modelo es lineal en α y β, las ecuaciones normales 2×2 de cada metabolito se arman con
+    productos matriciales sobre la máscara de datos y se resuelven juntas. Devuelve
+    (parámetros por metabolito, qP(t) por metabolito).
+    """
+    productos = productos.sort_index().interpolate(method='index', limit_area='inside')
+    t = productos.index.to_numpy(dtype=np.float64)
+    P = productos.to_numpy(dtype=np.float64)
+    tb = np.asarray(tiempo_biomasa, dtype=np.float64)
+    xb = np.asarray(biomasa, dtype=np.float64)
+
+    # Biomasa y su derivada en los tiempos de muestreo de metabolitos
+    X = np.interp(t, tb, xb)
+    dX = np.interp(t, tb, np.gradient(xb, tb))
+    dP = np.gradient(P, t, axis=0)
+
+    w = np.isfinite(dP).astype(np.float64)
+    dP0 = np.where(w > 0, dP, 0.0)
+    a11, a12, a22 = w.T @ (dX * dX), w.T @ (dX * X), w.T @ (X * X)
+    b1, b2 = dX @ dP0, X @ dP0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        det = a11 * a22 - a12 ** 2
+        alfa = (b1 * a22 - b2 * a12) / det
+        beta = (a11 * b2 - a12 * b1) / det
+
+        residuos = w * (dP0 - (np.outer(dX, alfa) + np.outer(X, beta)))
+        n = w.sum(axis=0)
+        media = dP0.sum(axis=0) / n
+        ss_tot = (w * (dP0 - media) ** 2).sum(axis=0)
+        r2 = 1 - (residuos ** 2).sum(axis=0) / ss_tot
+
+        # Contribución de cada término a la producción en el intervalo observado
+        crecimiento = np.abs(alfa * (X[-1] - X[0]))
+        no_crecimiento = np.abs(beta * trapezoid(X, t))
+        fraccion = crecimiento / (crecimiento + no_crecimiento)
+
+        qp = dP / X[:, None]
+
+    parametros = pd.DataFrame({
+        'alfa': alfa,
+        'beta': beta,
+        'r2': r2,
+        'puntos': n.astype(int),
+        'fraccion_crecimiento': fraccion,
+        'clasificacion': clasificar_produccion(fraccion, alfa, beta),
+    }, index=productos.columns)
+    return parametros, pd.DataFrame(qp, index=productos.index, columns=productos.columns)
+
+
+# --- PERFILADO MULTIVARIADO (PCA Y AGRUPAMIENTO) ---
+@memoizar(max_entradas=8)
+def perfilar_metabolitos(ancha, n_componentes=3, n_grupos=3, metodo='ward', max_arbol=3000):
+    """PCA por SVD truncada y agrupamiento jerárquico de la matriz muestras × metabolitos.
+
+    Los valores faltantes cuentan como no detectados (0); la matriz se transforma con
+    log1p y se autoescala antes de descomponerla. Devuelve un diccionario con puntuaciones,
+    cargas, varianza explicada y grupo de cada muestra. Con más de `max_arbol` muestras el
+    árbol se construye sobre una submuestra y el resto se asigna al centroide más cercano.
+    """
+    from scipy.cluster.hierarchy import fcluster, linkage
+
+    matriz = np.log1p(np.clip(ancha.fillna(0.0).to_numpy(dtype=np.float64), 0, None))
+    desviacion = matriz.std(axis=0)
+    variables = desviacion > 0
+    z = (matriz[:, variables] - matriz[:, variables].mean(axis=0)) / desviacion[variables]
+    nombres = ancha.columns[variables]
+
+    k = max(1, min(n_componentes, *z.shape)) if z.size else 0
+    if k == 0 or len(z) < 2:
+        raise ValueError("Se necesitan al menos 2 muestras y un metabolito con variación")
+
+    # SVD delgada: la matriz tiene pocas columnas (metabolitos), así que es barata aun con miles de muestras
+    u, sv, vt = np.linalg.svd(z, full_matrices=False)
+    signo = np.sign(vt[:k, np.argmax(np.abs(vt[:k]), axis=1)].diagonal())  # Orientación estable de los ejes
+    signo[signo == 0] = 1
+    puntuaciones = u[:, :k] * sv[:k] * signo
+    cargas = vt[:k].T * signo
+    varianza = sv ** 2 / (sv ** 2).sum()
+
+    columnas_pc = [f'PC{i + 1}' for i in range(k)]
+    n_grupos = min(n_grupos, len(z))
+    if len(z) <= max_arbol:
+        grupos = fcluster(linkage(puntuaciones, method=metodo), t=n_grupos, criterion='maxclust')
+    else:
+        # El enlace jerárquico es O(n²): árbol sobre una submuestra y asignación por centroide
+        sub = np.random.default_rng(0).choice(len(z), max_arbol, replace=False)
+        grupos_sub = fcluster(linkage(puntuaciones[sub], method=metodo), t=n_grupos, criterion='maxclust')
+        etiquetas = np.unique(grupos_sub)
+        centroides = np.array([puntuaciones[sub][grupos_sub == g].mean(axis=0) for g in etiquetas])
+        distancias = ((puntuaciones[:, None, :] - centroides[None, :, :]) ** 2).sum(axis=2)
+        grupos = etiquetas[distancias.argmin(axis=1)]
+
+    return {
+        'puntuaciones': pd.DataFrame(puntuaciones, index=ancha.index, columns=columnas_pc).assign(grupo=grupos),
+        'cargas': pd.DataFrame(cargas, index=nombres, columns=columnas_pc),
+        'varianza_explicada': pd.Series(varianza[:k], index=columnas_pc),
+        'perfil_grupos': ancha.fillna(0.0).groupby(grupos).mean(),
+    }
@@ -0,0 +1,522 @@
+"""
+Ingesta de telemetría del biorreactor.
+Un lector asyncio en segundo plano recibe lecturas por etiqueta (pH, temperatura, agitación,
+oxígeno disuelto) desde un socket TCP/Unix, un archivo que crece o un simulador, y las escribe
+por lotes en búferes circulares NumPy preasignados que la interfaz consulta sin bloquearse.
+Además de las lecturas crudas se mantienen agregados mín/máx/media a 10 s, 1 min y 10 min, de
+modo que el historial completo ocupa memoria fija y los gráficos se reducen con LTTB.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+ETIQUETAS = ('ph', 'temperatura', 'agitacion', 'oxigeno_disuelto')
+NOMBRES_ETIQUETAS = {
+    'ph': 'pH',
+    'temperatura': 'Temperatura (°C)',
+    'agitacion': 'Agitación (RPM)',
+    'oxigeno_disuelto': 'Oxígeno Disuelto (%)',
+}
+CAPACIDAD_POR_DEFECTO = 36_000  # 10 h a 1 Hz por etiqueta
+TAMANO_LECTURA = 65_536
+# Resolución (s) -> cubetas conservadas: 2 días a 10 s, 14 días a 1 min, 90 días a 10 min
+NIVELES_AGREGADOS = {10: 17_280, 60: 20_160, 600: 12_960}
+MAX_PUNTOS_GRAFICO = 1_000
+
+
+# --- 1. BÚFERES CIRCULARES ---
+def _escribir_circular(destinos, fuentes, escritos, capacidad):
+    """Copiar fuentes (mismo largo) a los arreglos circulares a continuación de `escritos` elementos.
+
+    De un lote mayor que la capacidad solo se copia la cola, en la posición que le corresponde.
+    """
+    n = len(fuentes[0])
+    if n > capacidad:
+        escritos += n - capacidad
+        fuentes = [fuente[-capacidad:] for fuente in fuentes]
+        n = capacidad
+    inicio = escritos % capacidad
+    primero = min(n, capacidad - inicio)
+    for destino, fuente in zip(destinos, fuentes):
+        destino[inicio:inicio + primero] = fuente[:primero]
+        destino[:n - primero] = fuente[primero:]
+
+
+def _leer_circular(arreglo, escritos, capacidad, n):
+    """Copia de los n elementos más recientes de un arreglo circular, en orden cronológico."""
+    fin = escritos % capacidad
+    if n <= fin:
+        return arreglo[fin - n:fin].copy()
+    return np.concatenate((arreglo[capacidad - (n - fin):], arreglo[:fin]))
+
+
+class BufferCircular:
+    """Tiempos y valores de una etiqueta en arreglos fijos; lo más antiguo se sobrescribe."""
+
+    def __init__(self, capacidad=CAPACIDAD_POR_DEFECTO):
+        self.capacidad = capacidad
+        self.tiempos = np.full(capacidad, np.nan)
+        self.valores = np.full(capacidad, np.nan)
+        self.escritos = 0
+
+    def __len__(self):
+        return min(self.escritos, self.capacidad)
+
+    def agregar(self, tiempos, valores):
+        """Escribir un lote (a lo sumo dos copias de bloque, sin bucles por muestra)."""
+        tiempos = np.asarray(tiempos, dtype=np.float64)
+        valores = np.asarray(valores, dtype=np.float64)
+        if len(tiempos) == 0:
+            return
+        _escribir_circular((self.tiempos, self.valores), (tiempos, valores), self.escritos, self.capacidad)
+        self.escritos += len(tiempos)
+
+    def ultimo(self):
+        """(tiempo, valor) más reciente, o None si aún no hay datos."""
+        if self.escritos == 0:
+            return None
+        i = (self.escritos - 1) % self.capacidad
+        return float(self.tiempos[i]), float(self.valores[i])
+
+    def ultimos(self, n=None):
+        """Copias (tiempos, valores) de las n muestras más recientes en orden cronológico."""
+        n = len(self) if n is None else min(n, len(self))
+        return (_leer_circular(self.tiempos, self.escritos, self.capacidad, n),
+                _leer_circular(self.valores, self.escritos, self.capacidad, n))
+
+    def desde(self, t_inicio):
+        """Muestras con tiempo >= t_inicio (BuferesTelemetria descarta las lecturas fuera de orden)."""
+        tiempos, valores = self.ultimos()
+        i = np.searchsorted(tiempos, t_inicio)
+        return tiempos[i:], valores[i:]
+
+
+class NivelAgregado:
+    """Cubetas mín/máx/suma/conteo de una resolución, actualizadas por lote a medida que llegan datos."""
+
+    def __init__(self, resolucion, capacidad):
+        self.resolucion = resolucion
+        self.capacidad = capacidad
+        self.cubeta = np.zeros(capacidad, dtype=np.int64)
+        self.minimo = np.zeros(capacidad)
+        self.maximo = np.zeros(capacidad)
+        self.suma = np.zeros(capacidad)
+        self.conteo = np.zeros(capacidad, dtype=np.int64)
+        self.escritos = 0
+
+    def __len__(self):
+        return min(self.escritos, self.capacidad)
+
+    def agregar(self, tiempos, valores):
+        """Reducir el lote por cubeta (reduceat) y fusionar la primera con la cubeta abierta."""
+        if len(tiempos) == 0:
+            return
+        ids = np.floor(tiempos / self.resolucion).astype(np.int64)
+        abierta = (self.escritos - 1) % self.capacidad
+        # Las lecturas atrasadas se cuentan en la cubeta abierta para no reabrir cubetas cerradas
+        ids = np.maximum.accumulate(np.maximum(ids, self.cubeta[abierta]) if self.escritos else ids)
+        inicios = np.concatenate(([0], np.flatnonzero(np.diff(ids)) + 1))
+        grupos = (
+            ids[inicios],
+            np.minimum.reduceat(valores, inicios),
+            np.maximum.reduceat(valores, inicios),
+            np.add.reduceat(valores, inicios),
+            np.diff(np.append(inicios, len(ids))),
+        )
+        if self.escritos and grupos[0][0] == self.cubeta[abierta]:
+            self.minimo[abierta] = min(self.minimo[abierta], grupos[1][0])
+            self.maximo[abierta] = max(self.maximo[abierta], grupos[2][0])
+            self.suma[abierta] += grupos[3][0]
+            self.conteo[abierta] += grupos[4][0]
+            grupos = tuple(g[1:] for g in grupos)
+        if len(grupos[0]) == 0:
+            return
+        _escribir_circular((self.cubeta, self.minimo, self.maximo, self.suma, self.conteo),
+                           grupos, self.escritos, self.capacidad)
+        self.escritos += len(grupos[0])
+
+    def inicio_cobertura(self):
+        """Inicio (s) de la cubeta más antigua conservada."""
+        if self.escritos == 0:
+            return np.inf
+        return float(_leer_circular(self.cubeta, self.escritos, self.capacidad, len(self))[0] * self.resolucion)
+
+    def ventana(self, t_inicio):
+        """(centro, mínimo, máximo, media) de las cubetas que terminan después de t_inicio."""
+        n = len(self)
+        cubeta = _leer_circular(self.cubeta, self.escritos, self.capacidad, n)
+        desde = np.searchsorted(cubeta, np.floor(t_inicio / self.resolucion))
+        leer = lambda arreglo: _leer_circular(arreglo, self.escritos, self.capacidad, n)[desde:]
+        conteo = leer(self.conteo)
+        return ((cubeta[desde:] + 0.5) * self.resolucion, leer(self.minimo), leer(self.maximo),
+                leer(self.suma) / np.maximum(conteo, 1))
+
+    def memoria_bytes(self):
+        return sum(a.nbytes for a in (self.cubeta, self.minimo, self.maximo, self.suma, self.conteo))
+
+
+def lttb(x, y, max_puntos):
+    """Índices elegidos por Largest-Triangle-Three-Buckets (conserva picos y forma con pocos puntos)."""
+    n = len(x)
+    if max_puntos >= n or max_puntos < 3:
+        return np.arange(n)
+    bordes = np.floor(np.linspace(1, n - 1, max_puntos - 1)).astype(np.int64)
+    # Promedio de cada cubeta (el tercer vértice del triángulo) en una sola pasada
+    sx, sy = np.add.reduceat(x[1:n - 1], bordes[:-1] - 1), np.add.reduceat(y[1:n - 1], bordes[:-1] - 1)
+    tamanos = np.diff(bordes)
+    media_x = np.append(sx / tamanos, x[-1])
+    media_y = np.append(sy / tamanos, y[-1])
+
+    elegidos = np.empty(max_puntos, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    a = 0
+    for i in range(max_puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        areas = np.abs((x[a] - media_x[i + 1]) * (y[inicio:fin] - y[a])
+                       - (x[a] - x[inicio:fin]) * (media_y[i + 1] - y[a]))
+        a = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = a
+    return elegidos
+
+
+class BuferesTelemetria:
+    """Un búfer por etiqueta con un bloqueo compartido entre el lector y la interfaz."""
+
+    def __init__(self, capacidad=CAPACIDAD_POR_DEFECTO, etiquetas=ETIQUETAS, niveles=NIVELES_AGREGADOS):
+        self.capacidad = capacidad
+        self.niveles = dict(niveles)
+        self._buferes = {}
+        self._agregados = {}
+        for etiqueta in etiquetas:
+            self._crear(etiqueta)
+        self._bloqueo = threading.Lock()
+        self.muestras = 0
+        self.descartadas = 0  # Lecturas con tiempo anterior a la última de su etiqueta
+
+    def _crear(self, etiqueta):
+        self._buferes[etiqueta] = BufferCircular(self.capacidad)
+        self._agregados[etiqueta] = [NivelAgregado(r, c) for r, c in sorted(self.niveles.items())]
+
+    def etiquetas(self):
+        return list(self._buferes)
+
+    def agregar_registros(self, registros):
+        """Agregar registros (etiqueta, tiempo, valor) agrupados por etiqueta en un solo volcado.
+
+        Los tiempos de sockets y archivos los pone la fuente: las lecturas anteriores a la última
+        ya guardada de su etiqueta se descartan para que los búferes queden ordenados.
+        """
+        por_etiqueta = {}
+        for etiqueta, t, valor in registros:
+            por_etiqueta.setdefault(etiqueta, ([], []))
+            por_etiqueta[etiqueta][0].append(t)
+            por_etiqueta[etiqueta][1].append(valor)
+        with self._bloqueo:
+            for etiqueta, (tiempos, valores) in por_etiqueta.items():
+                if etiqueta not in self._buferes:
+                    self._crear(etiqueta)
+                bufer = self._buferes[etiqueta]
+                tiempos, valores = np.asarray(tiempos, dtype=np.float64), np.asarray(valores, dtype=np.float64)
+                ultimo = bufer.ultimo()
+                previos = np.maximum.accumulate(np.concatenate(([ultimo[0] if ultimo else -np.inf], tiempos)))[:-1]
+                en_orden = tiempos >= previos
+                if not en_orden.all():
+                    self.descartadas += int((~en_orden).sum())
+                    tiempos, valores = tiempos[en_orden], valores[en_orden]
+                bufer.agregar(tiempos, valores)
+                for nivel in self._agregados[etiqueta]:
+                    nivel.agregar(tiempos, valores)
+                self.muestras += len(tiempos)
+
+    def instantanea(self):
+        """Último (tiempo, valor) de cada etiqueta con datos."""
+        with self._bloqueo:
+            ultimos = {etiqueta: bufer.ultimo() for etiqueta, bufer in self._buferes.items()}
+        return {etiqueta: dato for etiqueta, dato in ultimos.items() if dato is not None}
+
+    def serie(self, etiqueta, segundos=None):
+        """(tiempos, valores) de una etiqueta; con `segundos`, solo la ventana más reciente."""
+        with self._bloqueo:
+            bufer = self._buferes.get(etiqueta)
+            if bufer is None or len(bufer) == 0:
+                return np.empty(0), np.empty(0)
+            if segundos is None:
+                return bufer.ultimos()
+            return bufer.desde(bufer.ultimo()[0] - segundos)
+
+    def serie_grafico(self, etiqueta, segundos, max_puntos=MAX_PUNTOS_GRAFICO):
+        """Serie para graficar una ventana con a lo sumo `max_puntos` puntos.
+
+        Usa la resolución más fina que cubre toda la ventana sin exceder ~10 veces `max_puntos`
+        (lecturas crudas, 10 s, 1 min o 10 min) y la reduce con LTTB sobre la media; el mínimo y
+        el máximo se toman de todo el tramo entre puntos elegidos para no perder excursiones.
+        Devuelve un dict con 'tiempo', 'media', 'minimo', 'maximo' y 'resolucion' (s, 0 = cruda).
+        """
+        with self._bloqueo:
+            bufer = self._buferes.get(etiqueta)
+            if bufer is None or len(bufer) == 0:
+                return None
+            t_inicio = bufer.ultimo()[0] - segundos
+            # Un nivel cubre la ventana si conserva su inicio o si nunca ha descartado datos
+            crudos_desde = bufer.tiempos[(bufer.escritos - len(bufer)) % bufer.capacidad]
+            tiempos, valores = bufer.desde(t_inicio)
+            candidatos = [(0, tiempos, valores, valores, valores,
+                           bufer.escritos <= bufer.capacidad or crudos_desde <= t_inicio)]
+            for nivel in self._agregados[etiqueta]:
+                centro, minimo, maximo, media = nivel.ventana(t_inicio)
+                cubre = nivel.escritos <= nivel.capacidad or nivel.inicio_cobertura() <= t_inicio + nivel.resolucion
+                candidatos.append((nivel.resolucion, centro, minimo, maximo, media, cubre))
+
+        # La más fina que cubre la ventana y no excede el límite; si ninguna, la más gruesa
+        resolucion, x, minimo, maximo, media, _ = next(
+            (c for c in candidatos if c[5] and len(c[1]) <= 10 * max_puntos), candidatos[-1]
+        )
+        if len(x) == 0:
+            return None
+        indices = lttb(x, media, max_puntos)
+        return {
+            'tiempo': x[indices],
+            'media': media[indices],
+            'minimo': np.minimum.reduceat(minimo, indices),
+            'maximo': np.maximum.reduceat(maximo, indices),
+            'resolucion': resolucion,
+        }
+
+    def serie_agregada(self, etiqueta, segundos, max_puntos=MAX_PUNTOS_GRAFICO, resolucion=None):
+        """(centros, medias, resolución) de la ventana en el nivel agregado más fino con a lo sumo
+        `max_puntos` cubetas (o en el de `resolucion`); a diferencia de `serie_grafico`, los puntos
+        quedan a paso regular. La última cubeta puede seguir abierta."""
+        with self._bloqueo:
+            bufer = self._buferes.get(etiqueta)
+            if bufer is None or len(bufer) == 0:
+                return np.empty(0), np.empty(0), 0
+            niveles = self._agregados[etiqueta]
+            if resolucion is not None:
+                nivel = next(n for n in niveles if n.resolucion == resolucion)
+            else:
+                nivel = next((n for n in niveles if segundos / n.resolucion <= max_puntos), niveles[-1])
+            centro, _, _, media = nivel.ventana(bufer.ultimo()[0] - segundos)
+        return centro, media, nivel.resolucion
+
+    def memoria_bytes(self):
+        """Memoria fija de búferes y agregados (no crece con la duración del cultivo)."""
+        return sum(b.tiempos.nbytes + b.valores.nbytes for b in self._buferes.values()) + sum(
+            nivel.memoria_bytes() for niveles in self._agregados.values() for nivel in niveles
+        )
+
+
+# --- 2. FUENTES DE DATOS ---
+def parsear_linea(linea, ahora=None):
+    """Registro (etiqueta, tiempo, valor) de una línea 'etiqueta,valor[,tiempo]' o JSON; None si no es válida."""
+    linea = linea.strip()
+    if not linea or linea.startswith('#'):
+        return None
+    try:
+        if linea.startswith('{'):
+            dato = json.loads(linea)
+            etiqueta, valor, t = dato['etiqueta'], dato['valor'], dato.get('tiempo')
+        else:
+            partes = linea.split(',')
+            etiqueta, valor = partes[0], partes[1]
+            t = partes[2] if len(partes) > 2 else None
+        t = float(t) if t not in (None, '') else (time.time() if ahora is None else ahora)
+        return str(etiqueta).strip().lower(), t, float(valor)
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+def parsear_bloque(texto, ahora=None):
+    """Registros válidos de un bloque de líneas completas."""
+    ahora = time.time() if ahora is None else ahora
+    registros = (parsear_linea(linea, ahora) for linea in texto.splitlines())
+    return [r for r in registros if r is not None]
+
+
+class FuenteSimulada:
+    """Simulador: cada etiqueta oscila alrededor de su consigna (proceso de Ornstein-Uhlenbeck)."""
+
+    RUIDO = {'ph': 0.05, 'temperatura': 0.2, 'agitacion': 3.0, 'oxigeno_disuelto': 1.5}
+    RETORNO = 0.2  # Fracción de la desviación que se corrige por segundo
+
+    def __init__(self, consignas, frecuencia_hz=1.0, semilla=None):
+        self.consignas = dict(consignas)
+        self.frecuencia_hz = frecuencia_hz
+        self._rng = np.random.default_rng(semilla)
+        self._estado = None
+
+    def descripcion(self):
+        return f"Simulador ({self.frecuencia_hz:g} Hz)"
+
+    def actualizar_consignas(self, consignas):
+        self.consignas.update(consignas)
+
+    def paso(self, dt):
+        """Un instante simulado para todas las etiquetas."""
+        etiquetas = list(self.consignas)
+        objetivo = np.array([self.consignas[e] for e in etiquetas], dtype=np.float64)
+        ruido = np.array([self.RUIDO.get(e, 0.01 * abs(self.consignas[e])) for e in etiquetas])
+        if self._estado is None or len(self._estado) != len(etiquetas):
+            self._estado = objetivo.copy()
+        self._estado += self.RETORNO * (objetivo - self._estado) * dt + ruido * np.sqrt(dt) * self._rng.standard_normal(len(etiquetas))
+        return dict(zip(etiquetas, self._estado))
+
+    async def lotes(self, detenido):
+        dt = 1.0 / self.frecuencia_hz
+        while not detenido():
+            ahora = time.time()
+            yield [(etiqueta, ahora, float(valor)) for etiqueta, valor in self.paso(dt).items()]
+            await asyncio.sleep(dt)
+
+
+class FuenteSocket:
+    """Líneas de telemetría desde un servidor TCP ('host:puerto') o un socket Unix ('unix:/ruta')."""
+
+    def __init__(self, direccion, espera_lectura=0.5):
+        self.direccion = direccion
+        self.espera_lectura = espera_lectura
+
+    def descripcion(self):
+        return f"Socket {self.direccion}"
+
+    async def _conectar(self):
+        if self.direccion.startswith('unix:'):
+            return await asyncio.open_unix_connection(self.direccion[len('unix:'):])
+        host, puerto = self.direccion.rsplit(':', 1)
+        return await asyncio.open_connection(host or '127.0.0.1', int(puerto))
+
+    async def lotes(self, detenido):
+        lector, escritor = await self._conectar()
+        pendiente = ''
+        try:
+            while not detenido():
+                try:
+                    datos = await asyncio.wait_for(lector.read(TAMANO_LECTURA), self.espera_lectura)
+                except asyncio.TimeoutError:
+                    continue
+                if not datos:
+                    raise ConnectionError("El servidor cerró la conexión")
+                texto = pendiente + datos.decode('utf-8', errors='replace')
+                completas, _, pendiente = texto.rpartition('\n')
+                if completas:
+                    yield parsear_bloque(completas)
+        finally:
+            escritor.close()
+
+
+class FuenteArchivo:
+    """Seguimiento de un archivo de registro que crece (como `tail -f`)."""
+
+    def __init__(self, ruta, desde_inicio=False, intervalo=0.5):
+        self.ruta = ruta
+        self.desde_inicio = desde_inicio
+        self.intervalo = intervalo
+
+    def descripcion(self):
+        return f"Archivo {os.path.basename(self.ruta)}"
+
+    async def lotes(self, detenido):
+        with open(self.ruta, 'r', encoding='utf-8', errors='replace') as archivo:
+            if not self.desde_inicio:
+                archivo.seek(0, os.SEEK_END)
+            pendiente = ''
+            while not detenido():
+                datos = archivo.read(TAMANO_LECTURA)
+                if not datos:
+                    await asyncio.sleep(self.intervalo)
+                    continue
+                completas, _, pendiente = (pendiente + datos).rpartition('\n')
+                if completas:
+                    yield parsear_bloque(completas)
+
+
+# --- 3. LECTOR EN SEGUNDO PLANO ---
+class LectorFondo:
+    """Hilo con un bucle asyncio que vuelca los lotes de una fuente con `procesar`.
+
+    Los errores de la fuente (de conexión o de cualquier otro tipo) quedan en `error` y se
+    reintentan con espera creciente, sin matar el hilo. Un mismo lector puede atender a varias
+    sesiones: cada una llama a `consultar()` al leer los datos y, si ninguna lo hace durante
+    `inactividad_maxima` segundos, el hilo termina solo (una pestaña abandonada no deja hilos
+    ni conexiones abiertas). `iniciar()` lo reanuda.
+    """
+
+    ESPERA_MAXIMA = 10.0  # Segundos entre reintentos de conexión
+    INACTIVIDAD_MAXIMA = 120.0  # Segundos sin consultas antes de cerrar la fuente
+    NOMBRE_HILO = 'lector'
+
+    def __init__(self, fuente, inactividad_maxima=INACTIVIDAD_MAXIMA):
+        self.fuente = fuente
+        self.inactividad_maxima = inactividad_maxima
+        self.error = None
+        self.lotes = 0
+        self._detener = threading.Event()
+        self._hilo = None
+        self._ultima_consulta = time.monotonic()
+        self._bloqueo_hilo = threading.Lock()
+
+    @property
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def consultar(self):
+        """Registrar que una sesión sigue leyendo los datos."""
+        self._ultima_consulta = time.monotonic()
+
+    def _detenido(self):
+        return self._detener.is_set() or time.monotonic() - self._ultima_consulta > self.inactividad_maxima
+
+    def iniciar(self):
+        self.consultar()
+        with self._bloqueo_hilo:  # Varias sesiones pueden llamar a la vez
+            if self.activo:
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=lambda: asyncio.run(self._leer()), daemon=True, name=self.NOMBRE_HILO)
+            self._hilo.start()
+
+    def detener(self, espera=2.0):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(espera)
+
+    def procesar(self, lote):
+        """Volcar un lote de la fuente (lo definen las subclases)."""
+        raise NotImplementedError
+
+    async def _leer(self):
+        """Leer hasta que se detenga; los errores se reintentan con espera creciente."""
+        espera = 0.5
+        while not self._detenido():
+            try:
+                async for lote in self.fuente.lotes(self._detenido):
+                    self.procesar(lote)
+                    self.lotes += 1
+                    self.error = None
+                    espera = 0.5
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, self.ESPERA_MAXIMA)
+
+
+class LectorTelemetria(LectorFondo):
+    """Lector que escribe los registros (etiqueta, tiempo, valor) en búferes por etiqueta."""
+
+    NOMBRE_HILO = 'lector-telemetria'
+
+    def __init__(self, fuente, capacidad=CAPACIDAD_POR_DEFECTO, motor_alarmas=None,
+                 inactividad_maxima=LectorFondo.INACTIVIDAD_MAXIMA):
+        super().__init__(fuente, inactividad_maxima)
+        self.buferes = BuferesTelemetria(capacidad)
+        self.motor_alarmas = motor_alarmas  # alarmas.MotorAlarmas evaluado tras cada lote
+
+    def procesar(self, lote):
+        if lote:
+            self.buferes.agregar_registros(lote)
+            if self.motor_alarmas is not None:
+                self.motor_alarmas.evaluar_buferes([self.buferes])
@@ -0,0 +1,99 @@
+"""
+Pruebas del núcleo sin Streamlit contra resultados conocidos: cada ruta vectorizada o
+incremental se compara con su versión directa.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import antibiogramas
+from calculos_bio import SustitutoGP, ordenamiento_no_dominado, regresion_ventanas
+from calculos_bio.sustituto import kernel_rbf
+
+
+# --- 1. REGRESIÓN POR VENTANAS ---
+def test_regresion_ventanas_coincide_con_linregress():
+    rng = np.random.default_rng(0)
+    t = np.sort(rng.uniform(0, 24, 15))
+    y = np.exp(0.3 * t) * (1 + 0.05 * rng.standard_normal(len(t)))
+
+    inicio, fin, pendiente, r2 = regresion_ventanas(t, np.log(y), min_puntos=3, max_puntos=8)
+
+    assert len(inicio) == sum(len(t) - k + 1 for k in range(3, 9))
+    for i, f, p, r in zip(inicio, fin, pendiente, r2):
+        ajuste = stats.linregress(t[i:f + 1], np.log(y[i:f + 1]))
+        assert p == pytest.approx(ajuste.slope, rel=1e-9, abs=1e-12)
+        assert r == pytest.approx(ajuste.rvalue ** 2, rel=1e-9, abs=1e-12)
+
+
+def test_regresion_ventanas_sin_puntos_suficientes():
+    inicio, fin, pendiente, r2 = regresion_ventanas([0.0, 1.0], [1.0, 2.0], min_puntos=3)
+    assert len(inicio) == len(fin) == len(pendiente) == len(r2) == 0
+
+
+# --- 2. ORDENAMIENTO NO DOMINADO ---
+def _frentes_fuerza_bruta(puntos):
+    """Pelar frentes: un punto es dominado si otro es >= en todo y > en algo (mayor es mejor)."""
+    restantes = list(range(len(puntos)))
+    frentes = np.full(len(puntos), -1)
+    frente = 0
+    while restantes:
+        actual = [i for i in restantes
+                  if not any(np.all(puntos[j] >= puntos[i]) and np.any(puntos[j] > puntos[i]) for j in restantes)]
+        frentes[actual] = frente
+        restantes = [i for i in restantes if i not in actual]
+        frente += 1
+    return frentes
+
+
+@pytest.mark.parametrize('objetivos', [1, 2, 3, 4])
+def test_ordenamiento_no_dominado_coincide_con_fuerza_bruta(objetivos):
+    rng = np.random.default_rng(objetivos)
+    # Valores enteros para forzar empates y puntos repetidos
+    puntos = rng.integers(0, 6, size=(80, objetivos)).astype(np.float64)
+    np.testing.assert_array_equal(ordenamiento_no_dominado(puntos), _frentes_fuerza_bruta(puntos))
+
+
+# --- 3. SUSTITUTO GP ---
+def test_sustituto_gp_extension_por_bloques_igual_a_refactorizar():
+    rng = np.random.default_rng(1)
+    X = rng.uniform(0, 1, (22, 3))
+    y = np.sin(3 * X[:, 0]) + X[:, 1] ** 2 - X[:, 2]
+
+    gp = SustitutoGP()
+    gp.actualizar(X[:20], y[:20])
+    gp.actualizar(X, y)  # 22 < 1.25 × 20: se extiende el factor sin reajustar hiperparámetros
+    assert gp.refactorizaciones == 1 and gp.extensiones == 1
+
+    K = kernel_rbf(X, X, gp.longitud) + gp.ruido * np.eye(len(X))
+    L = np.linalg.cholesky(K)
+    np.testing.assert_allclose(gp._L, L, atol=1e-10)
+
+    candidatos = rng.uniform(0, 1, (10, 3))
+    Ks = kernel_rbf(candidatos, X, gp.longitud)
+    y_std = (y - y.mean()) / y.std()
+    media_ref = y.mean() + y.std() * Ks @ np.linalg.solve(K, y_std)
+    media, _ = gp.predecir(candidatos)
+    np.testing.assert_allclose(media, media_ref, rtol=1e-8, atol=1e-8)
+
+
+# --- 4. INTERPRETACIÓN POR LOTES ---
+def test_interpretar_lote_con_puntos_de_corte_conocidos():
+    indice = antibiogramas.indice_por_defecto()
+    lecturas = pd.DataFrame({
+        'antibiotico': ['Ampicilina', 'ampicilina', 'AMP', 'Ampicillin', 'Gentamicina', 'Desconocido'],
+        'diametro_halo': [17.0, 15.0, 13.0, 20.0, 11.0, 25.0],
+        'microorganismo': ['E. coli'] * 6,
+    })
+    esperado = [antibiogramas.SENSIBLE, antibiogramas.INTERMEDIO, antibiogramas.RESISTENTE,
+                antibiogramas.SENSIBLE, antibiogramas.RESISTENTE, antibiogramas.SENSIBLE]
+
+    resultado = indice.interpretar_lote(lecturas, *antibiogramas.ESTANDAR_POR_DEFECTO)
+
+    assert list(resultado) == esperado
+    individuales = [indice.interpretar(fila.antibiotico, fila.diametro_halo, *antibiogramas.ESTANDAR_POR_DEFECTO,
+                                       microorganismo=fila.microorganismo)
+                    for fila in lecturas.itertuples()]
+    assert list(resultado) == individuales
@@ -0,0 +1,142 @@
+"""
+Vigilancia acumulada de susceptibilidad antimicrobiana.
+Mantiene contadores mensuales S/I/R por organismo, antibiótico y origen; las ventanas
+móviles y tendencias se responden desde esos resúmenes sin volver a leer las lecturas.
+"""
+
+import numpy as np
+import pandas as pd
+
+from antibiogramas import ETIQUETAS_SIR, SENSIBLE, INTERMEDIO, RESISTENTE, codificar_sir
+
+NIVELES = ['mes', 'organismo', 'antibiotico', 'origen']
+MIN_AISLAMIENTOS = 30  # Mínimo recomendado (CLSI M39) para reportar un % de sensibilidad
+
+
+def _hash_claves(*columnas):
+    """Hash uint64 por fila de varias columnas (para deduplicar sin guardar las claves)."""
+    return pd.util.hash_pandas_object(pd.DataFrame(dict(enumerate(columnas))), index=False).to_numpy()
+
+
+class AgregadorVigilancia:
+    """Contadores mensuales incrementales para reportes acumulados de antibiogramas."""
+
+    def __init__(self, primer_aislamiento=True):
+        """Con primer_aislamiento=True solo cuenta el primer aislamiento por paciente, organismo y año."""
+        self.primer_aislamiento = primer_aislamiento
+        self.conteos = pd.DataFrame(
+            columns=ETIQUETAS_SIR, dtype=np.int64,
+            index=pd.MultiIndex.from_arrays([[] for _ in NIVELES], names=NIVELES)
+        )
+        # hash(paciente, organismo, año) -> día del primer aislamiento
+        self._primeros = pd.Series(dtype='datetime64[ns]')
+        self.lecturas_recibidas = 0
+        self.lecturas_contadas = 0
+        self.ultimo_dia = None  # Día más reciente ya contado
+
+    def _filtrar_primer_aislamiento(self, df, fechas):
+        """Máscara de lecturas que pertenecen al primer aislamiento de cada paciente."""
+        dias = fechas.dt.floor('D')
+        claves = _hash_claves(df['paciente'], df['microorganismo'], fechas.dt.year)
+        claves = pd.Series(claves, index=df.index)
+
+        primeros_lote = dias.groupby(claves.to_numpy()).min()
+        # Las claves ya vistas conservan su fecha; las nuevas toman la del lote
+        primeros = pd.concat([primeros_lote, self._primeros.reindex(primeros_lote.index)], axis=1).min(axis=1)
+        self._primeros = primeros.combine_first(self._primeros)
+        return (dias.to_numpy() == primeros.reindex(claves.to_numpy()).to_numpy())
+
+    @staticmethod
+    def _fechas(df):
+        return pd.to_datetime(df['fecha'], errors='coerce', format='ISO8601')
+
+    def en_orden(self, df):
+        """Si el lote puede incorporarse sin reabrir lo ya contado.
+
+        El filtro de primer aislamiento es incremental solo si los lotes llegan en orden: una
+        lectura anterior al último día contado podría desplazar un primer aislamiento ya sumado.
+        """
+        if not self.primer_aislamiento or self.ultimo_dia is None or len(df) == 0:
+            return True
+        primero = self._fechas(df).min()
+        return pd.isna(primero) or primero.floor('D') >= self.ultimo_dia
+
+    def agregar(self, df):
+        """Incorporar un lote de lecturas (microorganismo, antibiotico, interpretacion, fecha).
+
+        Un lote fuera de orden (ver `en_orden`) lanza ValueError: hay que reconstruir el
+        agregador con todas las lecturas.
+        """
+        if len(df) == 0:
+            return
+        if not self.en_orden(df):
+            raise ValueError(f"Lote con lecturas anteriores al {self.ultimo_dia:%Y-%m-%d} ya contado; "
+                             "reconstruir el agregador con todas las lecturas")
+        self.lecturas_recibidas += len(df)
+
+        fechas = self._fechas(df)
+        mascara = fechas.notna().to_numpy()
+        if self.primer_aislamiento and 'paciente' in df.columns:
+            mascara = mascara & (self._filtrar_primer_aislamiento(df, fechas) | df['paciente'].isna().to_numpy())
+        df = df[mascara]
+        if len(df) == 0:
+            return
+        ultimo = fechas[mascara].max().floor('D')
+        self.ultimo_dia = ultimo if self.ultimo_dia is None else max(self.ultimo_dia, ultimo)
+
+        lote = pd.DataFrame({
+            'mes': fechas[mascara].to_numpy().astype('datetime64[M]'),
+            'organismo': df['microorganismo'].astype(str),
+            'antibiotico': df['antibiotico'].astype(str),
+            'origen': df['origen'].fillna('Sin origen').astype(str) if 'origen' in df.columns else 'Sin origen',
+            'sir': codificar_sir(df['interpretacion'])
+        })
+        nuevos = (lote.groupby(NIVELES + ['sir'], observed=True).size()
+                      .unstack(fill_value=0)
+                      .reindex(columns=ETIQUETAS_SIR, fill_value=0))
+        self.lecturas_contadas += int(nuevos.to_numpy().sum())
+        self.conteos = self.conteos.add(nuevos, fill_value=0).astype(np.int64)
+
+    def _ventana(self, fin, meses):
+        """Contadores de los `meses` meses que terminan en `fin` (último mes con datos por defecto)."""
+        if self.conteos.empty:
+            return self.conteos
+        meses_idx = self.conteos.index.get_level_values('mes')
+        fin = np.datetime64(pd.Timestamp(fin), 'M') if fin is not None else meses_idx.max().to_datetime64().astype('datetime64[M]')
+        inicio = fin - np.timedelta64(meses - 1, 'M')
+        meses_m = meses_idx.to_numpy().astype('datetime64[M]')
+        return self.conteos[(meses_m >= inicio) & (meses_m <= fin)]
+
+    @staticmethod
+    def _porcentajes(conteos):
+        tabla = conteos.copy()
+        tabla['Aislamientos'] = tabla[ETIQUETAS_SIR].sum(axis=1)
+        total = tabla['Aislamientos'].where(tabla['Aislamientos'] > 0)
+        tabla['% S'] = (tabla[SENSIBLE] / total * 100).round(1)
+        tabla['% I'] = (tabla[INTERMEDIO] / total * 100).round(1)
+        tabla['% R'] = (tabla[RESISTENTE] / total * 100).round(1)
+        tabla['Suficiente (≥30)'] = tabla['Aislamientos'] >= MIN_AISLAMIENTOS
+        return tabla
+
+    def acumulado(self, fin=None, meses=12, por_origen=False):
+        """Antibiograma acumulado (% S por organismo–antibiótico) en una ventana de `meses`."""
+        claves = ['organismo', 'antibiotico'] + (['origen'] if por_origen else [])
+        ventana = self._ventana(fin, meses)
+        return self._porcentajes(ventana.groupby(level=claves).sum())
+
+    def tendencia(self, organismo=None, antibiotico=None, meses=12, origen=None):
+        """% S en ventana móvil de `meses` para cada mes, desde los contadores mensuales."""
+        conteos = self.conteos
+        for nivel, valor in (('organismo', organismo), ('antibiotico', antibiotico), ('origen', origen)):
+            if valor is not None:
+                conteos = conteos[conteos.index.get_level_values(nivel) == valor]
+        if conteos.empty:
+            return self._porcentajes(conteos.droplevel(['organismo', 'antibiotico', 'origen']))
+
+        mensual = conteos.groupby(level='mes').sum()
+        rango = pd.date_range(mensual.index.min(), mensual.index.max(), freq='MS')
+        mensual = mensual.reindex(rango, fill_value=0)
+        movil = mensual.rolling(meses, min_periods=1).sum().astype(np.int64)
+        movil.index = movil.index.to_period('M')
+        movil.index.name = 'mes'
+        return self._porcentajes(movil)